@@ -0,0 +1,153 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+""" Micro-benchmark of azure.cli.core.util.todict against the previous implementation.
+
+Usage: python todict_benchmark.py [item count] [loops]
+"""
+
+from __future__ import print_function
+
+import re
+import sys
+import timeit
+from datetime import datetime, timedelta
+from enum import Enum
+
+from msrest.serialization import Model
+
+from azure.cli.core.util import todict
+
+# --------------------------------------------------------------------------------------------
+# The implementation prior to the per-class key map cache, for reference
+# --------------------------------------------------------------------------------------------
+
+KEYS_CAMELCASE_PATTERN = re.compile('(?!^)_([a-zA-Z])')
+
+
+def legacy_to_camel_case(s):
+    return re.sub(KEYS_CAMELCASE_PATTERN, lambda x: x.group(1).upper(), s)
+
+
+def legacy_todict(obj):  # pylint: disable=too-many-return-statements
+    if isinstance(obj, dict):
+        return {k: legacy_todict(v) for (k, v) in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_todict(a) for a in obj]
+    elif isinstance(obj, Enum):
+        return obj.value
+    elif isinstance(obj, datetime):
+        return obj.isoformat()
+    elif isinstance(obj, timedelta):
+        return str(obj)
+    elif hasattr(obj, '_asdict'):
+        return legacy_todict(obj._asdict())
+    elif hasattr(obj, '__dict__'):
+        return dict([(legacy_to_camel_case(k), legacy_todict(v))
+                     for k, v in obj.__dict__.items()
+                     if not callable(v) and not k.startswith('_')])
+    return obj
+
+
+# --------------------------------------------------------------------------------------------
+# Synthetic SDK models shaped like a 'vm list' / 'network nic list' result
+# --------------------------------------------------------------------------------------------
+
+class ProvisioningState(str, Enum):
+    succeeded = 'Succeeded'
+    failed = 'Failed'
+
+
+class SubResource(Model):
+    _attribute_map = {'id': {'key': 'id', 'type': 'str'}}
+
+    def __init__(self, id=None):  # pylint: disable=redefined-builtin
+        self.id = id
+
+
+class IPConfiguration(Model):
+    _attribute_map = {
+        'id': {'key': 'id', 'type': 'str'},
+        'name': {'key': 'name', 'type': 'str'},
+        'private_ip_address': {'key': 'properties.privateIPAddress', 'type': 'str'},
+        'private_ip_allocation_method': {'key': 'properties.privateIPAllocationMethod',
+                                         'type': 'str'},
+        'subnet': {'key': 'properties.subnet', 'type': 'SubResource'},
+        'public_ip_address': {'key': 'properties.publicIPAddress', 'type': 'SubResource'},
+        'provisioning_state': {'key': 'properties.provisioningState', 'type': 'str'},
+    }
+
+    def __init__(self, index):
+        self.id = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/' \
+                  'networkInterfaces/nic{0}/ipConfigurations/ipconfig1'.format(index)
+        self.name = 'ipconfig1'
+        self.private_ip_address = '10.0.{}.{}'.format(index // 256 % 256, index % 256)
+        self.private_ip_allocation_method = 'Dynamic'
+        self.subnet = SubResource(id='/subscriptions/sub/resourceGroups/rg/providers/'
+                                     'Microsoft.Network/virtualNetworks/vnet/subnets/default')
+        self.public_ip_address = SubResource(id='/subscriptions/sub/resourceGroups/rg/providers/'
+                                                'Microsoft.Network/publicIPAddresses/'
+                                                'ip{}'.format(index))
+        self.provisioning_state = ProvisioningState.succeeded
+
+
+class NetworkInterface(Model):
+    _attribute_map = {
+        'id': {'key': 'id', 'type': 'str'},
+        'name': {'key': 'name', 'type': 'str'},
+        'type': {'key': 'type', 'type': 'str'},
+        'location': {'key': 'location', 'type': 'str'},
+        'tags': {'key': 'tags', 'type': '{str}'},
+        'virtual_machine': {'key': 'properties.virtualMachine', 'type': 'SubResource'},
+        'ip_configurations': {'key': 'properties.ipConfigurations', 'type': '[IPConfiguration]'},
+        'mac_address': {'key': 'properties.macAddress', 'type': 'str'},
+        'primary': {'key': 'properties.primary', 'type': 'bool'},
+        'enable_accelerated_networking': {'key': 'properties.enableAcceleratedNetworking',
+                                          'type': 'bool'},
+        'enable_ip_forwarding': {'key': 'properties.enableIPForwarding', 'type': 'bool'},
+        'resource_guid': {'key': 'properties.resourceGuid', 'type': 'str'},
+        'provisioning_state': {'key': 'properties.provisioningState', 'type': 'str'},
+        'etag': {'key': 'etag', 'type': 'str'},
+    }
+
+    def __init__(self, index):
+        self.id = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Network/' \
+                  'networkInterfaces/nic{}'.format(index)
+        self.name = 'nic{}'.format(index)
+        self.type = 'Microsoft.Network/networkInterfaces'
+        self.location = 'westus'
+        self.tags = {'env': 'test', 'owner': 'benchmark'}
+        self.virtual_machine = SubResource(id='/subscriptions/sub/resourceGroups/rg/providers/'
+                                              'Microsoft.Compute/virtualMachines/'
+                                              'vm{}'.format(index))
+        self.ip_configurations = [IPConfiguration(index)]
+        self.mac_address = '00-0D-3A-00-00-{:02X}'.format(index % 256)
+        self.primary = True
+        self.enable_accelerated_networking = False
+        self.enable_ip_forwarding = False
+        self.resource_guid = '00000000-0000-0000-0000-{:012d}'.format(index)
+        self.provisioning_state = ProvisioningState.succeeded
+        self.etag = 'W/"{}"'.format(index)
+
+
+def _build_result(count):
+    return [NetworkInterface(i) for i in range(count)]
+
+
+def main(count=10000, loops=5):
+    result = _build_result(count)
+    if todict(result) != legacy_todict(result):
+        raise AssertionError('todict and legacy_todict produce different results')
+
+    timings = []
+    for name, func in [('legacy todict', legacy_todict), ('todict', todict)]:
+        elapsed = min(timeit.repeat(lambda: func(result), number=1, repeat=loops))  # pylint: disable=cell-var-from-loop
+        timings.append(elapsed)
+        print('{:<14} {:>8.3f}s for {} items (best of {})'.format(name, elapsed, count, loops))
+    print('speedup        {:>8.2f}x'.format(timings[0] / timings[1]))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:3]])
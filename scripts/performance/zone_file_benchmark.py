@@ -0,0 +1,78 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+""" Benchmark of the DNS zone file parser on generated zones of growing size. The time per
+record should stay flat as the zone grows, i.e. parsing scales linearly.
+
+Usage: python zone_file_benchmark.py [largest record count] [loops]
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from codecs import open as codecs_open
+
+from azure.cli.command_modules.network.zone_file import parse_zone_file
+
+ZONE_NAME = 'example.com'
+
+SOA = '''$ORIGIN example.com.
+$TTL 3600
+@ IN SOA ns1.example.com. hostmaster.example.com. (
+            2017040301 ; serial
+            12h        ; refresh
+            15m        ; retry
+            3w         ; expire
+            3h )       ; minimum
+@ 172800 IN NS ns1.example.com.
+@ 172800 IN NS ns2.example.com.
+'''
+
+# a mix of the record types found in real zones, with continuation lines and comments
+RECORDS = [
+    'host{0} IN A 10.{1}.{2}.{3}',
+    '        IN AAAA 2001:db8::{0:x}',
+    'www{0} 300 IN CNAME host{0}',
+    'mail{0} IN MX 10 mx{0}.example.net.',
+    'txt{0} IN TXT "v=spf1 include:spf{0}.example.net -all" ; spf',
+    '_sip._tcp.srv{0} IN SRV ( 10 20 5060\n        sip{0}.example.com. )',
+]
+
+
+def generate_zone(path, count):
+    with codecs_open(path, 'w', encoding='utf-8') as f:
+        f.write(SOA)
+        for i in range(count):
+            record = RECORDS[i % len(RECORDS)]
+            f.write(record.format(i, i // 65536 % 256, i // 256 % 256, i % 256))
+            f.write('\n')
+
+
+def parse(path):
+    with codecs_open(path, 'r', encoding='utf-8') as f:
+        return parse_zone_file(f, ZONE_NAME)
+
+
+def main(largest=200000, loops=3):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print('{:>8} {:>10} {:>16}'.format('records', 'seconds', 'us per record'))
+        count = max(1, largest // 16)
+        while count <= largest:
+            path = os.path.join(temp_dir, 'zone{}.txt'.format(count))
+            generate_zone(path, count)
+            elapsed = min(timeit.repeat(lambda: parse(path), number=1, repeat=loops))  # pylint: disable=cell-var-from-loop
+            print('{:>8} {:>10.3f} {:>16.2f}'.format(count, elapsed, elapsed * 1e6 / count))
+            count *= 2
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:3]])
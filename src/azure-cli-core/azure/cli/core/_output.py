@@ -11,11 +11,13 @@ import platform
 import json
 import traceback
 from collections import OrderedDict
+import six
 from six import StringIO, text_type, u, string_types
 import colorama
 from tabulate import tabulate
 
 from azure.cli.core.util import CLIError
+from azure.cli.core._config import az_config
 import azure.cli.core.azlogging as azlogging
 
 logger = azlogging.get_az_logger(__name__)
@@ -35,12 +37,36 @@ class ComplexEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+def is_output_streaming_enabled():
+    return az_config.getboolean('core', 'stream_output', fallback=False)
+
+
+def _dump_json(obj):
+    return json.dumps(obj, indent=2, sort_keys=True, cls=ComplexEncoder, separators=(',', ': '))
+
+
+def _format_json_stream(items):
+    # Produces the same text as `format_json` on the list of all items
+    empty = True
+    try:
+        for item in items:
+            yield ('[\n  ' if empty else ',\n  ') + _dump_json(item).replace('\n', '\n  ')
+            empty = False
+    except Exception:  # pylint: disable=broad-except
+        # close the array, so what was written before the error is still valid JSON
+        exc_info = sys.exc_info()
+        yield '[]\n' if empty else '\n]\n'
+        six.reraise(*exc_info)
+    yield '[]\n' if empty else '\n]\n'
+
+
 def format_json(obj):
     result = obj.result
+    if isinstance(result, StreamedResult):
+        return _format_json_stream(result)
     # OrderedDict.__dict__ is always '{}', to persist the data, convert to dict first.
     input_dict = dict(result) if hasattr(result, '__dict__') else result
-    return json.dumps(input_dict, indent=2, sort_keys=True, cls=ComplexEncoder,
-                      separators=(',', ': ')) + '\n'
+    return _dump_json(input_dict) + '\n'
 
 
 def format_json_color(obj):
@@ -77,18 +103,38 @@ def format_table(obj):
                        "Use --debug for more info.")
 
 
+def _format_tsv_stream(items):
+    for item in items:
+        yield TsvOutput.dump([item])
+
+
 def format_tsv(obj):
     result = obj.result
+    if isinstance(result, StreamedResult):
+        return _format_tsv_stream(result)
     result_list = result if isinstance(result, list) else [result]
     return TsvOutput.dump(result_list)
 
 
+class StreamedResult(object):  # pylint: disable=too-few-public-methods
+    """Result items that are produced one by one (e.g. page by page from a list operation) and
+    written out as they arrive by the formatters that support it.
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items)
+
+
 class CommandResultItem(object):  # pylint: disable=too-few-public-methods
 
-    def __init__(self, result, table_transformer=None, is_query_active=False):
+    def __init__(self, result, table_transformer=None, is_query_active=False, exit_code=0):
         self.result = result
         self.table_transformer = table_transformer
         self.is_query_active = is_query_active
+        self.exit_code = exit_code
 
 
 class OutputProducer(object):  # pylint: disable=too-few-public-methods
@@ -101,6 +147,8 @@ class OutputProducer(object):  # pylint: disable=too-few-public-methods
         'tsv': format_tsv,
     }
 
+    streaming_formatters = (format_json, format_tsv)
+
     def __init__(self, formatter, file=sys.stdout):  # pylint: disable=redefined-builtin
         self.formatter = formatter
         self.file = file
@@ -108,7 +156,23 @@ class OutputProducer(object):  # pylint: disable=too-few-public-methods
     def out(self, obj):
         if platform.system() == 'Windows':
             self.file = colorama.AnsiToWin32(self.file).stream
+        if isinstance(obj.result, StreamedResult) and \
+                self.formatter not in OutputProducer.streaming_formatters:
+            obj.result = list(obj.result)
         output = self.formatter(obj)
+        if isinstance(output, string_types):
+            self._write(output)
+        else:
+            try:
+                for chunk in output:
+                    self._write(chunk)
+                    self.file.flush()
+            except Exception:  # pylint: disable=broad-except
+                logger.warning('The output is incomplete, it only contains the items retrieved '
+                               'before the error.')
+                raise
+
+    def _write(self, output):
         try:
             print(output, file=self.file, end='')
         except IOError as ex:
@@ -5,17 +5,20 @@
 
 from __future__ import print_function
 
+import atexit
 import collections
 import errno
 import json
 import os.path
+import threading
 from copy import deepcopy
+from datetime import datetime, timedelta
 from enum import Enum
 
 import azure.cli.core.azlogging as azlogging
 from azure.cli.core._environment import get_config_dir
 from azure.cli.core._session import ACCOUNT
-from azure.cli.core.util import CLIError, get_file_json
+from azure.cli.core.util import CLIError, get_file_json, write_file_atomically
 from azure.cli.core.cloud import get_active_cloud, set_cloud_subscription
 
 logger = azlogging.get_az_logger(__name__)
@@ -43,6 +46,7 @@ _SERVICE_PRINCIPAL_CERT_FILE = 'certificateFile'
 _SERVICE_PRINCIPAL_CERT_THUMBPRINT = 'thumbprint'
 _TOKEN_ENTRY_USER_ID = 'userId'
 _TOKEN_ENTRY_TOKEN_TYPE = 'tokenType'
+_TOKEN_ENTRY_EXPIRES_ON = 'expiresOn'
 # This could mean either real access token, or client secret of a service principal
 # This naming is no good, but can't change because xplat-cli does so.
 _ACCESS_TOKEN = 'accessToken'
@@ -55,6 +59,23 @@ TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE = ['familyName',
 _CLIENT_ID = '04b07795-8ddb-461a-bbee-02f9e1bf7b46'
 _COMMON_TENANT = 'common'
 
+# Access tokens are reused within the process until they are this close to expiring
+_TOKEN_REFRESH_AHEAD = timedelta(minutes=5)
+
+# (tenant, resource, user or service principal) -> (token type, access token, expires on)
+_ACCESS_TOKEN_CACHE = {}
+# guards the dicts only; a token is acquired holding the lock of its key, so tokens for
+# different keys are acquired in parallel and the same token only once
+_ACCESS_TOKEN_CACHE_LOCK = threading.Lock()
+_ACCESS_TOKEN_LOCKS = {}
+
+# token file -> the credentials loaded from it, shared by all CredsCache instances
+_SHARED_CREDS = {}
+_SHARED_CREDS_LOCK = threading.Lock()
+
+# lookups of service principal tokens persisted by previous commands, reported with --debug
+SP_TOKEN_CACHE_STATS = {'hits': 0, 'misses': 0}
+
 
 def _authentication_context_factory(authority, cache):
     import adal
@@ -79,6 +100,54 @@ def _load_tokens_from_file(file_path):
     return all_entries
 
 
+def _clear_mgmt_service_client_cache():
+    # cached management clients are bound to the account they were created with
+    from azure.cli.core.commands.client_factory import clear_mgmt_service_client_cache
+    clear_mgmt_service_client_cache()
+
+
+def _get_token_expiration(token_entry):
+    """ adal records the expiry of a token as a local time, e.g. '2017-04-11 16:06:30.123456' """
+    expires_on = token_entry.get(_TOKEN_ENTRY_EXPIRES_ON)
+    for date_format in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(str(expires_on), date_format)
+        except ValueError:
+            pass
+    return None
+
+
+def _get_access_token_lock(key):
+    with _ACCESS_TOKEN_CACHE_LOCK:
+        return _ACCESS_TOKEN_LOCKS.setdefault(key, threading.Lock())
+
+
+def _get_cached_access_token(key):
+    with _ACCESS_TOKEN_CACHE_LOCK:
+        cached = _ACCESS_TOKEN_CACHE.get(key)
+    if cached and _is_token_valid(cached[2]):
+        return cached[0], cached[1]
+    return None
+
+
+def _cache_access_token(key, token_entry):
+    token = (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN])
+    expires_on = _get_token_expiration(token_entry)
+    if expires_on:
+        with _ACCESS_TOKEN_CACHE_LOCK:
+            _ACCESS_TOKEN_CACHE[key] = token + (expires_on,)
+    return token
+
+
+def clear_access_token_cache():
+    with _ACCESS_TOKEN_CACHE_LOCK:
+        _ACCESS_TOKEN_CACHE.clear()
+
+
+def _is_token_valid(expires_on):
+    return expires_on is not None and datetime.now() + _TOKEN_REFRESH_AHEAD < expires_on
+
+
 def _delete_file(file_path):
     try:
         os.remove(file_path)
@@ -187,6 +256,7 @@ class Profile(object):
 
         set_cloud_subscription(active_cloud.name, default_sub_id)
         self._storage[_SUBSCRIPTIONS] = subscriptions
+        _clear_mgmt_service_client_cache()
 
     @staticmethod
     def _pick_working_subscription(subscriptions):
@@ -213,6 +283,7 @@ class Profile(object):
 
         set_cloud_subscription(active_cloud.name, result[0][_SUBSCRIPTION_ID])
         self._storage[_SUBSCRIPTIONS] = subscriptions
+        _clear_mgmt_service_client_cache()
 
     def logout(self, user_or_sp):
         subscriptions = self.load_cached_subscriptions(all_clouds=True)
@@ -222,10 +293,12 @@ class Profile(object):
 
         self._storage[_SUBSCRIPTIONS] = subscriptions
         self._creds_cache.remove_cached_creds(user_or_sp)
+        _clear_mgmt_service_client_cache()
 
     def logout_all(self):
         self._storage[_SUBSCRIPTIONS] = []
         self._creds_cache.remove_all_cached_creds()
+        _clear_mgmt_service_client_cache()
 
     def load_cached_subscriptions(self, all_clouds=False):
         subscriptions = self._storage.get(_SUBSCRIPTIONS) or []
@@ -417,6 +490,39 @@ class SubscriptionFinder(object):
         return all_subscriptions
 
 
+class _SharedCreds(object):  # pylint: disable=too-few-public-methods
+    '''The credentials loaded from a token file. Every CredsCache of the process works on the
+    same instance, so refreshed tokens are written by a single persister and no cache overwrites
+    the changes made through another one
+    '''
+
+    def __init__(self, token_file):
+        import adal
+        all_entries = _load_tokens_from_file(token_file)
+        self.service_principal_creds = [c for c in all_entries if c.get(_SERVICE_PRINCIPAL_ID)]
+        real_token = [x for x in all_entries if x not in self.service_principal_creds]
+        self.adal_token_cache = adal.TokenCache(json.dumps(real_token))
+        self.sp_token_cache = ServicePrincipalTokenCache(
+            os.path.join(get_config_dir(), 'servicePrincipalTokens.json'))
+        self.persist_on_exit_registered = False
+        self.lock = threading.RLock()
+
+
+def _get_shared_creds(token_file):
+    with _SHARED_CREDS_LOCK:
+        if token_file not in _SHARED_CREDS:
+            _SHARED_CREDS[token_file] = _SharedCreds(token_file)
+        return _SHARED_CREDS[token_file]
+
+
+def _clear_shared_creds(token_file=None):
+    with _SHARED_CREDS_LOCK:
+        if token_file is None:
+            _SHARED_CREDS.clear()
+        else:
+            _SHARED_CREDS.pop(token_file, None)
+
+
 class CredsCache(object):
     '''Caches AAD tokena and service principal secrets, and persistence will
     also be handled
@@ -426,14 +532,28 @@ class CredsCache(object):
         # AZURE_ACCESS_TOKEN_FILE is used by Cloud Console and not meant to be user configured
         self._token_file = (os.environ.get('AZURE_ACCESS_TOKEN_FILE', None) or
                             os.path.join(get_config_dir(), 'accessTokens.json'))
-        self._service_principal_creds = []
         self._auth_ctx_factory = auth_ctx_factory or _AUTH_CTX_FACTORY
-        self.adal_token_cache = None
+        self._shared = None
         self._load_creds()
 
+    @property
+    def adal_token_cache(self):
+        return self._shared.adal_token_cache
+
+    @property
+    def sp_token_cache(self):
+        return self._shared.sp_token_cache
+
+    @property
+    def _service_principal_creds(self):
+        return self._shared.service_principal_creds
+
+    @_service_principal_creds.setter
+    def _service_principal_creds(self, value):
+        self._shared.service_principal_creds = value
+
     def persist_cached_creds(self):
-        with os.fdopen(os.open(self._token_file, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600),
-                       'w+') as cred_file:
+        with self._shared.lock:
             items = self.adal_token_cache.read_items()
             all_creds = [entry for _, entry in items]
 
@@ -443,32 +563,68 @@ class CredsCache(object):
                     i.pop(key, None)
 
             all_creds.extend(self._service_principal_creds)
-            cred_file.write(json.dumps(all_creds))
+            # write to a temporary file first so a failure never leaves a truncated token file
+            write_file_atomically(self._token_file, json.dumps(all_creds), mode=0o600)
 
-        self.adal_token_cache.has_state_changed = False
+            self.adal_token_cache.has_state_changed = False
 
-    def retrieve_token_for_user(self, username, tenant, resource):
-        authority = get_authority_url(tenant)
-        context = self._auth_ctx_factory(authority, cache=self.adal_token_cache)
-        token_entry = context.acquire_token(resource, username, _CLIENT_ID)
-        if not token_entry:
-            raise CLIError("Could not retrieve token from local cache, please run 'az login'.")
+    def _persist_cached_creds_on_exit(self):
+        """ Tokens refreshed while running a command are written once, when the process exits. """
+        with self._shared.lock:
+            if self._shared.persist_on_exit_registered:
+                return
+            self._shared.persist_on_exit_registered = True
+        atexit.register(self._persist_cached_creds_if_changed)
 
+    def _persist_cached_creds_if_changed(self):
         if self.adal_token_cache.has_state_changed:
-            self.persist_cached_creds()
-        return (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN])
+            try:
+                self.persist_cached_creds()
+            except (OSError, IOError) as ex:
+                logger.debug('Unable to save the refreshed access tokens: %s', ex)
+
+    def retrieve_token_for_user(self, username, tenant, resource):
+        cache_key = (tenant, resource, username)
+        with _get_access_token_lock(cache_key):
+            token = _get_cached_access_token(cache_key)
+            if token:
+                return token
+
+            authority = get_authority_url(tenant)
+            context = self._auth_ctx_factory(authority, cache=self.adal_token_cache)
+            token_entry = context.acquire_token(resource, username, _CLIENT_ID)
+            if not token_entry:
+                raise CLIError("Could not retrieve token from local cache, please run 'az login'.")
+
+            if self.adal_token_cache.has_state_changed:
+                self._persist_cached_creds_on_exit()
+            return _cache_access_token(cache_key, token_entry)
 
     def retrieve_token_for_service_principal(self, sp_id, resource):
         matched = [x for x in self._service_principal_creds if sp_id == x[_SERVICE_PRINCIPAL_ID]]
         if not matched:
             raise CLIError("Please run 'az account set' to select active account.")
         cred = matched[0]
-        authority_url = get_authority_url(cred[_SERVICE_PRINCIPAL_TENANT])
-        context = self._auth_ctx_factory(authority_url, None)
-        sp_auth = ServicePrincipalAuth(cred.get(_ACCESS_TOKEN, None) or
-                                       cred.get(_SERVICE_PRINCIPAL_CERT_FILE, None))
-        token_entry = sp_auth.acquire_token(context, resource, sp_id)
-        return (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN])
+        cache_key = (cred[_SERVICE_PRINCIPAL_TENANT], resource, sp_id)
+        with _get_access_token_lock(cache_key):
+            token = _get_cached_access_token(cache_key)
+            if token:
+                return token
+
+            token_entry = self.sp_token_cache.find(*cache_key)
+            if token_entry:
+                SP_TOKEN_CACHE_STATS['hits'] += 1
+            else:
+                SP_TOKEN_CACHE_STATS['misses'] += 1
+                authority_url = get_authority_url(cred[_SERVICE_PRINCIPAL_TENANT])
+                context = self._auth_ctx_factory(authority_url, None)
+                sp_auth = ServicePrincipalAuth(cred.get(_ACCESS_TOKEN, None) or
+                                               cred.get(_SERVICE_PRINCIPAL_CERT_FILE, None))
+                token_entry = sp_auth.acquire_token(context, resource, sp_id)
+                self.sp_token_cache.add(cache_key[0], resource, sp_id, token_entry)
+            logger.debug('Service principal token cache: %d hits, %d misses',
+                         SP_TOKEN_CACHE_STATS['hits'], SP_TOKEN_CACHE_STATS['misses'])
+            return _cache_access_token(cache_key, token_entry)
 
     def retrieve_secret_of_service_principal(self, sp_id):
         matched = [x for x in self._service_principal_creds if sp_id == x[_SERVICE_PRINCIPAL_ID]]
@@ -478,62 +634,138 @@ class CredsCache(object):
         return cred[_ACCESS_TOKEN]
 
     def _load_creds(self):
-        import adal
-        if self.adal_token_cache is not None:
-            return self.adal_token_cache
-        all_entries = _load_tokens_from_file(self._token_file)
-        self._load_service_principal_creds(all_entries)
-        real_token = [x for x in all_entries if x not in self._service_principal_creds]
-        self.adal_token_cache = adal.TokenCache(json.dumps(real_token))
+        if self._shared is None:
+            self._shared = _get_shared_creds(self._token_file)
         return self.adal_token_cache
 
     def save_service_principal_cred(self, sp_entry):
-        matched = [x for x in self._service_principal_creds
-                   if sp_entry[_SERVICE_PRINCIPAL_ID] == x[_SERVICE_PRINCIPAL_ID] and
-                   sp_entry[_SERVICE_PRINCIPAL_TENANT] == x[_SERVICE_PRINCIPAL_TENANT]]
-        state_changed = False
-        if matched:
-            # pylint: disable=line-too-long
-            if (sp_entry.get(_ACCESS_TOKEN, None) != getattr(matched[0], _ACCESS_TOKEN, None) or
-                    sp_entry.get(_SERVICE_PRINCIPAL_CERT_FILE, None) != getattr(matched[0], _SERVICE_PRINCIPAL_CERT_FILE, None)):
-                self._service_principal_creds.remove(matched[0])
-                self._service_principal_creds.append(matched[0])
+        with self._shared.lock:
+            matched = [x for x in self._service_principal_creds
+                       if sp_entry[_SERVICE_PRINCIPAL_ID] == x[_SERVICE_PRINCIPAL_ID] and
+                       sp_entry[_SERVICE_PRINCIPAL_TENANT] == x[_SERVICE_PRINCIPAL_TENANT]]
+            state_changed = False
+            if matched:
+                # pylint: disable=line-too-long
+                if (sp_entry.get(_ACCESS_TOKEN, None) != getattr(matched[0], _ACCESS_TOKEN, None) or
+                        sp_entry.get(_SERVICE_PRINCIPAL_CERT_FILE, None) != getattr(matched[0], _SERVICE_PRINCIPAL_CERT_FILE, None)):
+                    self._service_principal_creds.remove(matched[0])
+                    self._service_principal_creds.append(matched[0])
+                    state_changed = True
+            else:
+                self._service_principal_creds.append(sp_entry)
                 state_changed = True
-        else:
-            self._service_principal_creds.append(sp_entry)
-            state_changed = True
-
-        if state_changed:
-            self.persist_cached_creds()
 
-    def _load_service_principal_creds(self, creds):
-        for c in creds:
-            if c.get(_SERVICE_PRINCIPAL_ID):
-                self._service_principal_creds.append(c)
-        return self._service_principal_creds
+            if state_changed:
+                self.persist_cached_creds()
 
     def remove_cached_creds(self, user_or_sp):
-        state_changed = False
-        # clear AAD tokens
-        tokens = self.adal_token_cache.find({_TOKEN_ENTRY_USER_ID: user_or_sp})
-        if tokens:
-            state_changed = True
-            self.adal_token_cache.remove(tokens)
-
-        # clear service principal creds
-        matched = [x for x in self._service_principal_creds
-                   if x[_SERVICE_PRINCIPAL_ID] == user_or_sp]
-        if matched:
-            state_changed = True
-            self._service_principal_creds = [x for x in self._service_principal_creds
-                                             if x not in matched]
-
-        if state_changed:
-            self.persist_cached_creds()
+        with self._shared.lock:
+            state_changed = False
+            # clear AAD tokens
+            tokens = self.adal_token_cache.find({_TOKEN_ENTRY_USER_ID: user_or_sp})
+            if tokens:
+                state_changed = True
+                self.adal_token_cache.remove(tokens)
+
+            # clear service principal creds
+            matched = [x for x in self._service_principal_creds
+                       if x[_SERVICE_PRINCIPAL_ID] == user_or_sp]
+            if matched:
+                state_changed = True
+                self._service_principal_creds = [x for x in self._service_principal_creds
+                                                 if x not in matched]
+                self.sp_token_cache.remove(user_or_sp)
+
+            if state_changed:
+                clear_access_token_cache()
+                self.persist_cached_creds()
 
     def remove_all_cached_creds(self):
-        # we can clear file contents, but deleting it is simpler
-        _delete_file(self._token_file)
+        clear_access_token_cache()
+        with self._shared.lock:
+            self.sp_token_cache.remove_all()
+            # nothing is left to write on exit, and later caches start from an empty file
+            self.adal_token_cache.has_state_changed = False
+            _clear_shared_creds(self._token_file)
+            # we can clear file contents, but deleting it is simpler
+            _delete_file(self._token_file)
+
+
+class ServicePrincipalTokenCache(object):
+    '''Persists access tokens of service principals, which adal does not cache for the client
+    credential flow, so they are reused by later commands until close to expiry
+    '''
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+        self._entries = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _get_key(tenant, resource, sp_id):
+        return '{} {} {}'.format(tenant, resource, sp_id)
+
+    def _serialize(self, entries):  # pylint: disable=no-self-use
+        # the cache goes through _serialize/_deserialize only, so encryption of the
+        # file can be plugged in here
+        return json.dumps(entries)
+
+    def _deserialize(self, content):  # pylint: disable=no-self-use
+        return json.loads(content)
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self._file_path, 'r') as file_to_read:
+                    self._entries = self._deserialize(file_to_read.read()) or {}
+            except (OSError, IOError, ValueError):
+                pass
+        return self._entries
+
+    def _save(self):
+        # drop the expired tokens while at it
+        self._entries = {k: v for k, v in self._entries.items()
+                         if _is_token_valid(_get_token_expiration(v))}
+        try:
+            write_file_atomically(self._file_path, self._serialize(self._entries), mode=0o600)
+        except (OSError, IOError) as ex:
+            logger.debug('Unable to save the service principal token cache: %s', ex)
+
+    def find(self, tenant, resource, sp_id):
+        with self._lock:
+            token_entry = self._load().get(self._get_key(tenant, resource, sp_id))
+        if token_entry and _is_token_valid(_get_token_expiration(token_entry)):
+            return token_entry
+        return None
+
+    def add(self, tenant, resource, sp_id, token_entry):
+        with self._lock:
+            self._load()[self._get_key(tenant, resource, sp_id)] = {
+                _TOKEN_ENTRY_TOKEN_TYPE: token_entry[_TOKEN_ENTRY_TOKEN_TYPE],
+                _ACCESS_TOKEN: token_entry[_ACCESS_TOKEN],
+                _TOKEN_ENTRY_EXPIRES_ON: token_entry.get(_TOKEN_ENTRY_EXPIRES_ON)
+            }
+            self._save()
+
+    def remove(self, sp_id):
+        with self._lock:
+            entries = self._load()
+            suffix = ' ' + sp_id
+            removed = [k for k in entries if k.endswith(suffix)]
+            if removed:
+                for key in removed:
+                    del entries[key]
+                self._save()
+
+    def remove_all(self):
+        with self._lock:
+            self._entries = {}
+            try:
+                os.remove(self._file_path)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
 
 
 class ServicePrincipalAuth(object):
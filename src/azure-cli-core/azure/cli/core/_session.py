@@ -14,18 +14,27 @@ except ImportError:
 
 from codecs import open as codecs_open
 
+import azure.cli.core.azlogging as azlogging
+from azure.cli.core.util import write_file_atomically
+
+logger = azlogging.get_az_logger(__name__)
+
 
 class Session(collections.MutableMapping):
     '''A simple dict-like class that is backed by a JSON file.
 
     All direct modifications will save the file. Indirect modifications should
     be followed by a call to `save_with_retry` or `save`.
+
+    Caches, which can be rebuilt at any time, set `ignore_corrupt_file` to load a file that
+    isn't valid JSON as empty instead of failing.
     '''
 
-    def __init__(self, encoding=None):
+    def __init__(self, encoding=None, ignore_corrupt_file=False):
         self.filename = None
         self.data = {}
         self._encoding = encoding if encoding else 'utf-8-sig'
+        self._ignore_corrupt_file = ignore_corrupt_file
 
     def load(self, filename, max_age=0):
         self.filename = filename
@@ -39,11 +48,17 @@ class Session(collections.MutableMapping):
                 self.data = json.load(f)
         except (OSError, IOError):
             self.save()
+        except ValueError as ex:
+            if not self._ignore_corrupt_file:
+                raise
+            # start over rather than failing every command, the file is rewritten on the next save
+            logger.warning("Ignoring '%s', it is not valid JSON: %s", self.filename, ex)
+            self.data = {}
 
     def save(self):
         if self.filename:
-            with codecs_open(self.filename, 'w', encoding=self._encoding) as f:
-                json.dump(self.data, f)
+            # replace the file in one step, so concurrent processes never read a partial write
+            write_file_atomically(self.filename, json.dumps(self.data), encoding=self._encoding)
 
     def save_with_retry(self, retries=5):
         for _ in range(retries - 1):
@@ -84,3 +99,9 @@ CONFIG = Session()
 
 # SESSION provides read-write session variables
 SESSION = Session()
+
+# COMMAND_INDEX maps command names to the command module they are loaded from
+COMMAND_INDEX = Session(ignore_corrupt_file=True)
+
+# PROVIDER_CACHE caches resource provider metadata (resource types, api versions and locations)
+PROVIDER_CACHE = Session(ignore_corrupt_file=True)
@@ -16,8 +16,10 @@ class AdalAuthentication(Authentication):  # pylint: disable=too-few-public-meth
     def __init__(self, token_retriever):
         self._token_retriever = token_retriever
 
-    def signed_session(self):
-        session = super(AdalAuthentication, self).signed_session()
+    def signed_session(self, session=None):
+        # msrest (>=0.4.28) hands in its permanent session when the client is kept alive, so
+        # the connection pool survives between requests
+        session = super(AdalAuthentication, self).signed_session(session)
 
         try:
             scheme, token = self._token_retriever()
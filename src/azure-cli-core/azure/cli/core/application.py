@@ -3,17 +3,20 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import sys
 import os
 import uuid
 import argparse
+from itertools import takewhile
 from azure.cli.core.parser import AzCliCommandParser, enable_autocomplete
-from azure.cli.core._output import CommandResultItem
+from azure.cli.core._output import (CommandResultItem, OutputProducer, StreamedResult,
+                                    is_output_streaming_enabled)
 import azure.cli.core.extensions
 import azure.cli.core._help as _help
 import azure.cli.core.azlogging as azlogging
-from azure.cli.core.util import todict, truncate_text, CLIError, read_file_content
+from azure.cli.core.util import (todict, truncate_text, CLIError, read_file_content,
+                                 handle_exception)
 from azure.cli.core._config import az_config
 
 import azure.cli.core.telemetry as telemetry
@@ -34,8 +37,11 @@ class Configuration(object):  # pylint: disable=too-few-public-methods
     def get_command_table(self, argv=None):  # pylint: disable=no-self-use
         import azure.cli.core.commands as commands
         # Find the first noun on the command line and only load commands from that
-        # module to improve startup time.
-        result = commands.get_command_table(argv[0] if argv else None)
+        # module to improve startup time. Otherwise, fall back to the command index.
+        result = commands.get_command_table(argv[0] if argv else None, use_command_index=True)
+        if not argv or argv[-1] in ('--help', '-h'):
+            commands.load_command_help(list(takewhile(lambda a: not a.startswith('-'),
+                                                      argv or [])))
 
         if argv is None:
             return result
@@ -173,7 +179,9 @@ class Application(object):
         args = self.parser.parse_args(argv)
 
         self.raise_event(self.COMMAND_PARSER_PARSED, command=args.command, args=args)
-        results = []
+        iterated_args = sorted(name for name, value in vars(args).items()
+                               if isinstance(value, IterateValue))
+        invocations = []
         for expanded_arg in _explode_list_args(args):
             self.session['command'] = expanded_arg.command
             try:
@@ -198,20 +206,49 @@ class Application(object):
                                           self.configuration.output_format,
                                           [p for p in unexpanded_argv if p.startswith('-')])
 
-            result = expanded_arg.func(params)
-            result = todict(result)
-            results.append(result)
+            iterated_values = OrderedDict((name, getattr(expanded_arg, name))
+                                          for name in iterated_args)
+            invocations.append((expanded_arg.func, params, iterated_values))
+
+        exit_code = 0
+        max_workers = az_config.getint('core', 'ids_max_workers', fallback=1)
+        if len(invocations) > 1 and max_workers > 1 and \
+                not _requires_confirmation(command_table[args.command], args):
+            results, exit_code = _execute_concurrently(invocations, max_workers)
+        elif len(invocations) == 1 and self._can_stream_output():
+            func, params, _ = invocations[0]
+            results = [func(params)]
+            if _is_iterator(results[0]):
+                results[0] = StreamedResult(self._transform_streamed_items(results[0]))
+            else:
+                results[0] = todict(results[0])
+        else:
+            results = [_result_to_dict(func(params)) for func, params, _ in invocations]
 
-        if len(results) == 1:
+        if len(invocations) == 1:
             results = results[0]
 
         event_data = {'result': results}
-        self.raise_event(self.TRANSFORM_RESULT, event_data=event_data)
+        if not isinstance(results, StreamedResult):
+            # streamed items are transformed one by one as they are produced
+            self.raise_event(self.TRANSFORM_RESULT, event_data=event_data)
         self.raise_event(self.FILTER_RESULT, event_data=event_data)
 
         return CommandResultItem(event_data['result'],
                                  table_transformer=command_table[args.command].table_transformer,
-                                 is_query_active=self.session['query_active'])
+                                 is_query_active=self.session['query_active'],
+                                 exit_code=exit_code)
+
+    def _can_stream_output(self):
+        return is_output_streaming_enabled() and \
+            OutputProducer.get_formatter(self.configuration.output_format) in \
+            OutputProducer.streaming_formatters
+
+    def _transform_streamed_items(self, items):
+        for item in items:
+            event_data = {'result': todict(item)}
+            self.raise_event(self.TRANSFORM_RESULT, event_data=event_data)
+            yield event_data['result']
 
     def raise_event(self, name, **kwargs):
         '''Raise the event `name`.
@@ -310,6 +347,65 @@ def _validate_arguments(args, **_):
         pass
 
 
+def _is_iterator(obj):
+    try:
+        from collections.abc import Iterator
+    except ImportError:
+        from collections import Iterator
+    return isinstance(obj, Iterator)
+
+
+def _result_to_dict(result):
+    # handlers may return paged results to have them streamed, see `is_output_streaming_enabled`
+    return todict(list(result) if _is_iterator(result) else result)
+
+
+def _requires_confirmation(command, args):
+    from azure.cli.core.commands import CONFIRM_PARAM_NAME
+    return getattr(command, 'confirmation', False) and \
+        not getattr(args, CONFIRM_PARAM_NAME, False) and \
+        not az_config.getboolean('core', 'disable_confirm_prompt', fallback=False)
+
+
+def _execute_concurrently(invocations, max_workers):
+    '''Run the handlers of the exploded arguments on a bounded thread pool. The results are
+    returned in the order of the invocations. Failures are reported per invocation instead of
+    aborting on the first one: the result of a failed invocation is its error, along with the
+    iterated argument values (e.g. those parsed from --ids) it was run with.
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    results = []
+    failures = 0
+    exit_code = 0
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(invocations)))
+    futures = [executor.submit(func, params) for func, params, _ in invocations]
+    try:
+        for (_, _, iterated_values), future in zip(invocations, futures):
+            try:
+                results.append(_result_to_dict(future.result()))
+            except KeyboardInterrupt:
+                raise
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.error("Operation failed for '%s'.",
+                             ' '.join(str(v) for v in iterated_values.values()))
+                exit_code = handle_exception(ex)
+                failures += 1
+                error = OrderedDict(iterated_values)
+                error['error'] = str(ex)
+                results.append(error)
+    except KeyboardInterrupt:
+        for future in futures:
+            future.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False)
+    if failures == len(invocations):
+        raise CLIError('All {} operations failed.'.format(failures))
+    if failures:
+        logger.warning('%d of %d operations failed.', failures, len(invocations))
+    return results, exit_code
+
+
 def _explode_list_args(args):
     '''Iterate through each attribute member of args and create a copy with
     the IterateValues 'flattened' to only contain a single value
@@ -19,6 +19,7 @@ import azure.cli.core.azlogging as azlogging
 import azure.cli.core.telemetry as telemetry
 from azure.cli.core.util import CLIError
 from azure.cli.core.application import APPLICATION
+from azure.cli.core._output import is_output_streaming_enabled
 from azure.cli.core.prompting import prompt_y_n, NoTTYException
 from azure.cli.core._config import az_config, DEFAULTS_SECTION
 from azure.cli.core.profiles import ResourceType
@@ -92,6 +93,16 @@ class CliCommandArgument(object):
         self.type.settings[name] = value
 
 
+def _get_correlation_message(poller):
+    try:
+        # pylint: disable=protected-access
+        correlation_id = json.loads(
+            poller._response.__dict__['_content'])['properties']['correlationId']
+        return 'Correlation ID: {}'.format(correlation_id)
+    except:  # pylint: disable=bare-except
+        return ''
+
+
 class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
 
     def __init__(self, start_msg='', finish_msg='', poller_done_interval_ms=1000.0):
@@ -104,23 +115,15 @@ class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
 
     def __call__(self, poller):
         from msrest.exceptions import ClientException
+        from azure.cli.core.commands._polling import POLLER_MULTIPLEXER
         logger.info("Starting long running operation '%s'", self.start_msg)
-        correlation_message = ''
-        while not poller.done():
-            try:
-                # pylint: disable=protected-access
-                correlation_id = json.loads(
-                    poller._response.__dict__['_content'])['properties']['correlationId']
-
-                correlation_message = 'Correlation ID: {}'.format(correlation_id)
-            except:  # pylint: disable=bare-except
-                pass
-
-            try:
-                self._delay()
-            except KeyboardInterrupt:
-                logger.error('Long running operation wait cancelled.  %s', correlation_message)
-                raise
+        try:
+            # pollers of concurrent operations (e.g. over --ids) are checked on a single loop
+            POLLER_MULTIPLEXER.wait(poller, self.start_msg, self._delay)
+        except KeyboardInterrupt:
+            logger.error('Long running operation wait cancelled.  %s',
+                         _get_correlation_message(poller))
+            raise
         try:
             result = poller.result()
         except ClientException as client_exception:
@@ -137,7 +140,7 @@ class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
             except:  # pylint: disable=bare-except
                 pass
 
-            cli_error = CLIError('{}  {}'.format(message, correlation_message))
+            cli_error = CLIError('{}  {}'.format(message, _get_correlation_message(poller)))
             # capture response for downstream commands (webapp) to dig out more details
             setattr(cli_error, 'response', getattr(client_exception, 'response', None))
             raise cli_error
@@ -185,7 +188,7 @@ class CliCommand(object):  # pylint:disable=too-many-instance-attributes
 
     def __init__(self, name, handler, description=None, table_transformer=None,
                  arguments_loader=None, description_loader=None,
-                 formatter_class=None):
+                 formatter_class=None, operation=None, confirmation=False):
         self.name = name
         self.handler = handler
         self.help = None
@@ -196,6 +199,8 @@ class CliCommand(object):  # pylint:disable=too-many-instance-attributes
         self.arguments_loader = arguments_loader
         self.table_transformer = table_transformer
         self.formatter_class = formatter_class
+        self.operation = operation
+        self.confirmation = confirmation
 
     @staticmethod
     def _should_load_description():
@@ -233,6 +238,58 @@ class CliCommand(object):  # pylint:disable=too-many-instance-attributes
         return self.handler(**kwargs)
 
 
+class IndexedCliCommand(CliCommand):
+    """Placeholder for a command found in the command index. The command module that registers
+    the command is only loaded once the command is actually needed (to load its arguments, show
+    its description or execute it).
+    """
+
+    def __init__(self, name, module_name):
+        super(IndexedCliCommand, self).__init__(name, self._deferred_handler,
+                                                description_loader=self._deferred_description)
+        self.module_name = module_name
+        self._materialized = False
+
+    def _materialize(self):
+        if self._materialized:
+            return
+        import_module('azure.cli.command_modules.' + self.module_name).load_commands()
+        loaded = command_table.get(self.name)
+        if loaded is None or loaded is self:
+            from azure.cli.core.commands._command_index import invalidate_command_index
+            invalidate_command_index()
+            raise CLIError("Command '{}' was not found in module '{}'. The command index has been "
+                           "reset, please try again.".format(self.name, self.module_name))
+        self.handler = loaded.handler
+        self.description = loaded.description
+        self.arguments.update(loaded.arguments)
+        self.arguments_loader = loaded.arguments_loader
+        self.table_transformer = loaded.table_transformer
+        self.formatter_class = loaded.formatter_class
+        self.operation = loaded.operation
+        self.confirmation = loaded.confirmation
+        self.help = loaded.help
+        self._materialized = True
+        # make sure parameters get applied to the instance the parser already knows about
+        command_table[self.name] = self
+
+    def _deferred_handler(self, kwargs):
+        self._materialize()
+        return self.handler(kwargs)
+
+    def _deferred_description(self):
+        from azure.cli.core.help_files import helps
+        if not self._materialized and ' ' not in self.name and self.name in helps:
+            # listed in the top level help, the summary is taken from the help entry
+            return None
+        self._materialize()
+        return self.description() if callable(self.description) else self.description
+
+    def load_arguments(self):
+        self._materialize()
+        super(IndexedCliCommand, self).load_arguments()
+
+
 command_table = CommandTable()
 
 # Map to determine what module a command was registered in
@@ -254,10 +311,11 @@ def load_params(command):
     _apply_parameter_info(command, command_table[command])
 
 
-def get_command_table(module_name=None):
+def get_command_table(module_name=None, use_command_index=False):
     '''Loads command table(s)
     When `module_name` is specified, only commands from that module will be loaded.
-    If the module is not found, all commands are loaded.
+    If the module is not found, all commands are loaded. When `use_command_index` is set, a valid
+    command index is used instead of importing every installed command module.
     '''
     loaded = False
     if module_name and module_name not in BLACKLISTED_MODS:
@@ -270,38 +328,84 @@ def get_command_table(module_name=None):
         except Exception:  # pylint: disable=broad-except
             pass
     if not loaded:
-        installed_command_modules = []
-        try:
-            mods_ns_pkg = import_module('azure.cli.command_modules')
-            installed_command_modules = [modname for _, modname, _ in
-                                         pkgutil.iter_modules(mods_ns_pkg.__path__)
-                                         if modname not in BLACKLISTED_MODS]
-        except ImportError:
-            pass
+        from azure.cli.core.commands._command_index import (is_command_index_enabled,
+                                                            load_command_index,
+                                                            update_command_index)
+        installed_command_modules = _get_installed_command_modules()
         logger.debug('Installed command modules %s', installed_command_modules)
-        cumulative_elapsed_time = 0
-        for mod in installed_command_modules:
-            try:
-                start_time = timeit.default_timer()
-                import_module('azure.cli.command_modules.' + mod).load_commands()
-                elapsed_time = timeit.default_timer() - start_time
-                logger.debug("Loaded module '%s' in %.3f seconds.", mod, elapsed_time)
-                cumulative_elapsed_time += elapsed_time
-            except Exception as ex:  # pylint: disable=broad-except
-                # Changing this error message requires updating CI script that checks for failed
-                # module loading.
-                logger.error("Error loading command module '%s'", mod)
-                telemetry.set_exception(exception=ex, fault_type='module-load-error-' + mod,
-                                        summary='Error loading module: {}'.format(mod))
-                logger.debug(traceback.format_exc())
-        logger.debug("Loaded all modules in %.3f seconds. "
-                     "(note: there's always an overhead with the first module loaded)",
-                     cumulative_elapsed_time)
+        use_command_index = use_command_index and is_command_index_enabled()
+        indexed_commands = load_command_index(installed_command_modules) \
+            if use_command_index else None
+        if indexed_commands:
+            for name, entry in indexed_commands.items():
+                if name not in command_table:
+                    command_table[name] = IndexedCliCommand(name, entry['module'])
+            logger.debug('Loaded %d commands from the command index.', len(indexed_commands))
+        elif _load_all_command_modules(installed_command_modules) and use_command_index:
+            update_command_index(command_table, command_module_map, installed_command_modules)
     _update_command_definitions(command_table)
     ordered_commands = OrderedDict(command_table)
     return ordered_commands
 
 
+def load_command_help(nouns=None):
+    '''Register the help entries of the commands that are only known from the command index. The
+    top level help uses the entries stored in the index, the help of a group imports the command
+    modules with commands in that group.
+    '''
+    from azure.cli.core.commands._command_index import load_command_index_help
+    from azure.cli.core.help_files import helps
+    indexed_commands = [cmd for cmd in command_table.values()
+                        if isinstance(cmd, IndexedCliCommand)]
+    if not indexed_commands:
+        return
+    group = ' '.join(nouns or [])
+    if not group:
+        for name, text in load_command_index_help().items():
+            helps.setdefault(name, text)
+        return
+    for module_name in {cmd.module_name for cmd in indexed_commands
+                        if cmd.name == group or cmd.name.startswith(group + ' ')}:
+        try:
+            import_module('azure.cli.command_modules.' + module_name)
+        except Exception:  # pylint: disable=broad-except
+            logger.debug("Unable to load help for command module '%s'", module_name)
+
+
+def _get_installed_command_modules():
+    try:
+        mods_ns_pkg = import_module('azure.cli.command_modules')
+        return [modname for _, modname, _ in pkgutil.iter_modules(mods_ns_pkg.__path__)
+                if modname not in BLACKLISTED_MODS]
+    except ImportError:
+        return []
+
+
+def _load_all_command_modules(installed_command_modules):
+    '''Returns True if all the command modules were loaded successfully'''
+    all_loaded = True
+    cumulative_elapsed_time = 0
+    for mod in installed_command_modules:
+        try:
+            start_time = timeit.default_timer()
+            import_module('azure.cli.command_modules.' + mod).load_commands()
+            elapsed_time = timeit.default_timer() - start_time
+            logger.debug("Loaded module '%s' in %.3f seconds.", mod, elapsed_time)
+            cumulative_elapsed_time += elapsed_time
+        except Exception as ex:  # pylint: disable=broad-except
+            # Changing this error message requires updating CI script that checks for failed
+            # module loading.
+            logger.error("Error loading command module '%s'", mod)
+            telemetry.set_exception(exception=ex, fault_type='module-load-error-' + mod,
+                                    summary='Error loading module: {}'.format(mod))
+            logger.debug(traceback.format_exc())
+            all_loaded = False
+    logger.debug("Loaded all modules in %.3f seconds. "
+                 "(note: there's always an overhead with the first module loaded)",
+                 cumulative_elapsed_time)
+    return all_loaded
+
+
 def register_cli_argument(scope, dest, arg_type=None, **kwargs):
     '''Specify CLI specific metadata for a given argument for a given scope.
     '''
@@ -376,6 +480,18 @@ def _is_poller(obj):
     return False
 
 
+def _accepts_operation_config(op):
+    """ Generated SDK operations take per call settings, like the timeout of their poller, as
+    **operation_config """
+    import inspect
+    try:
+        return 'operation_config' in inspect.signature(op).parameters
+    except AttributeError:
+        # python 2
+        argspec = inspect.getargspec(op)  # pylint: disable=deprecated-method
+        return argspec.keywords == 'operation_config'
+
+
 def create_command(module_name, name, operation,
                    transform_result, table_transformer, client_factory,
                    no_wait_param=None, confirmation=None, exception_handler=None,
@@ -394,8 +510,15 @@ def create_command(module_name, name, operation,
         client = client_factory(kwargs) if client_factory else None
         try:
             op = get_op_handler(operation)
+            op_kwargs = kwargs
+            if (not transform_result or isinstance(transform_result, LongRunningOperation)) \
+                    and _accepts_operation_config(op):
+                # the poller is waited on by LongRunningOperation, so check the status early;
+                # pollers waited on anywhere else keep the client's timeout
+                from azure.cli.core.commands._polling import get_operation_timeout
+                op_kwargs = dict(kwargs, long_running_operation_timeout=get_operation_timeout())
             try:
-                result = op(client, **kwargs) if client else op(**kwargs)
+                result = op(client, **op_kwargs) if client else op(**op_kwargs)
             except Exception as ex:  # pylint: disable=broad-except
                 if exception_handler:
                     result = exception_handler(ex)
@@ -413,8 +536,23 @@ def create_command(module_name, name, operation,
             if _is_poller(result):
                 return LongRunningOperation('Starting {}'.format(name))(result)
             elif _is_paged(result):
-                return list(result)
+                # when output streaming is enabled, the pages are consumed while writing the
+                # output, and the errors fetching them are handled like those of the command
+                return _stream_paged(result) if is_output_streaming_enabled() else list(result)
             return result
+        except Exception as ex:  # pylint: disable=broad-except
+            _handle_command_exception(ex)
+
+    def _stream_paged(paged):
+        try:
+            for item in paged:
+                yield item
+        except Exception as ex:  # pylint: disable=broad-except
+            _handle_command_exception(ex)
+
+    def _handle_command_exception(ex):
+        try:
+            raise ex
         except _load_client_exception_class() as client_exception:
             fault_type = name.replace(' ', '-') + '-client-error'
             telemetry.set_exception(client_exception, fault_type=fault_type,
@@ -446,7 +584,8 @@ def create_command(module_name, name, operation,
 
     cmd = CliCommand(name, _execute_command, table_transformer=table_transformer,
                      arguments_loader=arguments_loader, description_loader=description_loader,
-                     formatter_class=formatter_class)
+                     formatter_class=formatter_class, operation=operation,
+                     confirmation=bool(confirmation))
     if confirmation:
         cmd.add_argument(CONFIRM_PARAM_NAME, '--yes', '-y',
                          action='store_true',
@@ -0,0 +1,107 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import azure.cli.core.azlogging as azlogging
+from azure.cli.core._config import az_config
+from azure.cli.core._session import COMMAND_INDEX
+from azure.cli.core.util import CLI_PACKAGE_NAME
+
+logger = azlogging.get_az_logger(__name__)
+
+# Bump this whenever the layout of the persisted index changes
+COMMAND_INDEX_VERSION = 2
+
+COMMAND_MODULE_PREFIX = 'azure.cli.command_modules.'
+
+
+def is_command_index_enabled():
+    return az_config.getboolean('core', 'use_command_index', fallback=True)
+
+
+def _get_installed_versions(installed_command_modules):
+    """ The index is only valid for the exact set of command modules (and their versions) it was
+    built from. Any install, update or removal of a component changes this signature. """
+    import pkg_resources
+    versions = {dist.key: dist.version for dist in pkg_resources.working_set
+                if dist.key.startswith(CLI_PACKAGE_NAME)}
+    return {'modules': sorted(installed_command_modules), 'versions': versions}
+
+
+def get_command_module_name(module_path):
+    """ Map the module a command was registered in (e.g. 'azure.cli.command_modules.vm.commands')
+    to its command module name (e.g. 'vm'). """
+    if not module_path or not module_path.startswith(COMMAND_MODULE_PREFIX):
+        return None
+    return module_path[len(COMMAND_MODULE_PREFIX):].split('.')[0]
+
+
+def _is_command_index_valid(installed_command_modules):
+    if COMMAND_INDEX.get('version') != COMMAND_INDEX_VERSION:
+        return False
+    if COMMAND_INDEX.get('signature') != _get_installed_versions(installed_command_modules):
+        logger.debug('Command index is out of date with the installed command modules.')
+        return False
+    return True
+
+
+def load_command_index(installed_command_modules):
+    """ Returns the indexed commands as a dict of command name -> index entry, or None if there is
+    no index or it is out of date. """
+    if not _is_command_index_valid(installed_command_modules):
+        return None
+    return COMMAND_INDEX.get('commands') or None
+
+
+def load_command_index_help():
+    """ Returns the help entries of the top level groups and commands, so the top level help can
+    be shown without importing every command module. """
+    return COMMAND_INDEX.get('help') or {}
+
+
+def _get_top_level_help(command_table):
+    from azure.cli.core.help_files import helps
+    import yaml
+    top_level_help = {}
+    for name, command in command_table.items():
+        top_level_name = name.split()[0]
+        if top_level_name in helps:
+            top_level_help[top_level_name] = helps[top_level_name]
+        elif top_level_name == name:
+            # the help of a top level command without a help entry is its description
+            description = command.description() if callable(command.description) \
+                else command.description
+            if description:
+                top_level_help[name] = yaml.safe_dump({'short-summary': description})
+    return top_level_help
+
+
+def update_command_index(command_table, command_module_map, installed_command_modules):
+    indexed_commands = {}
+    for name in command_table:
+        module_name = get_command_module_name(command_module_map.get(name))
+        if not module_name:
+            logger.debug("Command '%s' not added to the command index. Unknown module.", name)
+            continue
+        indexed_commands[name] = {'module': module_name}
+    COMMAND_INDEX.data.update({
+        'version': COMMAND_INDEX_VERSION,
+        'signature': _get_installed_versions(installed_command_modules),
+        'commands': indexed_commands,
+        'help': _get_top_level_help({n: c for n, c in command_table.items()
+                                     if n in indexed_commands})
+    })
+    try:
+        COMMAND_INDEX.save_with_retry()
+        logger.debug('Updated command index with %d commands.', len(indexed_commands))
+    except (OSError, IOError) as ex:
+        logger.debug('Unable to save the command index: %s', ex)
+
+
+def invalidate_command_index():
+    COMMAND_INDEX.data.clear()
+    try:
+        COMMAND_INDEX.save_with_retry()
+    except (OSError, IOError) as ex:
+        logger.debug('Unable to reset the command index: %s', ex)
@@ -0,0 +1,134 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import random
+import threading
+import time
+
+import azure.cli.core.azlogging as azlogging
+from azure.cli.core._config import az_config
+
+logger = azlogging.get_az_logger(__name__)
+
+DEFAULT_POLL_INITIAL_DELAY = 2.0
+DEFAULT_POLL_MAX_DELAY = 30.0
+
+
+class PollingStrategy(object):  # pylint: disable=too-few-public-methods
+    """ Exponential backoff with jitter between the status requests of a long running operation.
+    A 'Retry-After' from the service always takes precedence. """
+
+    def __init__(self, initial_delay=DEFAULT_POLL_INITIAL_DELAY, max_delay=DEFAULT_POLL_MAX_DELAY,
+                 factor=2.0):
+        self.initial_delay = initial_delay
+        self.max_delay = max(initial_delay, max_delay)
+        self.factor = factor
+
+    def get_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_delay, self.initial_delay * (self.factor ** attempt))
+        # keep half of the backoff and randomize the rest, so operations started together
+        # don't poll the service in lock step
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+def get_polling_strategy():
+    return PollingStrategy(
+        initial_delay=az_config.getfloat('core', 'poll_initial_delay',
+                                         fallback=DEFAULT_POLL_INITIAL_DELAY),
+        max_delay=az_config.getfloat('core', 'poll_max_delay', fallback=DEFAULT_POLL_MAX_DELAY))
+
+
+def get_operation_timeout(strategy=None):
+    """ The delay between the status requests of a long running operation started by an SDK
+    operation, passed as its 'long_running_operation_timeout' operation config.
+
+    msrestazure's AzureOperationPoller takes the delay once, when the operation starts, and
+    sleeps for it between status requests unless the service sends a 'Retry-After'. It has no
+    supported way to change the delay afterwards, so the delay doesn't back off: it is the first
+    delay of the strategy, jittered so operations started together don't poll in lock step. """
+    return (strategy or get_polling_strategy()).get_delay(0)
+
+
+class _PollerState(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, poller, description):
+        self.poller = poller
+        self.description = description
+        self.done = threading.Event()
+
+
+class PollerMultiplexer(object):
+    """ Waits for any number of pollers, from any number of threads, on a single loop. The
+    first waiting thread drives the loop for all pending pollers; the others block until their
+    own poller is done or they need to take over.
+
+    The status requests are made by the SDK pollers on their own threads; how long they wait
+    between requests is set when the operation starts, see get_operation_timeout. """
+
+    def __init__(self, check_interval=1.0):
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._total = 0
+        self._completed = 0
+        self._driver = None
+
+    def wait(self, poller, description=None, delay=None):
+        """ Blocks until the poller is done. 'delay' is called between checks of the pending
+        pollers, it defaults to sleeping for the check interval. """
+        state = _PollerState(poller, description)
+        with self._lock:
+            self._pending.append(state)
+            self._total += 1
+        try:
+            while not state.done.is_set():
+                with self._lock:
+                    drive = self._driver is None
+                    if drive:
+                        self._driver = threading.current_thread()
+                if drive:
+                    try:
+                        self._poll(state, delay or self._sleep)
+                    finally:
+                        with self._lock:
+                            self._driver = None
+                else:
+                    state.done.wait(self._check_interval)
+        finally:
+            with self._lock:
+                if state in self._pending:
+                    self._pending.remove(state)
+                if not self._pending:
+                    self._total = self._completed = 0
+
+    def _sleep(self):
+        time.sleep(self._check_interval)
+
+    def _poll(self, own_state, delay):
+        while True:
+            with self._lock:
+                pending = [s for s in self._pending if not s.done.is_set()]
+            finished = 0
+            for state in pending:
+                if state.poller.done():
+                    state.done.set()
+                    finished += 1
+            if finished:
+                self._report_progress(finished)
+            if own_state.done.is_set():
+                return
+            delay()
+
+    def _report_progress(self, finished):
+        with self._lock:
+            self._completed += finished
+            completed, total = self._completed, self._total
+        if total > 1:
+            logger.warning('%d of %d operations completed.', completed, total)
+
+
+POLLER_MULTIPLEXER = PollerMultiplexer()
@@ -5,6 +5,9 @@
 
 import argparse
 import re
+import threading
+import time
+from collections import namedtuple
 from six import string_types
 
 from azure.cli.core.commands import (CliCommand,
@@ -17,6 +20,8 @@ from azure.cli.core.application import APPLICATION, IterateValue
 import azure.cli.core.azlogging as azlogging
 from azure.cli.core.util import CLIError, todict, shell_safe_json_parse
 from azure.cli.core.profiles import ResourceType
+from azure.cli.core._config import az_config
+from azure.cli.core._session import PROVIDER_CACHE
 
 logger = azlogging.get_az_logger(__name__)
 
@@ -105,6 +110,116 @@ def resource_exists(resource_group, name, namespace, type, **_):  # pylint: disa
     return existing
 
 
+ProviderResourceType = namedtuple('ProviderResourceType',
+                                  ['resource_type', 'api_versions', 'locations'])
+
+DEFAULT_PROVIDER_CACHE_TTL = 24 * 60 * 60
+
+_PROVIDER_CACHE_LOCK = threading.Lock()
+# cache key -> the lock held while downloading the metadata of a provider, so concurrent lookups
+# of the same provider download it once, while those of other providers don't wait
+_PROVIDER_DOWNLOAD_LOCKS = {}
+
+
+def _get_provider_cache_key(client, namespace):
+    from azure.cli.core.cloud import get_active_cloud
+    return '{}/{}/{}'.format(get_active_cloud().name, client.config.subscription_id,
+                             namespace.lower())
+
+
+def _download_provider_resource_types(client, namespace):
+    provider = client.providers.get(namespace)
+    return [{'resourceType': t.resource_type,
+             'apiVersions': list(t.api_versions or []),
+             'locations': list(getattr(t, 'locations', None) or [])}
+            for t in provider.resource_types]
+
+
+def get_provider_resource_types(client, namespace, refresh=False):
+    """ Get the resource types (with their api versions and locations) of a resource provider.
+    The provider metadata is cached on disk per cloud and subscription for
+    'core.provider_cache_ttl' seconds.
+
+    :param client: The resource management client
+    :param str namespace: The provider namespace, e.g. Microsoft.Compute
+    :param bool refresh: Download the provider metadata even if it is cached
+    """
+    return _get_provider_resource_types(client, namespace, refresh)[0]
+
+
+def _get_provider_download_lock(key):
+    with _PROVIDER_CACHE_LOCK:
+        return _PROVIDER_DOWNLOAD_LOCKS.setdefault(key, threading.Lock())
+
+
+def _to_provider_resource_types(resource_types):
+    return [ProviderResourceType(t['resourceType'], t['apiVersions'], t['locations'])
+            for t in resource_types]
+
+
+def _get_cached_provider_resource_types(key, ttl):
+    with _PROVIDER_CACHE_LOCK:
+        entry = PROVIDER_CACHE.get(key)
+    if not entry:
+        return None
+    try:
+        if entry['timestamp'] + ttl < time.time():
+            return None
+        return _to_provider_resource_types(entry['resourceTypes'])
+    except (KeyError, TypeError) as ex:
+        # a malformed entry is downloaded again, like a missing one
+        logger.debug("Ignoring the malformed provider cache entry '%s': %s", key, ex)
+        return None
+
+
+def _get_provider_resource_types(client, namespace, refresh):
+    """ Returns the resource types and whether they were just downloaded. """
+    ttl = az_config.getint('core', 'provider_cache_ttl', fallback=DEFAULT_PROVIDER_CACHE_TTL)
+    key = _get_provider_cache_key(client, namespace)
+    with _get_provider_download_lock(key):
+        resource_types = None if refresh else _get_cached_provider_resource_types(key, ttl)
+        if resource_types is not None:
+            logger.debug("Using cached metadata of provider '%s'", namespace)
+            return resource_types, False
+        downloaded = _download_provider_resource_types(client, namespace)
+        if ttl > 0:
+            with _PROVIDER_CACHE_LOCK:
+                PROVIDER_CACHE.data[key] = {'timestamp': time.time(),
+                                            'resourceTypes': downloaded}
+                try:
+                    PROVIDER_CACHE.save_with_retry()
+                except (OSError, IOError) as ex:
+                    logger.debug('Unable to save the provider cache: %s', ex)
+    return _to_provider_resource_types(downloaded), True
+
+
+def find_provider_resource_types(client, namespace, resource_type):
+    """ Get the resource types of a provider matching the name (case insensitive). Cached provider
+    metadata which doesn't know the resource type is refreshed, as it may be new. """
+    def _find(resource_types):
+        return [t for t in resource_types if t.resource_type.lower() == resource_type.lower()]
+    resource_types, downloaded = _get_provider_resource_types(client, namespace, refresh=False)
+    result = _find(resource_types)
+    if not result and not downloaded:
+        result = _find(get_provider_resource_types(client, namespace, refresh=True))
+    return result
+
+
+def invalidate_provider_cache(namespace=None):
+    """ Drop the cached metadata of a provider, or of all providers. """
+    with _PROVIDER_CACHE_LOCK:
+        if namespace:
+            suffix = '/' + namespace.lower()
+            for key in [k for k in PROVIDER_CACHE.data if k.endswith(suffix)]:
+                del PROVIDER_CACHE.data[key]
+        else:
+            PROVIDER_CACHE.data.clear()
+        try:
+            PROVIDER_CACHE.save_with_retry()
+        except (OSError, IOError) as ex:
+            logger.debug('Unable to save the provider cache: %s', ex)
+
+
 def add_id_parameters(command_table):
 
     def split_action(arguments):
@@ -4,6 +4,8 @@
 # --------------------------------------------------------------------------------------------
 
 import os
+import threading
+
 from azure.cli.core import __version__ as core_version
 from azure.cli.core._profile import Profile, CLOUD
 import azure.cli.core._debug as _debug
@@ -18,6 +20,11 @@ logger = azlogging.get_az_logger(__name__)
 UA_AGENT = "AZURECLI/{}".format(core_version)
 ENV_ADDITIONAL_USER_AGENT = 'AZURE_HTTP_USER_AGENT'
 
+# Management clients are cached for the lifetime of the process so repeated lookups within a
+# command (and the concurrent --ids fan-out) reuse the credentials and pooled HTTP connections.
+_MGMT_CLIENT_CACHE = {}
+_MGMT_CLIENT_CACHE_LOCK = threading.Lock()
+
 
 def get_mgmt_service_client(client_or_resource_type, subscription_id=None, api_version=None,
                             **kwargs):
@@ -59,8 +66,47 @@ def configure_common_settings(client):
         'x-ms-client-request-id' not in APPLICATION.session['headers']
 
 
+def clear_mgmt_service_client_cache():
+    """ Drop all cached management clients, e.g. after the logged in account changes. """
+    with _MGMT_CLIENT_CACHE_LOCK:
+        _MGMT_CLIENT_CACHE.clear()
+
+
+def _get_mgmt_service_client_cache_key(client_type, subscription_bound, subscription_id,
+                                       api_version, base_url_bound, kwargs):
+    try:
+        key = (client_type, subscription_bound, subscription_id, api_version, base_url_bound,
+               CLOUD.name, APPLICATION.session.get('command'),
+               APPLICATION.session.get('completer_active'),
+               tuple(sorted(APPLICATION.session.get('headers', {}).items())),
+               tuple(sorted(kwargs.items())))
+        hash(key)
+    except TypeError:
+        # unhashable client arguments, don't cache
+        return None
+    return key
+
+
 def _get_mgmt_service_client(client_type, subscription_bound=True, subscription_id=None,
                              api_version=None, base_url_bound=True, **kwargs):
+    cache_key = _get_mgmt_service_client_cache_key(client_type, subscription_bound,
+                                                   subscription_id, api_version, base_url_bound,
+                                                   kwargs)
+    with _MGMT_CLIENT_CACHE_LOCK:
+        cached = _MGMT_CLIENT_CACHE.get(cache_key) if cache_key else None
+        if cached:
+            logger.debug('Reusing management service client client_type=%s',
+                         client_type.__name__)
+            return cached
+        result = _create_mgmt_service_client(client_type, subscription_bound, subscription_id,
+                                             api_version, base_url_bound, **kwargs)
+        if cache_key:
+            _MGMT_CLIENT_CACHE[cache_key] = result
+        return result
+
+
+def _create_mgmt_service_client(client_type, subscription_bound, subscription_id, api_version,
+                                base_url_bound, **kwargs):
     logger.debug('Getting management service client client_type=%s', client_type.__name__)
     profile = Profile()
     cred, subscription_id, _ = profile.get_login_credentials(subscription_id=subscription_id)
@@ -78,6 +124,8 @@ def _get_mgmt_service_client(client_type, subscription_bound=True, subscription_
         client = client_type(cred, **client_kwargs)
 
     configure_common_settings(client)
+    # keep the underlying requests session (and its connection pool) open between calls
+    client.config.keep_alive = True
 
     return (client, subscription_id)
 
@@ -31,6 +31,33 @@ def _register_global_parameter(global_group):
                               type=jmespath_type)
 
 
+def _is_streamable_query(query_expression):
+    '''A query can be applied to the items of a list one at a time if it is a projection (with an
+    optional filter) over the whole list, e.g. '[].name' or "[?location=='westus'].{n:name}".
+    Such a query gives the same result for the list as the concatenated results for each
+    single item list.
+    '''
+    parsed = getattr(query_expression, 'parsed', None) or {}
+    if parsed.get('type') not in ('projection', 'filter_projection'):
+        return False
+    left = parsed['children'][0]
+    if left.get('type') == 'flatten':
+        left = left['children'][0]
+    return left.get('type') in ('identity', 'current')
+
+
+def _query_streamed_result(query_expression, result, options):
+    from azure.cli.core._output import StreamedResult
+    if not _is_streamable_query(query_expression):
+        return query_expression.search(list(result), options)
+
+    def _query_items():
+        for item in result:
+            for queried in query_expression.search([item], options) or []:
+                yield queried
+    return StreamedResult(_query_items())
+
+
 def register(application):
     def handle_query_parameter(**kwargs):
         args = kwargs['args']
@@ -39,8 +66,14 @@ def register(application):
         if query_expression:
             def filter_output(**kwargs):
                 from jmespath import search, Options
-                kwargs['event_data']['result'] = query_expression.search(
-                    kwargs['event_data']['result'], Options(collections.OrderedDict))
+                from azure.cli.core._output import StreamedResult
+                result = kwargs['event_data']['result']
+                options = Options(collections.OrderedDict)
+                if isinstance(result, StreamedResult):
+                    kwargs['event_data']['result'] = _query_streamed_result(
+                        query_expression, result, options)
+                else:
+                    kwargs['event_data']['result'] = query_expression.search(result, options)
                 application.remove(application.FILTER_RESULT, filter_output)
             application.register(application.FILTER_RESULT, filter_output)
             application.session['query_active'] = True
@@ -129,6 +129,35 @@ def read_file_content(file_path, allow_binary=False):
     raise CLIError('Failed to decode file {} - unknown decoding'.format(file_path))
 
 
+def write_file_atomically(file_path, content, encoding='utf-8', mode=0o666):
+    """ Replace the file with the content. The content is written to a temporary file first, so
+    concurrent readers see either the previous or the new content but never a partial write.
+    :param str content: The text to write.
+    :param int mode: The permissions of the file, before the umask is applied. Pass 0o600 for
+    files which must only be readable by the current user.
+    """
+    import io
+    import os
+    import uuid
+    if isinstance(content, six.binary_type):
+        content = content.decode(encoding)
+    temp_path = '{}.{}.tmp'.format(file_path, uuid.uuid4().hex)
+    try:
+        with io.open(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode), 'w',
+                     encoding=encoding) as f:
+            f.write(content)
+        try:
+            os.replace(temp_path, file_path)
+        except AttributeError:  # python 2 has no os.replace
+            if os.name == 'nt' and os.path.exists(file_path):
+                os.remove(file_path)
+            os.rename(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def shell_safe_json_parse(json_or_dict_string):
     """ Allows the passing of JSON or Python dictionary strings. This is needed because certain
     JSON strings in CMD shell are not received in main's argv. This allows the user to specify
@@ -143,9 +172,31 @@ def shell_safe_json_parse(json_or_dict_string):
             raise CLIError('{}: {}'.format(ex.msg, ex.text))
 
 
-def todict(obj):  # pylint: disable=too-many-return-statements
+# Types returned as-is by `todict`. Compared by exact type so subclasses (e.g. str based enums)
+# still go through the full conversion.
+_TODICT_PRIMITIVE_TYPES = frozenset(six.string_types + six.integer_types +
+                                    (float, bool, type(None), bytes))
+
+# class -> {attribute name: camel case key}
+_TODICT_KEY_MAPS = {}
+
 
-    if isinstance(obj, dict):
+def _get_todict_key_map(cls):
+    try:
+        return _TODICT_KEY_MAPS[cls]
+    except KeyError:
+        # msrest models declare their attributes up front, other classes fill the map as we go
+        key_map = {name: to_camel_case(name) for name in getattr(cls, '_attribute_map', None) or {}
+                   if not name.startswith('_')}
+        _TODICT_KEY_MAPS[cls] = key_map
+        return key_map
+
+
+def todict(obj):  # pylint: disable=too-many-return-statements
+    obj_type = type(obj)
+    if obj_type in _TODICT_PRIMITIVE_TYPES:
+        return obj
+    elif isinstance(obj, dict):
         return {k: todict(v) for (k, v) in obj.items()}
     elif isinstance(obj, list):
         return [todict(a) for a in obj]
@@ -158,11 +209,18 @@ def todict(obj):  # pylint: disable=too-many-return-statements
     elif hasattr(obj, '_asdict'):
         return todict(obj._asdict())
     elif hasattr(obj, '__dict__'):
-        return dict([(to_camel_case(k), todict(v))
-                     for k, v in obj.__dict__.items()
-                     if not callable(v) and not k.startswith('_')])
-    else:
-        return obj
+        key_map = _get_todict_key_map(obj_type)
+        result = {}
+        for k, v in obj.__dict__.items():
+            if k.startswith('_') or callable(v):
+                continue
+            try:
+                key = key_map[k]
+            except KeyError:
+                key = key_map[k] = to_camel_case(k)
+            result[key] = todict(v)
+        return result
+    return obj
 
 
 KEYS_CAMELCASE_PATTERN = re.compile('(?!^)_([a-zA-Z])')
@@ -51,8 +51,8 @@ DEPENDENCIES = [
     'azure-cli-nspkg',
     'colorama',
     'jmespath',
-    'msrest>=0.4.4',
-    'msrestazure>=0.4.7',
+    'msrest>=0.4.28',
+    'msrestazure>=0.4.7,<0.7.0',  # the poller delay is set by long_running_operation_timeout
     'pip',
     'pygments',
     'pyopenssl>=16.2',  # https://github.com/pyca/pyopenssl/issues/568
@@ -65,6 +65,9 @@ DEPENDENCIES = [
 if sys.version_info < (3, 4):
     DEPENDENCIES.append('enum34')
 
+if sys.version_info < (3, 2):
+    DEPENDENCIES.append('futures')
+
 if sys.version_info < (2, 7, 9):
     DEPENDENCIES.append('pyopenssl')
     DEPENDENCIES.append('ndg-httpsclient')
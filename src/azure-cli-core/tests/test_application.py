@@ -10,7 +10,8 @@ import tempfile
 
 from six import StringIO
 
-from azure.cli.core.application import Application, Configuration, IterateAction
+from azure.cli.core.application import (Application, Configuration, IterateAction,
+                                        _execute_concurrently)
 from azure.cli.core.commands import CliCommand
 from azure.cli.core.util import CLIError
 
@@ -83,6 +84,38 @@ class TestApplication(unittest.TestCase):
         self.assertEqual(hellos[1]['hello'], 'sir')
         self.assertEqual(hellos[1]['something'], 'else')
 
+    def test_execute_concurrently_preserves_order(self):
+        import time
+
+        def handler(args):
+            # finish the first invocations last
+            time.sleep(0.01 * (5 - args['index']))
+            return args['index']
+
+        invocations = [(handler, {'index': i}, {'index': i}) for i in range(5)]
+        results, exit_code = _execute_concurrently(invocations, 3)
+
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+        self.assertEqual(exit_code, 0)
+
+    def test_execute_concurrently_aggregates_failures(self):
+        def handler(args):
+            if args['index'] % 2:
+                raise CLIError('failed {}'.format(args['index']))
+            return args['index']
+
+        invocations = [(handler, {'index': i}, {'index': i}) for i in range(5)]
+        results, exit_code = _execute_concurrently(invocations, 5)
+
+        # failed invocations keep their place, with the arguments they were run with
+        self.assertEqual(results, [0, {'index': 1, 'error': 'failed 1'}, 2,
+                                   {'index': 3, 'error': 'failed 3'}, 4])
+        self.assertEqual(exit_code, 1)
+
+        with self.assertRaises(CLIError):
+            _execute_concurrently([(handler, {'index': 1}, {'index': 1}),
+                                   (handler, {'index': 3}, {'index': 3})], 2)
+
     def test_expand_file_prefixed_files(self):
         f = tempfile.NamedTemporaryFile(delete=False)
         f.close()
@@ -3,9 +3,18 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 
-from azure.cli.core.commands.arm import parse_resource_id
+import mock
+
+from azure.cli.core._session import PROVIDER_CACHE
+from azure.cli.core.util import get_file_json
+from azure.cli.core.commands.arm import (parse_resource_id, find_provider_resource_types,
+                                         invalidate_provider_cache)
 
 
 class TestARM(unittest.TestCase):
@@ -93,6 +102,97 @@ class TestARM(unittest.TestCase):
             resource = parse_resource_id(test['resource_id'])
             self.assertDictEqual(resource, test['expected'])
 
+    def test_provider_resource_types_cached(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        PROVIDER_CACHE.load(os.path.join(cache_dir, 'providerCache.json'))
+        self.addCleanup(PROVIDER_CACHE.__init__, ignore_corrupt_file=True)
+
+        client = mock.MagicMock()
+        client.config.subscription_id = 'fakesub'
+        resource_type = mock.MagicMock(resource_type='virtualMachines',
+                                       api_versions=['2017-03-30', '2016-04-30-preview'],
+                                       locations=['West US'])
+        client.providers.get.return_value.resource_types = [resource_type]
+
+        for _ in range(2):
+            types = find_provider_resource_types(client, 'Microsoft.Compute', 'VirtualMachines')
+            self.assertEqual(types[0].api_versions, ['2017-03-30', '2016-04-30-preview'])
+            self.assertEqual(types[0].locations, ['West US'])
+        self.assertEqual(client.providers.get.call_count, 1)
+
+        # a resource type unknown to the cached metadata refreshes it once
+        self.assertEqual(find_provider_resource_types(client, 'Microsoft.Compute', 'disks'), [])
+        self.assertEqual(client.providers.get.call_count, 2)
+
+        invalidate_provider_cache('microsoft.compute')
+        find_provider_resource_types(client, 'Microsoft.Compute', 'virtualMachines')
+        self.assertEqual(client.providers.get.call_count, 3)
+
+        # without caching, a resource type unknown to the provider is downloaded only once
+        with mock.patch('azure.cli.core.commands.arm.az_config') as config:
+            config.getint.return_value = 0
+            self.assertEqual(find_provider_resource_types(client, 'Microsoft.Compute', 'disks'),
+                             [])
+        self.assertEqual(client.providers.get.call_count, 4)
+
+    def test_provider_cache_corrupt_file(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        cache_file = os.path.join(cache_dir, 'providerCache.json')
+        with open(cache_file, 'w') as f:
+            f.write('{"AzureCloud/fakesub/microsoft.compute": {"timest')
+        PROVIDER_CACHE.load(cache_file)
+        self.addCleanup(PROVIDER_CACHE.__init__, ignore_corrupt_file=True)
+
+        client = mock.MagicMock()
+        client.config.subscription_id = 'fakesub'
+        client.providers.get.return_value.resource_types = [
+            mock.MagicMock(resource_type='disks', api_versions=['2017-03-30'], locations=[])]
+        types = find_provider_resource_types(client, 'Microsoft.Compute', 'disks')
+        self.assertEqual(types[0].api_versions, ['2017-03-30'])
+        self.assertEqual(len(get_file_json(cache_file)), 1)
+
+        # an entry without a timestamp is downloaded again, like a missing one
+        del PROVIDER_CACHE.data['AzureCloud/fakesub/microsoft.compute']['timestamp']
+        types = find_provider_resource_types(client, 'Microsoft.Compute', 'disks')
+        self.assertEqual(types[0].api_versions, ['2017-03-30'])
+        self.assertEqual(client.providers.get.call_count, 2)
+
+    def test_provider_cache_downloads_providers_concurrently(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        PROVIDER_CACHE.load(os.path.join(cache_dir, 'providerCache.json'))
+        self.addCleanup(PROVIDER_CACHE.__init__, ignore_corrupt_file=True)
+
+        downloading = threading.Event()
+        release = threading.Event()
+        downloaded = threading.Event()
+        provider = mock.MagicMock(resource_types=[
+            mock.MagicMock(resource_type='disks', api_versions=['2017-03-30'], locations=[])])
+
+        def get_provider(namespace):
+            if namespace == 'Microsoft.Slow':
+                downloading.set()
+                release.wait(10)
+                downloaded.set()
+            return provider
+        client = mock.MagicMock()
+        client.config.subscription_id = 'fakesub'
+        client.providers.get.side_effect = get_provider
+
+        slow = threading.Thread(target=find_provider_resource_types,
+                                args=(client, 'Microsoft.Slow', 'disks'))
+        slow.start()
+        self.addCleanup(slow.join)
+        self.addCleanup(release.set)
+        self.assertTrue(downloading.wait(10))
+
+        # the metadata of another provider doesn't wait for the slow download
+        self.assertEqual(len(find_provider_resource_types(client, 'Microsoft.Compute', 'disks')),
+                         1)
+        self.assertFalse(downloaded.is_set())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,110 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+import mock
+
+from six.moves import BaseHTTPServer, socketserver
+
+from azure.cli.core.adal_authentication import AdalAuthentication
+from azure.cli.core.commands.client_factory import (_get_mgmt_service_client,
+                                                    clear_mgmt_service_client_cache)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class _RecordingHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.requests.append((self.client_address, self.headers.get('Authorization')))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class FakeClient(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, credentials, subscription_id=None, **kwargs):
+        self.credentials = credentials
+        self.subscription_id = subscription_id
+        self.kwargs = kwargs
+        self.config = mock.MagicMock()
+
+
+class TestClientFactory(unittest.TestCase):
+
+    def setUp(self):
+        clear_mgmt_service_client_cache()
+
+    def tearDown(self):
+        clear_mgmt_service_client_cache()
+
+    @mock.patch('azure.cli.core.commands.client_factory.configure_common_settings', autospec=True)
+    @mock.patch('azure.cli.core.commands.client_factory.Profile', autospec=True)
+    def test_mgmt_service_client_is_cached(self, profile_mock, _):
+        profile_mock.return_value.get_login_credentials.side_effect = \
+            lambda subscription_id=None: ('cred', subscription_id or 'default-sub', 'tenant')
+
+        client, subscription_id = _get_mgmt_service_client(FakeClient)
+        self.assertEqual(subscription_id, 'default-sub')
+        self.assertTrue(client.config.keep_alive)
+
+        again, _ = _get_mgmt_service_client(FakeClient)
+        self.assertIs(client, again)
+        self.assertEqual(profile_mock.call_count, 1)
+
+        # a different subscription or api version gets its own client
+        other, subscription_id = _get_mgmt_service_client(FakeClient, subscription_id='other-sub')
+        self.assertIsNot(client, other)
+        self.assertEqual(subscription_id, 'other-sub')
+        versioned, _ = _get_mgmt_service_client(FakeClient, api_version='2017-01-01')
+        self.assertIsNot(client, versioned)
+        self.assertEqual(versioned.kwargs['api_version'], '2017-01-01')
+
+        clear_mgmt_service_client_cache()
+        fresh, _ = _get_mgmt_service_client(FakeClient)
+        self.assertIsNot(client, fresh)
+
+    @mock.patch('azure.cli.core.commands.client_factory.configure_common_settings', autospec=True)
+    @mock.patch('azure.cli.core.commands.client_factory.Profile', autospec=True)
+    def test_mgmt_service_client_unhashable_kwargs_not_cached(self, profile_mock, _):
+        profile_mock.return_value.get_login_credentials.return_value = ('cred', 'sub', 'tenant')
+
+        first, _ = _get_mgmt_service_client(FakeClient, extra=['a'])
+        second, _ = _get_mgmt_service_client(FakeClient, extra=['a'])
+        self.assertIsNot(first, second)
+        self.assertEqual(first.kwargs['extra'], ['a'])
+
+    def test_kept_alive_client_reuses_connection(self):
+        from msrest import Configuration
+        from msrest.service_client import ServiceClient
+        server = _ThreadingHTTPServer(('127.0.0.1', 0), _RecordingHandler)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        threading.Thread(target=server.serve_forever).start()
+        _RecordingHandler.requests = []
+
+        config = Configuration('http://127.0.0.1:{}'.format(server.server_port))
+        config.keep_alive = True
+        client = ServiceClient(AdalAuthentication(lambda: ('Bearer', 'token')), config)
+        for _ in range(3):
+            client.send(client.get('/')).content  # pylint: disable=expression-not-assigned
+
+        self.assertEqual(len(_RecordingHandler.requests), 3)
+        self.assertEqual(len(set(address for address, _ in _RecordingHandler.requests)), 1)
+        self.assertTrue(all(auth == 'Bearer token' for _, auth in _RecordingHandler.requests))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+import yaml
+
+import azure.cli.core.commands as commands
+from azure.cli.core.commands import CliCommand, IndexedCliCommand
+from azure.cli.core.commands._command_index import (load_command_index, update_command_index,
+                                                    invalidate_command_index,
+                                                    get_command_module_name,
+                                                    load_command_index_help)
+from azure.cli.core._session import COMMAND_INDEX, Session
+from azure.cli.core.util import get_file_json
+
+
+def sample_transformer(result):
+    return result
+
+
+class TestCommandIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.saved_command_table = dict(commands.command_table)
+        commands.command_table.clear()
+        invalidate_command_index()
+
+    def tearDown(self):
+        commands.command_table.clear()
+        commands.command_table.update(self.saved_command_table)
+        invalidate_command_index()
+
+    def test_command_module_name(self):
+        self.assertEqual(get_command_module_name('azure.cli.command_modules.vm.commands'), 'vm')
+        self.assertEqual(get_command_module_name('azure.cli.command_modules.vm'), 'vm')
+        self.assertIsNone(get_command_module_name('some.other.module'))
+        self.assertIsNone(get_command_module_name(None))
+
+    @mock.patch.dict('azure.cli.core.help_files.helps', {'test': 'short-summary: Test group.'})
+    def test_command_index_round_trip(self):
+        table = {
+            'test show': CliCommand('test show', None, table_transformer=sample_transformer,
+                                    operation='mod#show'),
+            'test delete': CliCommand('test delete', None, confirmation=True),
+            'login': CliCommand('login', None, description_loader=lambda: 'Log in to Azure.'),
+            'unknown': CliCommand('unknown', None)
+        }
+        module_map = {'test show': 'azure.cli.command_modules.test.commands',
+                      'test delete': 'azure.cli.command_modules.test.commands',
+                      'login': 'azure.cli.command_modules.profile.commands'}
+
+        update_command_index(table, module_map, ['profile', 'test'])
+        index = load_command_index(['profile', 'test'])
+
+        self.assertEqual(index, {'test show': {'module': 'test'},
+                                 'test delete': {'module': 'test'},
+                                 'login': {'module': 'profile'}})
+        self.assertEqual(sorted(load_command_index_help()), ['login', 'test'])
+        self.assertEqual(yaml.safe_load(load_command_index_help()['login']),
+                         {'short-summary': 'Log in to Azure.'})
+
+    def test_command_index_invalid_when_modules_change(self):
+        update_command_index({}, {}, ['test'])
+        self.assertIsNone(load_command_index(['test']))  # empty index is not usable
+        update_command_index({'test show': CliCommand('test show', None)},
+                             {'test show': 'azure.cli.command_modules.test.commands'}, ['test'])
+        self.assertIsNotNone(load_command_index(['test']))
+        self.assertIsNone(load_command_index(['test', 'other']))
+        COMMAND_INDEX.data['version'] = -1
+        self.assertIsNone(load_command_index(['test']))
+
+    @mock.patch('azure.cli.core.commands._load_all_command_modules', autospec=True)
+    @mock.patch('azure.cli.core.commands._get_installed_command_modules', autospec=True)
+    def test_get_command_table_from_index(self, installed_mock, load_all_mock):
+        installed_mock.return_value = ['test']
+        update_command_index({'test show': CliCommand('test show', None)},
+                             {'test show': 'azure.cli.command_modules.test.commands'}, ['test'])
+
+        result = commands.get_command_table(use_command_index=True)
+
+        self.assertFalse(load_all_mock.called)
+        self.assertIsInstance(result['test show'], IndexedCliCommand)
+        self.assertEqual(result['test show'].module_name, 'test')
+
+    @mock.patch('azure.cli.core.commands._load_all_command_modules', autospec=True)
+    @mock.patch('azure.cli.core.commands._get_installed_command_modules', autospec=True)
+    def test_get_command_table_builds_index(self, installed_mock, load_all_mock):
+        installed_mock.return_value = ['test']
+
+        def _load_all(_):
+            commands.cli_command('azure.cli.command_modules.test.commands', 'test show',
+                                 'azure.cli.core.util#todict')
+            return True
+        load_all_mock.side_effect = _load_all
+
+        commands.get_command_table(use_command_index=True)
+
+        self.assertEqual(load_command_index(['test'])['test show'], {'module': 'test'})
+
+    @mock.patch('azure.cli.core.commands.import_module', autospec=True)
+    def test_indexed_command_loads_module_on_use(self, import_mock):
+        def handler(kwargs):
+            return kwargs['value']
+
+        def _load_commands():
+            real = CliCommand('test show', handler, table_transformer=sample_transformer)
+            real.add_argument('value', '--value')
+            commands.command_table['test show'] = real
+        import_mock.return_value.load_commands.side_effect = _load_commands
+
+        indexed = IndexedCliCommand('test show', 'test')
+        commands.command_table['test show'] = indexed
+        self.assertFalse(import_mock.called)
+
+        indexed.load_arguments()
+        import_mock.assert_called_once_with('azure.cli.command_modules.test')
+        self.assertIs(commands.command_table['test show'], indexed)
+        self.assertIn('value', indexed.arguments)
+        self.assertIs(indexed.table_transformer, sample_transformer)
+        self.assertEqual(indexed.handler({'value': 'abc'}), 'abc')
+
+    @mock.patch('azure.cli.core.commands.import_module', autospec=True)
+    def test_indexed_command_missing_from_module(self, _):
+        from azure.cli.core.util import CLIError
+        update_command_index({'test show': CliCommand('test show', None)},
+                             {'test show': 'azure.cli.command_modules.test.commands'}, ['test'])
+        indexed = IndexedCliCommand('test show', 'test')
+        commands.command_table['test show'] = indexed
+
+        with self.assertRaises(CLIError):
+            indexed.load_arguments()
+        self.assertIsNone(load_command_index(['test']))
+
+    @mock.patch('azure.cli.core.commands.import_module', autospec=True)
+    def test_indexed_command_help(self, import_mock):
+        from azure.cli.core.help_files import helps
+        update_command_index({'test show': CliCommand('test show', None),
+                              'other list': CliCommand('other list', None),
+                              'login': CliCommand('login', None, description='Log in.')},
+                             {'test show': 'azure.cli.command_modules.test.commands',
+                              'other list': 'azure.cli.command_modules.other.commands',
+                              'login': 'azure.cli.command_modules.profile.commands'},
+                             ['other', 'profile', 'test'])
+        for name, entry in load_command_index(['other', 'profile', 'test']).items():
+            commands.command_table[name] = IndexedCliCommand(name, entry['module'])
+
+        with mock.patch.dict(helps, {}):
+            # the top level help comes from the index
+            commands.load_command_help([])
+            self.assertFalse(import_mock.called)
+            self.assertIn('login', helps)
+            self.assertIsNone(commands.command_table['login'].description())
+            self.assertFalse(import_mock.called)
+
+        # the help of a group only imports the modules of that group
+        commands.load_command_help(['test'])
+        import_mock.assert_called_once_with('azure.cli.command_modules.test')
+
+    def test_command_index_corrupt_file(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        file_path = os.path.join(temp_dir, 'commandIndex.json')
+        with open(file_path, 'w') as f:
+            f.write('{"version": 2, "commands": {"test sh')  # truncated by a concurrent write
+
+        # files that can't be rebuilt, like the profile, are still an error
+        with self.assertRaises(ValueError):
+            Session().load(file_path)
+
+        index = Session(ignore_corrupt_file=True)
+        index.load(file_path)
+        self.assertEqual(index.data, {})
+
+        index['version'] = 2
+        self.assertEqual(get_file_json(file_path), {'version': 2})
+        self.assertEqual(os.listdir(temp_dir), ['commandIndex.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
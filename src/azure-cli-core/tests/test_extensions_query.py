@@ -5,7 +5,11 @@
 
 import unittest
 
-from azure.cli.core.extensions.query import jmespath_type
+from collections import OrderedDict
+
+from azure.cli.core.extensions.query import (jmespath_type, _is_streamable_query,
+                                             _query_streamed_result)
+from azure.cli.core._output import StreamedResult
 
 
 class TestQuery(unittest.TestCase):
@@ -56,5 +60,33 @@ class TestQuery(unittest.TestCase):
             jmespath_type(query)
 
 
+class TestStreamedQuery(unittest.TestCase):
+
+    ITEMS = [{'name': 'a', 'location': 'westus', 'tags': [1, 2]},
+             {'name': 'b', 'location': 'eastus'},
+             {'name': 'c', 'location': 'westus', 'tags': [3]}]
+
+    def test_streamable_queries(self):
+        for query in ['[].name', '[*].name', "[?location=='westus']", '[]',
+                      "[?location=='westus'].{n:name, t:tags}", '[].[name, location]', '@[*].name']:
+            self.assertTrue(_is_streamable_query(jmespath_type(query)), query)
+        for query in ['length(@)', '[0]', '[0].name', 'sort_by(@, &name)', '[].name | [0]',
+                      '[:2]', 'name']:
+            self.assertFalse(_is_streamable_query(jmespath_type(query)), query)
+
+    def test_streamed_query_matches_list_query(self):
+        from jmespath import Options
+        options = Options(OrderedDict)
+        for query in ['[].name', "[?location=='westus'].{n:name, t:tags}", '[].tags[]',
+                      '[].tags', 'length(@)', "[?location=='westus'] | [0]"]:
+            expression = jmespath_type(query)
+            expected = expression.search(self.ITEMS, options)
+            result = _query_streamed_result(expression, StreamedResult(iter(self.ITEMS)),
+                                            options)
+            if isinstance(result, StreamedResult):
+                result = list(result)
+            self.assertEqual(result, expected, query)
+
+
 if __name__ == '__main__':
     unittest.main()
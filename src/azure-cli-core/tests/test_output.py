@@ -5,15 +5,24 @@
 
 from __future__ import print_function
 # pylint: disable=protected-access, bad-continuation, too-many-public-methods, trailing-whitespace
+import json
 import unittest
 from collections import OrderedDict
 from six import StringIO
+import mock
 
+from azure.cli.core.commands import create_command
 from azure.cli.core._output import (OutputProducer, format_json, format_table,
-                                    format_tsv, CommandResultItem)
+                                    format_tsv, CommandResultItem, StreamedResult)
 import azure.cli.core.util as util
 
 
+def list_pages():
+    # the second page can't be retrieved
+    yield {'name': 'a'}
+    raise ValueError('page 2 failed')
+
+
 class TestOutput(unittest.TestCase):
 
     @classmethod
@@ -177,6 +186,48 @@ qwerty  0b1f6472qwerty         1  0b1f6472
         result = format_tsv(CommandResultItem([obj1, obj2]))
         self.assertEqual(result, '1\t2\n3\t4\n')
 
+    def test_out_json_streamed_matches_list(self):
+        items = [{'name': 'a', 'tags': {'x': 1}, 'ids': [1, 2]}, {'name': 'b', 'tags': None}]
+        for test_items in (items, items[:1], []):
+            output_producer = OutputProducer(formatter=format_json, file=self.io)
+            output_producer.out(CommandResultItem(StreamedResult(iter(test_items))))
+            self.assertEqual(self.io.getvalue(), format_json(CommandResultItem(test_items)))
+            self.io.truncate(0)
+            self.io.seek(0)
+
+    def test_out_json_streamed_error_closes_array(self):
+        def items():
+            yield {'name': 'a'}
+            raise util.CLIError('page 2 failed')
+
+        output_producer = OutputProducer(formatter=format_json, file=self.io)
+        with self.assertRaises(util.CLIError):
+            output_producer.out(CommandResultItem(StreamedResult(items())))
+        # the items written before the error are still valid JSON
+        self.assertEqual(json.loads(self.io.getvalue()), [{'name': 'a'}])
+
+    @mock.patch('azure.cli.core.commands.is_output_streaming_enabled', return_value=True)
+    @mock.patch('azure.cli.core.commands._is_paged', return_value=True)
+    def test_streamed_command_handles_page_errors(self, _, __):
+        command = create_command(__name__, 'test', '{}#list_pages'.format(__name__),
+                                 None, None, None)
+        output_producer = OutputProducer(formatter=format_json, file=self.io)
+        # the errors fetching later pages are translated like those of the command
+        with self.assertRaises(util.CLIError):
+            output_producer.out(CommandResultItem(StreamedResult(command.handler({}))))
+        self.assertEqual(json.loads(self.io.getvalue()), [{'name': 'a'}])
+
+    def test_out_tsv_streamed_matches_list(self):
+        items = [OrderedDict([('b', 1), ('a', 2)]), {'b': 3, 'a': 4}]
+        output_producer = OutputProducer(formatter=format_tsv, file=self.io)
+        output_producer.out(CommandResultItem(StreamedResult(iter(items))))
+        self.assertEqual(self.io.getvalue(), format_tsv(CommandResultItem(items)))
+
+    def test_out_table_streamed_is_materialized(self):
+        output_producer = OutputProducer(formatter=format_table, file=self.io)
+        output_producer.out(CommandResultItem(StreamedResult(iter([{'name': 'a'}]))))
+        self.assertEqual(self.io.getvalue(), format_table(CommandResultItem([{'name': 'a'}])))
+
 
 if __name__ == '__main__':
     unittest.main()
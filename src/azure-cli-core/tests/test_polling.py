@@ -0,0 +1,131 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+
+import mock
+import requests
+
+from azure.cli.core.commands import LongRunningOperation, create_command
+from azure.cli.core.commands._polling import (PollingStrategy, PollerMultiplexer,
+                                              get_operation_timeout)
+
+
+class ResponseStub(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class PollerStub(object):
+
+    def __init__(self, checks_until_done, result=None, headers=None):
+        self._checks_until_done = checks_until_done
+        self._result = result
+        self._response = ResponseStub(headers)
+        self._timeout = 30
+
+    def done(self):
+        self._checks_until_done -= 1
+        return self._checks_until_done < 0
+
+    def result(self):
+        return self._result
+
+
+class OperationsStub(object):
+
+    # pylint: disable=unused-argument
+    def begin_create(self, name, custom_headers=None, raw=False, **operation_config):
+        return PollerStub(0, result=operation_config)
+
+    def create_custom(self, name):  # pylint: disable=no-self-use
+        return PollerStub(0, result={})
+
+
+class TestPolling(unittest.TestCase):
+
+    def test_polling_strategy_backoff(self):
+        strategy = PollingStrategy(initial_delay=1, max_delay=10)
+        for attempt, expected in enumerate([1, 2, 4, 8, 10, 10]):
+            delay = strategy.get_delay(attempt)
+            self.assertTrue(expected / 2.0 <= delay <= expected, (attempt, delay))
+        self.assertEqual(strategy.get_delay(3, retry_after=5), 5)
+
+    def test_operation_timeout(self):
+        strategy = PollingStrategy(initial_delay=4)
+        for _ in range(10):
+            self.assertTrue(2 <= get_operation_timeout(strategy) <= 4)
+
+    def test_sdk_poller_uses_operation_timeout(self):
+        # the SDK poller is the one making the status requests, with the delay it was started with
+        from msrestazure.azure_operation import AzureOperationPoller
+
+        def _response(status_code, headers=None):
+            response = requests.Response()
+            response.status_code = status_code
+            response.headers.update(headers or {})
+            response._content = b''  # pylint: disable=protected-access
+            response.request = requests.Request('DELETE', 'https://management/resource').prepare()
+            return response
+
+        location = {'location': 'https://management/operation'}
+        responses = [_response(202, dict(location, **{'retry-after': '7'})),
+                     _response(202, location), _response(200)]
+        timeout = get_operation_timeout(PollingStrategy(initial_delay=4))
+        with mock.patch('msrestazure.azure_operation.time') as mock_time:
+            poller = AzureOperationPoller(lambda: _response(202, location), lambda _: None,
+                                          lambda *_: responses.pop(0), timeout)
+            poller.wait(10)
+        self.assertTrue(poller.done())
+        self.assertEqual([c[0][0] for c in mock_time.sleep.call_args_list], [timeout, 7, timeout])
+
+    def test_multiplexer_leaves_poller_timeout(self):
+        multiplexer = PollerMultiplexer()
+        poller = PollerStub(4)
+        multiplexer.wait(poller, delay=lambda: None)
+        self.assertTrue(poller.done())
+        self.assertEqual(poller._timeout, 30)  # pylint: disable=protected-access
+
+    def test_multiplexer_waits_for_pollers_from_many_threads(self):
+        multiplexer = PollerMultiplexer(check_interval=0.01)
+        pollers = [PollerStub(i * 3) for i in range(5)]
+        threads = [threading.Thread(target=multiplexer.wait, args=(p, None, lambda: None))
+                   for p in pollers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+            self.assertFalse(t.is_alive())
+        self.assertTrue(all(p.done() for p in pollers))
+
+    def test_long_running_operation_returns_result(self):
+        operation = LongRunningOperation('test')
+        operation._delay = lambda: None  # pylint: disable=protected-access
+        self.assertEqual(operation(PollerStub(3, result='done')), 'done')
+
+    def test_poller_timeout_set_for_sdk_operations(self):
+        wait = LongRunningOperation('test')
+        wait._delay = lambda: None  # pylint: disable=protected-access
+
+        def _execute(operation, transform_result):
+            command = create_command(__name__, 'test', '{}#{}'.format(__name__, operation),
+                                     transform_result, None, lambda _: OperationsStub())
+            return command.handler({'name': 'foo'})
+
+        # the status of operations waited on by LongRunningOperation is checked early
+        operation_config = _execute('OperationsStub.begin_create', wait)
+        timeout = operation_config['long_running_operation_timeout']
+        initial_delay = PollingStrategy().initial_delay
+        self.assertTrue(initial_delay / 2 <= timeout <= initial_delay, timeout)
+
+        # pollers waited on elsewhere, and those of custom commands, use the client's setting
+        self.assertEqual(_execute('OperationsStub.begin_create', lambda p: p.result()), {})
+        self.assertEqual(_execute('OperationsStub.create_custom', wait), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
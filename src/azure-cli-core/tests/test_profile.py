@@ -13,7 +13,8 @@ from adal import AdalError
 from azure.mgmt.resource.subscriptions.models import (SubscriptionState, Subscription,
                                                       SubscriptionPolicies, SpendingLimit)
 from azure.cli.core._profile import (Profile, CredsCache, SubscriptionFinder,
-                                     ServicePrincipalAuth, CLOUD)
+                                     ServicePrincipalAuth, CLOUD, clear_access_token_cache,
+                                     _clear_shared_creds)
 from azure.cli.core.util import CLIError
 
 
@@ -54,6 +55,10 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
                                              cls.state2,
                                              cls.tenant_id)
 
+    def setUp(self):
+        clear_access_token_cache()
+        _clear_shared_creds()
+
     def test_normalize(self):
         consolidated = Profile._normalize_properties(self.user1,
                                                      [self.subscription1],
@@ -555,9 +560,8 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         self.assertEqual(creds_cache._service_principal_creds, [test_sp])
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
-    @mock.patch('os.fdopen', autospec=True)
-    @mock.patch('os.open', autospec=True)
-    def test_credscache_add_new_sp_creds(self, _, mock_open_for_write, mock_read_file):
+    @mock.patch('azure.cli.core._profile.write_file_atomically', autospec=True)
+    def test_credscache_add_new_sp_creds(self, mock_write_file, mock_read_file):
         test_sp = {
             "servicePrincipalId": "myapp",
             "servicePrincipalTenant": "mytenant",
@@ -568,7 +572,6 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
             "servicePrincipalTenant": "mytenant2",
             "accessToken": "Secret2"
         }
-        mock_open_for_write.return_value = FileHandleStub()
         mock_read_file.return_value = [self.token_entry1, test_sp]
         creds_cache = CredsCache()
 
@@ -579,18 +582,16 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         token_entries = [e for _, e in creds_cache.adal_token_cache.read_items()]  # noqa: F812
         self.assertEqual(token_entries, [self.token_entry1])
         self.assertEqual(creds_cache._service_principal_creds, [test_sp, test_sp2])
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
+        mock_write_file.assert_called_with(mock.ANY, mock.ANY, mode=0o600)
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
-    @mock.patch('os.fdopen', autospec=True)
-    @mock.patch('os.open', autospec=True)
-    def test_credscache_add_preexisting_sp_creds(self, _, mock_open_for_write, mock_read_file):
+    @mock.patch('azure.cli.core._profile.write_file_atomically', autospec=True)
+    def test_credscache_add_preexisting_sp_creds(self, mock_write_file, mock_read_file):
         test_sp = {
             "servicePrincipalId": "myapp",
             "servicePrincipalTenant": "mytenant",
             "accessToken": "Secret"
         }
-        mock_open_for_write.return_value = FileHandleStub()
         mock_read_file.return_value = [test_sp]
         creds_cache = CredsCache()
 
@@ -601,15 +602,13 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         self.assertEqual(creds_cache._service_principal_creds, [test_sp])
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
-    @mock.patch('os.fdopen', autospec=True)
-    @mock.patch('os.open', autospec=True)
-    def test_credscache_remove_creds(self, _, mock_open_for_write, mock_read_file):
+    @mock.patch('azure.cli.core._profile.write_file_atomically', autospec=True)
+    def test_credscache_remove_creds(self, mock_write_file, mock_read_file):
         test_sp = {
             "servicePrincipalId": "myapp",
             "servicePrincipalTenant": "mytenant",
             "accessToken": "Secret"
         }
-        mock_open_for_write.return_value = FileHandleStub()
         mock_read_file.return_value = [self.token_entry1, test_sp]
         creds_cache = CredsCache()
 
@@ -626,14 +625,14 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         # assert #2
         self.assertEqual(creds_cache._service_principal_creds, [])
 
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
-        self.assertEqual(mock_open_for_write.call_count, 2)
+        mock_write_file.assert_called_with(mock.ANY, mock.ANY, mode=0o600)
+        self.assertEqual(mock_write_file.call_count, 2)
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
-    @mock.patch('os.fdopen', autospec=True)
-    @mock.patch('os.open', autospec=True)
+    @mock.patch('azure.cli.core._profile.write_file_atomically', autospec=True)
+    @mock.patch('atexit.register', autospec=True)
     @mock.patch('adal.AuthenticationContext', autospec=True)
-    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, _, mock_open_for_write, mock_read_file):  # pylint: disable=line-too-long
+    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, mock_atexit, mock_write_file, mock_read_file):  # pylint: disable=line-too-long
         token_entry2 = {
             "accessToken": "new token",
             "tokenType": "Bearer",
@@ -649,7 +648,6 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
             return mock_adal_auth_context
 
         mock_adal_auth_context.acquire_token.side_effect = acquire_token_side_effect
-        mock_open_for_write.return_value = FileHandleStub()
         mock_read_file.return_value = [self.token_entry1]
         creds_cache = CredsCache(auth_ctx_factory=get_auth_context)
 
@@ -663,9 +661,155 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
             mock.ANY)
 
         # assert
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
         self.assertEqual(token, 'new token')
         self.assertEqual(token_type, token_entry2['tokenType'])
+        # the refreshed token is only written when the process exits
+        self.assertFalse(mock_write_file.called)
+        mock_atexit.assert_called_once_with(creds_cache._persist_cached_creds_if_changed)
+        creds_cache._persist_cached_creds_if_changed()
+        mock_write_file.assert_called_with(mock.ANY, mock.ANY, mode=0o600)
+
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    @mock.patch('azure.cli.core._profile.write_file_atomically', autospec=True)
+    @mock.patch('atexit.register', autospec=True)
+    def test_credscache_shared_by_profiles(self, mock_atexit, mock_write_file, mock_read_file):
+        mock_read_file.return_value = [self.token_entry1]
+        creds_cache = CredsCache()
+        creds_cache2 = CredsCache()
+
+        # the token file is read once and all caches work on the same tokens
+        self.assertEqual(mock_read_file.call_count, 1)
+        self.assertIs(creds_cache.adal_token_cache, creds_cache2.adal_token_cache)
+        self.assertIs(creds_cache.sp_token_cache, creds_cache2.sp_token_cache)
+
+        # and only one of them writes them on exit
+        creds_cache.adal_token_cache.has_state_changed = True
+        creds_cache._persist_cached_creds_on_exit()
+        creds_cache2._persist_cached_creds_on_exit()
+        self.assertEqual(mock_atexit.call_count, 1)
+        self.assertFalse(mock_write_file.called)
+
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_credscache_acquires_token_once_for_concurrent_callers(self, mock_adal_auth_context,
+                                                                   mock_read_file):
+        import threading
+        from datetime import datetime, timedelta
+        started = threading.Event()
+        release = threading.Event()
+
+        def acquire_token(resource, *_):
+            if resource == 'https://slow/':
+                started.set()
+                release.wait(10)
+            return {
+                "accessToken": resource,
+                "tokenType": "Bearer",
+                "expiresOn": str(datetime.now() + timedelta(hours=1))
+            }
+
+        mock_adal_auth_context.acquire_token.side_effect = acquire_token
+        mock_read_file.return_value = []
+        creds_cache = CredsCache(auth_ctx_factory=lambda _, cache: mock_adal_auth_context)
+        results = []
+
+        def retrieve():
+            results.append(creds_cache.retrieve_token_for_user(self.user1, self.tenant_id,
+                                                               'https://slow/'))
+
+        threads = [threading.Thread(target=retrieve) for _ in range(2)]
+        for t in threads:
+            t.start()
+        self.assertTrue(started.wait(10))
+        # a token for another resource doesn't wait for the one being acquired
+        result = creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, 'https://fast/')
+        self.assertEqual(result, ('Bearer', 'https://fast/'))
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [('Bearer', 'https://slow/')] * 2)
+        self.assertEqual(mock_adal_auth_context.acquire_token.call_count, 2)
+
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_credscache_reuses_access_token_until_near_expiry(self, mock_adal_auth_context,
+                                                              mock_read_file):
+        from datetime import datetime, timedelta
+        token_entry = {
+            "accessToken": "new token",
+            "tokenType": "Bearer",
+            "userId": self.user1,
+            "expiresOn": str(datetime.now() + timedelta(hours=1))
+        }
+        mock_adal_auth_context.acquire_token.return_value = token_entry
+        mock_read_file.return_value = []
+        creds_cache = CredsCache(auth_ctx_factory=lambda _, cache: mock_adal_auth_context)
+        mgmt_resource = 'https://management.core.windows.net/'
+
+        for _ in range(3):
+            result = creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, mgmt_resource)
+            self.assertEqual(result, ('Bearer', 'new token'))
+        self.assertEqual(mock_adal_auth_context.acquire_token.call_count, 1)
+
+        # a different resource needs its own token
+        creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, 'https://graph/')
+        self.assertEqual(mock_adal_auth_context.acquire_token.call_count, 2)
+
+        # tokens within the refresh-ahead window are acquired again
+        token_entry['expiresOn'] = str(datetime.now() + timedelta(minutes=2))
+        clear_access_token_cache()
+        creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, mgmt_resource)
+        creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, mgmt_resource)
+        self.assertEqual(mock_adal_auth_context.acquire_token.call_count, 4)
+
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_credscache_service_principal_token_persisted(self, mock_adal_auth_context,
+                                                          mock_read_file):
+        import shutil
+        import tempfile
+        from datetime import datetime, timedelta
+        from azure.cli.core._profile import SP_TOKEN_CACHE_STATS
+        test_sp = {
+            "servicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "accessToken": "Secret"
+        }
+        mock_adal_auth_context.acquire_token_with_client_credentials.return_value = {
+            "accessToken": "sp token",
+            "tokenType": "Bearer",
+            "expiresOn": str(datetime.now() + timedelta(hours=1))
+        }
+        mock_read_file.return_value = [test_sp]
+        mgmt_resource = 'https://management.core.windows.net/'
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        hits, misses = SP_TOKEN_CACHE_STATS['hits'], SP_TOKEN_CACHE_STATS['misses']
+
+        with mock.patch('azure.cli.core._profile.get_config_dir', return_value=config_dir):
+            creds_cache = CredsCache(auth_ctx_factory=lambda _, __: mock_adal_auth_context)
+            result = creds_cache.retrieve_token_for_service_principal('myapp', mgmt_resource)
+            self.assertEqual(result, ('Bearer', 'sp token'))
+
+            # a later command finds the token on disk
+            clear_access_token_cache()
+            _clear_shared_creds()
+            creds_cache = CredsCache(auth_ctx_factory=lambda _, __: mock_adal_auth_context)
+            result = creds_cache.retrieve_token_for_service_principal('myapp', mgmt_resource)
+            self.assertEqual(result, ('Bearer', 'sp token'))
+
+        self.assertEqual(
+            mock_adal_auth_context.acquire_token_with_client_credentials.call_count, 1)
+        self.assertEqual(SP_TOKEN_CACHE_STATS['hits'], hits + 1)
+        self.assertEqual(SP_TOKEN_CACHE_STATS['misses'], misses + 1)
+        token_file = os.path.join(config_dir, 'servicePrincipalTokens.json')
+        if os.name != 'nt':
+            self.assertEqual(os.stat(token_file).st_mode & 0o777, 0o600)
+
+        # logging out the service principal drops its tokens
+        creds_cache.remove_cached_creds('myapp')
+        self.assertIsNone(creds_cache.sp_token_cache.find('mytenant', mgmt_resource, 'myapp'))
 
     def test_service_principal_auth_client_secret(self):
         sp_auth = ServicePrincipalAuth('verySecret!')
@@ -690,18 +834,6 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         })
 
 
-class FileHandleStub(object):  # pylint: disable=too-few-public-methods
-
-    def write(self, content):
-        pass
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, _2, _3, _4):
-        pass
-
-
 class SubscriptionStub(Subscription):  # pylint: disable=too-few-public-methods
 
     def __init__(self, id, display_name, state, tenant_id):  # pylint: disable=redefined-builtin,
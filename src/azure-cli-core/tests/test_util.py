@@ -5,11 +5,16 @@
 
 # pylint: disable=line-too-long
 from collections import namedtuple
+import os
+import shutil
 import unittest
 import tempfile
 
+import mock
+
 from azure.cli.core.util import \
-    (get_file_json, todict, to_snake_case, truncate_text, shell_safe_json_parse)
+    (get_file_json, todict, to_snake_case, truncate_text, shell_safe_json_parse,
+     write_file_atomically)
 
 
 class TestUtils(unittest.TestCase):
@@ -53,6 +58,34 @@ class TestUtils(unittest.TestCase):
         expected = {'a': {'a': 'x', 'b': 'y'}}
         self.assertEqual(actual, expected)
 
+    def test_application_todict_model(self):
+        from enum import Enum
+
+        class Color(str, Enum):
+            red = 'Red'
+
+        class Model(object):  # pylint: disable=too-few-public-methods
+            _attribute_map = {'display_name': {'key': 'properties.displayName', 'type': 'str'}}
+
+            def __init__(self, **kwargs):
+                self._private = 'hidden'
+                self.display_name = kwargs.get('display_name')
+                self.color = kwargs.get('color')
+                self.child_items = kwargs.get('child_items')
+                self.callback = lambda: None
+
+        the_input = Model(display_name='x', color=Color.red,
+                          child_items=[Model(display_name='y', child_items=[])])
+        # attributes not in the attribute map (e.g. set by custom commands) are still returned
+        the_input.power_state = 'running'
+        actual = todict(the_input)
+        expected = {'displayName': 'x', 'color': 'Red', 'powerState': 'running',
+                    'childItems': [{'displayName': 'y', 'color': None, 'childItems': []}]}
+        self.assertEqual(actual, expected)
+        # the key mapping is cached per class
+        self.assertEqual(todict(Model(display_name='z')),
+                         {'displayName': 'z', 'color': None, 'childItems': None})
+
     def test_load_json_from_file(self):
         _, pathname = tempfile.mkstemp()
 
@@ -141,6 +174,21 @@ class TestUtils(unittest.TestCase):
             len(failed_strings), 0,
             'The following patterns failed: {}'.format(failed_strings))
 
+    def test_write_file_atomically(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        file_path = os.path.join(temp_dir, 'file.json')
+        write_file_atomically(file_path, '{"a": 1}')
+        write_file_atomically(file_path, u'{"a": "\u00e9"}', mode=0o600)
+        self.assertEqual(get_file_json(file_path), {'a': u'\u00e9'})
+        self.assertEqual(os.listdir(temp_dir), ['file.json'])
+
+        # a failed write leaves the previous content and no temporary file behind
+        with mock.patch('os.replace', side_effect=OSError), self.assertRaises(OSError):
+            write_file_atomically(file_path, '{"a": 2}')
+        self.assertEqual(get_file_json(file_path), {'a': u'\u00e9'})
+        self.assertEqual(os.listdir(temp_dir), ['file.json'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,7 +8,7 @@ import sys
 
 from azure.cli.core.application import APPLICATION, Configuration
 import azure.cli.core.azlogging as azlogging
-from azure.cli.core._session import ACCOUNT, CONFIG, SESSION
+from azure.cli.core._session import ACCOUNT, CONFIG, SESSION, COMMAND_INDEX, PROVIDER_CACHE
 from azure.cli.core.util import (show_version_info_exit, handle_exception)
 from azure.cli.core._environment import get_config_dir
 import azure.cli.core.telemetry as telemetry
@@ -16,6 +16,14 @@ import azure.cli.core.telemetry as telemetry
 logger = azlogging.get_az_logger(__name__)
 
 
+def _load_cache(cache, file_path):
+    # a cache which can't be read or created must not fail the command
+    try:
+        cache.load(file_path)
+    except (OSError, IOError) as ex:
+        logger.debug("Unable to load '%s': %s", file_path, ex)
+
+
 def main(args, file=sys.stdout):  # pylint: disable=redefined-builtin
     azlogging.configure_logging(args)
     logger.debug('Command arguments %s', args)
@@ -29,6 +37,8 @@ def main(args, file=sys.stdout):  # pylint: disable=redefined-builtin
     ACCOUNT.load(os.path.join(azure_folder, 'azureProfile.json'))
     CONFIG.load(os.path.join(azure_folder, 'az.json'))
     SESSION.load(os.path.join(azure_folder, 'az.sess'), max_age=3600)
+    _load_cache(COMMAND_INDEX, os.path.join(azure_folder, 'commandIndex.json'))
+    _load_cache(PROVIDER_CACHE, os.path.join(azure_folder, 'providerCache.json'))
 
     APPLICATION.initialize(Configuration())
 
@@ -42,6 +52,8 @@ def main(args, file=sys.stdout):  # pylint: disable=redefined-builtin
             formatter = OutputProducer.get_formatter(APPLICATION.configuration.output_format)
             OutputProducer(formatter=formatter, file=file).out(cmd_result)
 
+        return cmd_result.exit_code if cmd_result else None
+
     except Exception as ex:  # pylint: disable=broad-except
 
         # TODO: include additional details of the exception in telemetry
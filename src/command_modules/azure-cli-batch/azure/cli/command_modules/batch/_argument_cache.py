@@ -0,0 +1,146 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import sys
+from codecs import open as codecs_open
+from importlib import import_module
+
+from six import string_types
+
+import azure.cli.core.azlogging as azlogging
+from azure.cli.core._config import az_config
+from azure.cli.core._environment import get_config_dir
+from azure.cli.core.util import write_file_atomically
+
+logger = azlogging.get_az_logger(__name__)
+
+# Bump this whenever the layout of the cache or the arguments built for a command change
+ARGUMENT_CACHE_VERSION = 1
+
+ARGUMENT_CACHE_DIR = 'batchArguments'
+
+_REF = '$ref'
+_INSTANCE = '$instance'
+_BOUND = '$bound'
+
+
+class UncacheableValueError(ValueError):
+    """A value of an argument can't be persisted in the cache"""
+    pass
+
+
+def is_argument_cache_enabled():
+    return az_config.getboolean('batch', 'use_argument_cache', fallback=True)
+
+
+def _get_signature():
+    """The cached arguments are only valid for the versions of the SDK and the command module
+    they were built from."""
+    import pkg_resources
+    signature = {}
+    for package in ['azure-batch', 'azure-cli-batch']:
+        try:
+            signature[package] = pkg_resources.get_distribution(package).version
+        except pkg_resources.DistributionNotFound:
+            signature[package] = None
+    return signature
+
+
+def _get_cache_path(command_name):
+    return os.path.join(get_config_dir(), ARGUMENT_CACHE_DIR,
+                        '{}.json'.format('_'.join(command_name.split())))
+
+
+def _get_callable_ref(func):
+    """Returns a 'module#name' reference for module level functions and classes, None
+    otherwise."""
+    module_name = getattr(func, '__module__', None)
+    func_name = getattr(func, '__name__', None)
+    if not module_name or not func_name:
+        return None
+    if getattr(sys.modules.get(module_name), func_name, None) is not func:
+        return None
+    return '{}#{}'.format(module_name, func_name)
+
+
+def _resolve_callable_ref(ref):
+    module_name, func_name = ref.split('#')
+    return getattr(import_module(module_name), func_name)
+
+
+def encode_value(value, bound=None):
+    """Convert an argument setting to JSON. Functions and classes are stored as references to
+    where they are defined, instances as references to their class when they can be created again
+    without arguments and the methods in 'bound' by their name.
+    :raises: UncacheableValueError if the value can't be stored.
+    """
+    if value is None or isinstance(value, string_types + (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v, bound) for v in value]
+    if isinstance(value, dict):
+        if any(not isinstance(k, string_types) or k.startswith('$') for k in value):
+            raise UncacheableValueError("Unsupported keys in {}".format(value))
+        return {k: encode_value(v, bound) for k, v in value.items()}
+    for name, method in (bound or {}).items():
+        if value == method:
+            return {_BOUND: name}
+    ref = _get_callable_ref(value)
+    if ref:
+        return {_REF: ref}
+    ref = _get_callable_ref(type(value))
+    try:
+        if ref and vars(value) == vars(type(value)()):
+            return {_INSTANCE: ref}
+    except TypeError:
+        pass
+    raise UncacheableValueError("Unsupported value {!r}".format(value))
+
+
+def decode_value(value, bound=None):
+    """Revert encode_value."""
+    if isinstance(value, list):
+        return [decode_value(v, bound) for v in value]
+    if isinstance(value, dict):
+        if _REF in value:
+            return _resolve_callable_ref(value[_REF])
+        if _INSTANCE in value:
+            return _resolve_callable_ref(value[_INSTANCE])()
+        if _BOUND in value:
+            return bound[value[_BOUND]]
+        return {k: decode_value(v, bound) for k, v in value.items()}
+    return value
+
+
+def load_cache_entry(command_name, key):
+    """Returns the cached entry of a command, or None if there is no entry or it is out of date.
+    :param str command_name: The name of the command.
+    :param key: The configuration of the command the entry must have been built for.
+    """
+    try:
+        with codecs_open(_get_cache_path(command_name), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, IOError, ValueError):
+        return None
+    if entry.get('version') != ARGUMENT_CACHE_VERSION or entry.get('key') != key or \
+            entry.get('signature') != _get_signature():
+        logger.debug("Cached arguments of '%s' are out of date.", command_name)
+        return None
+    return entry
+
+
+def save_cache_entry(command_name, key, entry):
+    """Persist the entry of a command, overwriting any previous entry."""
+    path = _get_cache_path(command_name)
+    data = dict(entry, version=ARGUMENT_CACHE_VERSION, key=key, signature=_get_signature())
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        # concurrent invocations must not read a partial entry
+        write_file_atomically(path, json.dumps(data, separators=(',', ':')))
+    except (OSError, IOError) as ex:
+        logger.debug("Unable to cache the arguments of '%s': %s", command_name, ex)
@@ -13,6 +13,7 @@ from six.moves.urllib.parse import urlsplit  # pylint: disable=import-error
 
 from azure.cli.command_modules.batch import _validators as validators
 from azure.cli.command_modules.batch import _format as transformers
+from azure.cli.command_modules.batch import _argument_cache as argument_cache
 from azure.cli.core.commands import (
     CONFIRM_PARAM_NAME,
     command_table,
@@ -23,6 +24,9 @@ from azure.cli.core.commands import (
 from azure.cli.core.commands._introspection import (
     extract_full_summary_from_signature,
     extract_args_from_signature)
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
 
 
 _CLASS_NAME = re.compile(r"<(.*?)>")  # Strip model name from class docstring
@@ -352,6 +356,17 @@ class BatchArgumentTree(object):
             if kwargs[self._request_param['name']] is None:
                 raise ValueError(message.format(self._request_param['model']))
 
+    def get_state(self):
+        """The pending arguments and request parameter, to be cached."""
+        return {'arg_tree': self._arg_tree, 'request_param': self._request_param}
+
+    def set_state(self, state):
+        """Restore the pending arguments and request parameter from the cache.
+        :param dict state: The state returned by get_state.
+        """
+        self._arg_tree = state['arg_tree']
+        self._request_param = state['request_param']
+
     def queue_argument(self, name=None, path=None, root=None,  # pylint:disable=too-many-arguments
                        options=None, type=None, dependencies=None):  # pylint: disable=redefined-builtin
         """Add pending command line argument
@@ -506,6 +521,12 @@ class AzureBatchDataPlaneCommand(object):
         self._options_attrs = []
         # The loaded options model to populate for the request
         self._options_model = None
+        # The name of the options model class, loaded on first use
+        self._options_model_name = None
+        # The command configuration the cached arguments must have been built for
+        self._cache_name = ' '.join(name.split())
+        self._cache_key = [operation, flatten, self.ignore, self.silent]
+        self._cache_entry = None
 
         def _execute_command(kwargs):
             from msrest.paging import Paged
@@ -593,10 +614,8 @@ class AzureBatchDataPlaneCommand(object):
             ' '.join(name.split()),
             _execute_command,
             table_transformer=table_transformer,
-            arguments_loader=lambda: self._load_transformed_arguments(
-                get_op_handler(operation)),
-            description_loader=lambda: extract_full_summary_from_signature(
-                get_op_handler(operation))
+            arguments_loader=lambda: self._load_arguments(operation),
+            description_loader=lambda: self._load_description(operation)
         )
 
     def _cancel_operation(self, kwargs, config, user):
@@ -632,6 +651,8 @@ class AzureBatchDataPlaneCommand(object):
         """Build request options model from command line arguments.
         :param dict kwargs: The request arguments being built.
         """
+        if self._options_model is None:
+            self._options_model = _load_model(self._options_model_name)()
         kwargs[self._options_param] = self._options_model
         for param in self._options_attrs:
             if param in IGNORE_OPTIONS:
@@ -646,8 +667,8 @@ class AzureBatchDataPlaneCommand(object):
         :param func func_obj: The request function.
         """
         option_type = find_param_type(func_obj, self._options_param)
-        option_type = class_name(option_type)
-        self._options_model = _load_model(option_type)()
+        self._options_model_name = class_name(option_type)
+        self._options_model = _load_model(self._options_model_name)()
         self._options_attrs = list(self._options_model.__dict__.keys())
 
     def _should_flatten(self, param):
@@ -741,8 +762,7 @@ class AzureBatchDataPlaneCommand(object):
                 options['required'] = False
                 options['arg_group'] = group_title(path)
                 options['help'] = find_param_help(param_model, param_attr)
-                options['validator'] = \
-                    lambda ns: validators.validate_required_parameter(ns, self.parser)
+                options['validator'] = self._validate_required_parameter
                 options['default'] = None  # Extract details from signature
 
                 if details['type'] in BASIC_TYPES:
@@ -782,6 +802,98 @@ class AzureBatchDataPlaneCommand(object):
                     else:
                         self._flatten_object('.'.join([path, param_attr]), attr_model)
 
+    def _validate_required_parameter(self, namespace):
+        """Validate the required parameters of the complex request objects."""
+        validators.validate_required_parameter(namespace, self.parser)
+
+    def _get_cache_entry(self):
+        """Load the cached arguments and description of the command.
+        :returns: dict or None
+        """
+        if self._cache_entry is None and argument_cache.is_argument_cache_enabled():
+            self._cache_entry = argument_cache.load_cache_entry(
+                self._cache_name, self._cache_key) or {}
+        return self._cache_entry
+
+    def _update_cache_entry(self, **values):
+        """Add values to the cached entry of the command."""
+        entry = self._get_cache_entry()
+        if entry is None:
+            return
+        entry.update(values)
+        argument_cache.save_cache_entry(self._cache_name, self._cache_key, entry)
+
+    def _load_description(self, operation):
+        """Load the command description from the cache, or from the operation docstring.
+        :param str operation: The operation function path.
+        """
+        entry = self._get_cache_entry()
+        if entry and 'description' in entry:
+            return entry['description']
+        description = extract_full_summary_from_signature(get_op_handler(operation))
+        self._update_cache_entry(description=description)
+        return description
+
+    def _load_arguments(self, operation):
+        """Load the command line arguments from the cache, or from the request parameters.
+        Building the arguments imports and inspects the SDK models, which is slow, so
+        the result is cached for the installed SDK version.
+        :param str operation: The operation function path.
+        """
+        entry = self._get_cache_entry()
+        if entry and 'arguments' in entry:
+            try:
+                return self._restore_arguments(entry)
+            except (ImportError, AttributeError, KeyError, TypeError) as ex:
+                logger.debug("Unable to restore the cached arguments of '%s': %s",
+                             self._cache_name, ex)
+        arguments = list(self._load_transformed_arguments(get_op_handler(operation)))
+        if entry is not None:
+            try:
+                self._cache_arguments(arguments)
+            except argument_cache.UncacheableValueError as ex:
+                logger.debug("Unable to cache the arguments of '%s': %s", self._cache_name, ex)
+        return arguments
+
+    def _cache_arguments(self, arguments):
+        """Store the loaded arguments and the state of the argument tree.
+        :param list arguments: The loaded (name, CliCommandArgument) pairs.
+        """
+        bound = {'validate_required_parameter': self._validate_required_parameter}
+        state = self.parser.get_state()
+        # the options of the tree arguments are the same as the settings of the arguments
+        arg_tree = {name: {k: v for k, v in details.items() if k != 'options'}
+                    for name, details in state['arg_tree'].items()}
+        self._update_cache_entry(
+            arguments=[[name, argument_cache.encode_value(arg.type.settings, bound)]
+                       for name, arg in arguments],
+            arg_tree=arg_tree,
+            request_param=state['request_param'],
+            options_model=self._options_model_name,
+            options_attrs=self._options_attrs,
+            head_cmd=self.head_cmd)
+
+    def _restore_arguments(self, entry):
+        """Restore the arguments and the state of the argument tree without loading the SDK.
+        :param dict entry: The cached entry of the command.
+        :returns: list of (name, CliCommandArgument) pairs.
+        """
+        bound = {'validate_required_parameter': self._validate_required_parameter}
+        arguments = [(name, CliCommandArgument(**argument_cache.decode_value(settings, bound)))
+                     for name, settings in entry['arguments']]
+        arg_tree = {}
+        for name, arg in arguments:
+            if name in entry['arg_tree']:
+                options = {k: v for k, v in arg.type.settings.items() if k != 'dest'}
+                arg_tree[name] = dict(entry['arg_tree'][name], options=options)
+        self.parser = BatchArgumentTree(self.validator, self.silent)
+        self.parser.set_state({'arg_tree': arg_tree, 'request_param': entry['request_param']})
+        self._options_model = None
+        self._options_model_name = entry['options_model']
+        self._options_attrs = entry['options_attrs']
+        self.head_cmd = entry['head_cmd']
+        return arguments
+
     def _load_transformed_arguments(self, handler):
         """Load all the command line arguments from the request parameters.
         :param func handler: The operation function.
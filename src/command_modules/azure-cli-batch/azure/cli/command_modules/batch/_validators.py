@@ -202,6 +202,22 @@ def validate_json_file(namespace):
             raise ValueError("Invalid JSON file: {}".format(err))
 
 
+def validate_task_json_file(namespace):
+    """Validate the given json file of tasks exists. A JSON array of tasks is parsed while the
+    tasks are submitted, so it isn't loaded here"""
+    if namespace.json_file:
+        try:
+            with open(namespace.json_file) as file_handle:
+                first = file_handle.read(1)
+                while first.isspace():
+                    first = file_handle.read(1)
+        except EnvironmentError:
+            raise ValueError("Cannot access JSON request file: " + namespace.json_file)
+        if first == '[':
+            return
+        validate_json_file(namespace)
+
+
 def validate_cert_file(namespace):
     """Validate the give cert file existing"""
     try:
@@ -289,6 +289,187 @@ def list_job(client, job_schedule_id=None, filter=None, select=None, expand=None
     return _handle_batch_exception(action)
 
 
+# The service accepts up to 100 tasks in a single add collection request
+MAX_TASKS_PER_REQUEST = 100
+MAX_TASK_SUBMISSION_WORKERS = 8
+MAX_TASK_SUBMISSION_ATTEMPTS = 5
+_RETRYABLE_STATUS_CODES = [408, 429, 500, 502, 503, 504]
+
+
+class _JsonArrayReader(object):  # pylint: disable=too-few-public-methods
+    """ Reads the items of a JSON array from a file one at a time, so large files don't need to
+    be loaded in memory. """
+
+    def __init__(self, file_handle, buffer_size=64 * 1024):
+        self._file = file_handle
+        self._buffer_size = buffer_size
+        self._buffer = ''
+        self._pos = 0
+        self._decoder = json.JSONDecoder()
+
+    def _peek(self):
+        """ Returns the next character which isn't whitespace, or '' at the end of the file. """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            data = self._file.read(self._buffer_size)
+            if not data:
+                return ''
+            self._buffer, self._pos = data, 0
+
+    def _decode(self):
+        while True:
+            try:
+                value, self._pos = self._decoder.raw_decode(self._buffer, self._pos)
+                return value
+            except ValueError:
+                # the item may continue in the next block of the file
+                data = self._file.read(self._buffer_size)
+                if not data:
+                    raise
+                self._buffer, self._pos = self._buffer[self._pos:] + data, 0
+
+    def __iter__(self):
+        if self._peek() != '[':
+            raise ValueError('Expected a JSON array')
+        self._pos += 1
+        if self._peek() == ']':
+            return
+        while True:
+            self._peek()
+            yield self._decode()
+            char = self._peek()
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("Expected ',' or ']' after an item of the JSON array")
+            self._pos += 1
+
+
+def _iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _failed_task_results(tasks, ex):
+    from azure.batch.models import TaskAddResult, TaskAddStatus, BatchError, ErrorMessage
+    error = getattr(ex, 'error', None)
+    if not isinstance(error, BatchError):
+        error = BatchError(code=type(ex).__name__, message=ErrorMessage(value=str(ex)))
+    return [TaskAddResult(TaskAddStatus.server_error, t.id, error=error) for t in tasks]
+
+
+def _add_task_chunk(client, job_id, tasks, retry_delay=1.0):
+    """ Adds a chunk of tasks with a single request. Throttled and failed requests are retried,
+    then only the tasks which failed with a server error are submitted again. A request which
+    is too large is split in two. Returns a result for every task. """
+    import time
+    from azure.batch.models import TaskAddStatus
+    results = {}
+    pending = tasks
+    for attempt in range(MAX_TASK_SUBMISSION_ATTEMPTS):
+        if attempt:
+            time.sleep(retry_delay * 2 ** (attempt - 1))
+        try:
+            response = client.add_collection(job_id=job_id, value=pending)
+        except BatchErrorException as ex:
+            status_code = getattr(ex.response, 'status_code', None)
+            if status_code == 413 and len(pending) > 1:
+                half = len(pending) // 2
+                for part in [pending[:half], pending[half:]]:
+                    results.update((r.task_id, r) for r in
+                                   _add_task_chunk(client, job_id, part, retry_delay))
+                break
+            if status_code not in _RETRYABLE_STATUS_CODES or \
+                    attempt == MAX_TASK_SUBMISSION_ATTEMPTS - 1:
+                results.update((r.task_id, r) for r in _failed_task_results(pending, ex))
+                break
+            logger.info('Adding %d tasks failed with status %s, retrying.', len(pending),
+                        status_code)
+            continue
+        except ClientRequestError as ex:
+            if attempt == MAX_TASK_SUBMISSION_ATTEMPTS - 1:
+                results.update((r.task_id, r) for r in _failed_task_results(pending, ex))
+                break
+            continue
+        results.update((r.task_id, r) for r in response.value)
+        failed_ids = {r.task_id for r in response.value if r.status == TaskAddStatus.server_error}
+        if not failed_ids:
+            break
+        pending = [t for t in pending if t.id in failed_ids]
+    return [results[t.id] for t in tasks if t.id in results]
+
+
+def _add_tasks(client, job_id, tasks, max_workers=MAX_TASK_SUBMISSION_WORKERS,
+               retry_delay=1.0):
+    """ Adds any number of tasks, in chunks of the size accepted by the service, submitted
+    concurrently. Only a few chunks are read ahead, so the tasks can be streamed from a file. """
+    import time
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    from azure.batch.models import TaskAddStatus
+    start = time.time()
+    results = {}
+    pending = {}
+
+    def _collect(futures):
+        for future in futures:
+            results[pending.pop(future)] = future.result()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, chunk in enumerate(_iter_chunks(tasks, MAX_TASKS_PER_REQUEST)):
+            if len(pending) >= max_workers * 2:
+                _collect(wait(pending, return_when=FIRST_COMPLETED)[0])
+            pending[executor.submit(_add_task_chunk, client, job_id, chunk, retry_delay)] = index
+        _collect(list(pending))
+
+    submitted = [r for index in sorted(results) for r in results[index]]
+    elapsed = max(time.time() - start, 0.001)
+    failed = len([r for r in submitted if r.status != TaskAddStatus.success])
+    logger.warning('Submitted %d tasks in %.1f seconds (%.0f tasks/s), %d failed.',
+                   len(submitted), elapsed, len(submitted) / elapsed, failed)
+    return submitted
+
+
+def _load_tasks(client, json_file):
+    """ Returns the single task of a JSON file, or a generator over the tasks of a JSON array.
+    The array is validated in a first pass, so a malformed file fails before any task is added,
+    then read again while its tasks are submitted. """
+    with open(json_file) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first != '[':
+            f.seek(0)
+            try:
+                return client._deserialize('TaskAddParameter', json.load(f))  # pylint: disable=protected-access
+            except DeserializationError:
+                raise ValueError("JSON file '{}' is not in reqired format.".format(json_file))
+
+    def _iter_tasks():
+        with open(json_file) as f:
+            for index, json_obj in enumerate(_JsonArrayReader(f)):
+                try:
+                    yield client._deserialize('TaskAddParameter', json_obj)  # pylint: disable=protected-access
+                except DeserializationError:
+                    raise ValueError("Task #{} of JSON file '{}' is not in reqired format."
+                                     .format(index + 1, json_file))
+
+    try:
+        for _ in _iter_tasks():
+            pass
+    except ValueError as ex:
+        raise ValueError("JSON file '{}' is not in reqired format: {}".format(json_file, ex))
+    return _iter_tasks()
+
+
 @transfer_doc(TaskAddParameter, TaskConstraints)
 def create_task(client, job_id, json_file=None, task_id=None, command_line=None,  # pylint:disable=too-many-arguments
                 resource_files=None, environment_settings=None, affinity_info=None,
@@ -299,20 +480,13 @@ def create_task(client, job_id, json_file=None, task_id=None, command_line=None,
             client.add(job_id=job_id, task=task)
             return client.get(job_id=job_id, task_id=task.id)
         else:
-            result = client.add_collection(job_id=job_id, value=tasks)
-            return result.value
+            return _add_tasks(client, job_id, tasks)
 
     task = None
     if json_file:
-        with open(json_file) as f:
-            json_obj = json.load(f)
-            try:
-                task = client._deserialize('TaskAddParameter', json_obj)  # pylint: disable=protected-access
-            except DeserializationError:
-                try:
-                    tasks = client._deserialize('[TaskAddParameter]', json_obj)  # pylint: disable=protected-access
-                except DeserializationError:
-                    raise ValueError("JSON file '{}' is not in reqired format.".format(json_file))
+        tasks = _load_tasks(client, json_file)
+        if isinstance(tasks, TaskAddParameter):
+            task = tasks
     else:
         if command_line is None or task_id is None:
             raise ValueError("Missing required arguments.\nEither --json-file, "
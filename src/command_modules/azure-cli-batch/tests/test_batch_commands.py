@@ -4,6 +4,8 @@
 # --------------------------------------------------------------------------------------------
 
 import os
+import shutil
+import tempfile
 import unittest
 import datetime
 import isodate
@@ -628,6 +630,65 @@ class TestBatchLoader(unittest.TestCase):
         self.assertTrue('json_file' in [a for a, _ in args])
         self.assertFalse('destination' in [a for a, _ in args])
 
+    @mock.patch.object(_command_type, 'get_op_handler', wraps=_command_type.get_op_handler)
+    def test_batch_argument_cache(self, get_op_handler):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        patcher = mock.patch.dict(os.environ, {'AZURE_CONFIG_DIR': config_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        operation = 'azure.batch.operations.pool_operations#PoolOperations.add'
+
+        def create_command():
+            return _command_type.AzureBatchDataPlaneCommand(
+                'batch_unit_tests', 'batch tests pool', operation,
+                None, None, 3, None, None, ['pool.start_task'])
+
+        loaded = create_command()
+        expected = loaded._load_arguments(operation)
+        description = loaded._load_description(operation)
+        self.assertEqual(get_op_handler.call_count, 2)
+        self.assertTrue(os.path.isfile(os.path.join(config_dir, 'batchArguments',
+                                                    'batch_tests_pool.json')))
+
+        cached = create_command()
+        args = cached._load_arguments(operation)
+        self.assertEqual(cached._load_description(operation), description)
+        self.assertEqual(get_op_handler.call_count, 2)
+
+        self.assertEqual([a for a, _ in args], [a for a, _ in expected])
+        for (_, arg), (_, expected_arg) in zip(args, expected):
+            settings = dict(arg.type.settings)
+            expected_settings = dict(expected_arg.type.settings)
+            if expected_settings.get('validator') == loaded._validate_required_parameter:
+                self.assertEqual(settings.pop('validator'), cached._validate_required_parameter)
+                expected_settings.pop('validator')
+            if 'completer' in expected_settings:
+                self.assertIsInstance(settings.pop('completer'),
+                                      type(expected_settings.pop('completer')))
+            self.assertEqual(settings, expected_settings)
+        state, expected_state = cached.parser.get_state(), loaded.parser.get_state()
+        self.assertEqual(state['request_param'], expected_state['request_param'])
+        self.assertEqual(sorted(state['arg_tree']), sorted(expected_state['arg_tree']))
+        for name, details in state['arg_tree'].items():
+            self.assertEqual(details['options']['options_list'],
+                             expected_state['arg_tree'][name]['options']['options_list'])
+            self.assertEqual(details['dependencies'],
+                             expected_state['arg_tree'][name]['dependencies'])
+        self.assertEqual(cached._options_attrs, loaded._options_attrs)
+        self.assertIsNone(cached._options_model)
+
+        kwargs = {a: None for a in cached._options_attrs}
+        cached._build_options(kwargs)
+        self.assertIsInstance(kwargs['pool_add_options'], models.PoolAddOptions)
+
+        # the cache is ignored when the command is configured differently
+        changed = _command_type.AzureBatchDataPlaneCommand(
+            'batch_unit_tests', 'batch tests pool', operation, None, None, 2, None, None, None)
+        changed._load_arguments(operation)
+        self.assertEqual(get_op_handler.call_count, 3)
+
     def test_batch_execute_command(self):
         def function_result(client, **kwargs):
             # pylint: disable=function-redefined,unused-argument
@@ -0,0 +1,157 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import mock
+from six import StringIO
+
+from azure.batch import models
+from azure.batch.models import BatchErrorException
+
+from azure.cli.command_modules.batch import custom
+from azure.cli.command_modules.batch.custom import _JsonArrayReader, _add_tasks, create_task
+
+
+def _batch_error(status_code):
+    response = mock.MagicMock(status_code=status_code)
+    error = BatchErrorException.__new__(BatchErrorException)
+    error.response = response
+    error.error = models.BatchError(code='Status{}'.format(status_code))
+    return error
+
+
+class FakeTaskClient(object):
+    """ Accepts at most 100 tasks per request, like the service. """
+
+    def __init__(self, server_errors=None, failing_requests=None, max_request_size=None):
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server_errors = dict(server_errors or {})
+        self._failing_requests = list(failing_requests or [])
+        self._max_request_size = max_request_size
+
+    def add_collection(self, job_id, value):
+        assert job_id == 'job'
+        assert len(value) <= 100
+        with self._lock:
+            self.requests.append([t.id for t in value])
+            if self._failing_requests:
+                raise _batch_error(self._failing_requests.pop(0))
+            if self._max_request_size and len(value) > self._max_request_size:
+                raise _batch_error(413)
+            results = []
+            for task in value:
+                status = models.TaskAddStatus.success
+                if self._server_errors.get(task.id):
+                    self._server_errors[task.id] -= 1
+                    status = models.TaskAddStatus.server_error
+                elif task.id.startswith('invalid'):
+                    status = models.TaskAddStatus.client_error
+                results.append(models.TaskAddResult(status, task.id))
+        return models.TaskAddCollectionResult(value=results)
+
+    @staticmethod
+    def _deserialize(target, data):
+        from msrest.serialization import Deserializer
+        return Deserializer({k: v for k, v in models.__dict__.items()
+                             if isinstance(v, type)})(target, data)
+
+
+def _tasks(count, prefix='task'):
+    return [models.TaskAddParameter('{}{}'.format(prefix, i), 'echo') for i in range(count)]
+
+
+class TestBatchTaskCreate(unittest.TestCase):
+
+    def test_batch_json_array_reader(self):
+        items = [{'id': 'task{}'.format(i), 'commandLine': 'echo "[{}]," ' * 5}
+                 for i in range(50)]
+        text = '  [\n' + ',\n '.join(json.dumps(i) for i in items) + '\n]  '
+        reader = _JsonArrayReader(StringIO(text), buffer_size=16)
+        self.assertEqual(list(reader), items)
+        self.assertEqual(list(_JsonArrayReader(StringIO(' [ ] '))), [])
+        with self.assertRaises(ValueError):
+            list(_JsonArrayReader(StringIO('[{"id": 1} {"id": 2}]')))
+        with self.assertRaises(ValueError):
+            list(_JsonArrayReader(StringIO('[{"id": 1}, {"id": ')))
+
+    def test_batch_add_tasks_in_chunks(self):
+        client = FakeTaskClient(server_errors={'task5': 1, 'task150': 2, 'task260': 10},
+                                failing_requests=[503])
+        tasks = _tasks(250) + _tasks(1, 'invalid')
+        results = _add_tasks(client, 'job', iter(tasks), max_workers=4, retry_delay=0)
+
+        self.assertEqual([r.task_id for r in results], [t.id for t in tasks])
+        failed = {r.task_id: r.status for r in results
+                  if r.status != models.TaskAddStatus.success}
+        self.assertEqual(failed, {'invalid0': models.TaskAddStatus.client_error})
+        # only the tasks which failed with a server error are submitted again
+        retries = [r for r in client.requests if len(r) == 1]
+        self.assertEqual(sorted(retries), [['task150'], ['task150'], ['task5']])
+        self.assertEqual(len(client.requests), 3 + 1 + 3)
+
+        client = FakeTaskClient(server_errors={'task1': 10})
+        results = _add_tasks(client, 'job', _tasks(2), retry_delay=0)
+        self.assertEqual([r.status for r in results],
+                         [models.TaskAddStatus.success, models.TaskAddStatus.server_error])
+        self.assertEqual(len(client.requests), custom.MAX_TASK_SUBMISSION_ATTEMPTS)
+
+    def test_batch_add_tasks_failures(self):
+        # a request which is too large is split
+        client = FakeTaskClient(max_request_size=30)
+        results = _add_tasks(client, 'job', _tasks(100), retry_delay=0)
+        self.assertTrue(all(r.status == models.TaskAddStatus.success for r in results))
+        self.assertEqual([len(r) for r in client.requests], [100, 50, 25, 25, 50, 25, 25])
+
+        # a request which can't be retried fails its tasks, the other chunks are submitted
+        client = FakeTaskClient(failing_requests=[403])
+        results = _add_tasks(client, 'job', _tasks(150), max_workers=1, retry_delay=0)
+        self.assertEqual(len(results), 150)
+        self.assertEqual(set(r.status for r in results[:100]),
+                         {models.TaskAddStatus.server_error})
+        self.assertEqual(results[0].error.code, 'Status403')
+        self.assertEqual(set(r.status for r in results[100:]), {models.TaskAddStatus.success})
+
+    @mock.patch('azure.cli.command_modules.batch.custom._add_tasks', wraps=_add_tasks)
+    def test_batch_create_task_from_json_array(self, add_tasks_mock):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        json_file = os.path.join(temp_dir, 'tasks.json')
+        with open(json_file, 'w') as f:
+            json.dump([{'id': 'task{}'.format(i), 'commandLine': 'echo'} for i in range(120)], f)
+
+        client = FakeTaskClient()
+        results = create_task(client, 'job', json_file=json_file)
+        self.assertEqual(len(results), 120)
+        self.assertEqual([len(r) for r in client.requests], [100, 20])
+        # the tasks are read while they are submitted
+        self.assertNotIsInstance(add_tasks_mock.call_args[0][2], list)
+
+    def test_batch_create_task_from_malformed_json_array(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        json_file = os.path.join(temp_dir, 'tasks.json')
+        tasks = [{'id': 'task{}'.format(i), 'commandLine': 'echo'} for i in range(150)]
+        invalid_task = {'id': 'invalid', 'commandLine': 'echo',
+                        'constraints': {'maxTaskRetryCount': 'x'}}
+        for content in [json.dumps(tasks)[:-20], json.dumps(tasks[:120] + [invalid_task])]:
+            with open(json_file, 'w') as f:
+                f.write(content)
+
+            # nothing is submitted, rather than the tasks before the error
+            client = FakeTaskClient()
+            with self.assertRaises(ValueError):
+                create_task(client, 'job', json_file=json_file)
+            self.assertEqual(client.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
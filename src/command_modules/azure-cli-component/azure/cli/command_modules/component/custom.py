@@ -2,6 +2,7 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
+import os
 import site
 import logging
 from six import StringIO
@@ -107,6 +108,24 @@ def _run_pip(pip, pip_exec_args):
                            'If executing az with sudo, you may want sudo\'s -E and -H flags.')
         raise CLIError('An error occurred. Run command with --debug for more information.\n'
                        'If executing az with sudo, you may want sudo\'s -E and -H flags.')
+    # after a failed run the index signature still detects any modules that did change
+    _rebuild_command_index()
+
+
+def _rebuild_command_index():
+    """ The installed command modules have changed so rebuild the command index in a new process
+    (this process still has the old modules loaded). """
+    import subprocess
+    import sys
+    from azure.cli.core.commands._command_index import invalidate_command_index
+    invalidate_command_index()
+    logger.debug('Rebuilding the command index.')
+    try:
+        with open(os.devnull, 'w') as devnull:
+            subprocess.call([sys.executable, '-m', 'azure.cli', '--help'],
+                            stdout=devnull, stderr=devnull)
+    except OSError as ex:
+        logger.debug('Unable to rebuild the command index: %s', ex)
 
 
 def _installed_in_user():
@@ -0,0 +1,153 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import threading
+import time
+
+from six.moves.urllib.parse import urlparse  # pylint: disable=import-error
+
+from azure.keyvault import HttpBearerChallenge, HttpBearerChallengeCache
+from azure.keyvault.key_vault_authentication import KeyVaultAuthBase, KeyVaultAuthentication
+
+from azure.cli.core._config import az_config
+from azure.cli.core._environment import get_config_dir
+from azure.cli.core._session import Session
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+DEFAULT_CHALLENGE_CACHE_TTL = 24 * 60 * 60
+
+_CHALLENGE_PARAMETERS = ['authorization', 'authorization_uri', 'resource', 'scope']
+
+# The challenge cache maps vault hosts to the parameters of the authentication challenge they
+# answered with, so later commands don't have to send an unauthenticated request first
+_CHALLENGE_CACHE = Session(ignore_corrupt_file=True)
+_CHALLENGE_CACHE_LOCK = threading.Lock()
+
+
+def _get_challenge_cache_ttl():
+    return az_config.getint('keyvault', 'challenge_cache_ttl',
+                            fallback=DEFAULT_CHALLENGE_CACHE_TTL)
+
+
+def _load_challenge_cache():
+    # the session is replaced atomically on save and a corrupt file is loaded as an empty cache
+    if not _CHALLENGE_CACHE.filename:
+        try:
+            _CHALLENGE_CACHE.load(os.path.join(get_config_dir(), 'keyVaultChallenges.json'))
+        except (OSError, IOError) as ex:
+            logger.debug('Unable to load the Key Vault challenge cache: %s', ex)
+
+
+def _save_challenge_cache():
+    try:
+        _CHALLENGE_CACHE.save_with_retry()
+    except (OSError, IOError) as ex:
+        logger.debug('Unable to save the Key Vault challenge cache: %s', ex)
+
+
+def get_cached_challenge(url):
+    """ Returns the challenge a previous command received from the host of the URL, or None. """
+    ttl = _get_challenge_cache_ttl()
+    if ttl <= 0:
+        return None
+    with _CHALLENGE_CACHE_LOCK:
+        _load_challenge_cache()
+        entry = _CHALLENGE_CACHE.get(urlparse(url).netloc.lower())
+    if not entry or entry['timestamp'] + ttl < time.time():
+        return None
+    header = 'Bearer ' + ', '.join('{}="{}"'.format(k, v)
+                                   for k, v in sorted(entry['parameters'].items()))
+    try:
+        return HttpBearerChallenge(url, header)
+    except ValueError:
+        return None
+
+
+def cache_challenge(url, challenge):
+    if _get_challenge_cache_ttl() <= 0:
+        return
+    parameters = {k: challenge.get_value(k) for k in _CHALLENGE_PARAMETERS
+                  if challenge.get_value(k)}
+    with _CHALLENGE_CACHE_LOCK:
+        _load_challenge_cache()
+        _CHALLENGE_CACHE.data[urlparse(url).netloc.lower()] = {'timestamp': time.time(),
+                                                               'parameters': parameters}
+        _save_challenge_cache()
+
+
+def remove_cached_challenge(url):
+    with _CHALLENGE_CACHE_LOCK:
+        _load_challenge_cache()
+        if _CHALLENGE_CACHE.data.pop(urlparse(url).netloc.lower(), None):
+            _save_challenge_cache()
+
+
+class CachedChallengeAuthBase(KeyVaultAuthBase):
+    """ Answers requests to a vault with the challenge cached by a previous command, if any,
+    instead of sending the request unauthenticated first to receive the challenge. A request the
+    vault rejects with a cached challenge, e.g. because the vault moved to another tenant, is
+    sent again once with the challenge the vault answers with now. """
+
+    def __init__(self, authorization_callback):
+        super(CachedChallengeAuthBase, self).__init__(authorization_callback)
+        # the challenges loaded from the cache, by host
+        self.cached_challenges = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        host = urlparse(request.url).netloc.lower()
+        challenge = HttpBearerChallengeCache.get_challenge_for_url(request.url)
+        if not challenge:
+            challenge = get_cached_challenge(request.url)
+            if not challenge:
+                request = super(CachedChallengeAuthBase, self).__call__(request)
+                challenge = HttpBearerChallengeCache.get_challenge_for_url(request.url)
+                if challenge:
+                    cache_challenge(request.url, challenge)
+                return request
+            HttpBearerChallengeCache.set_challenge_for_url(request.url, challenge)
+            self.cached_challenges[host] = challenge
+        if challenge is self.cached_challenges.get(host):
+            request.register_hook('response', self._retry_rejected_request)
+        return super(CachedChallengeAuthBase, self).__call__(request)
+
+    def _retry_rejected_request(self, response, **kwargs):
+        if response.status_code != 401:
+            return response
+        url = response.request.url
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            # concurrent requests rejected with the same challenge forget it only once
+            if HttpBearerChallengeCache.get_challenge_for_url(url) is \
+                    self.cached_challenges.get(host):
+                logger.debug("The cached challenge of '%s' was rejected", host)
+                remove_cached_challenge(url)
+                try:
+                    HttpBearerChallengeCache.remove_challenge_for_url(url)
+                except KeyError:
+                    pass
+
+        # release the connection, then send only the rejected request again
+        response.content  # pylint: disable=pointless-statement
+        response.close()
+        request = response.request.copy()
+        request.headers.pop('Authorization', None)
+        request.hooks['response'] = []
+        request = self(request)
+        request.hooks['response'] = []
+        retried = response.connection.send(request, **kwargs)
+        retried.history.append(response)
+        retried.request = request
+        return retried
+
+
+class CachedChallengeAuthentication(KeyVaultAuthentication):
+
+    def __init__(self, authorization_callback):
+        super(CachedChallengeAuthentication, self).__init__(authorization_callback)
+        self.auth = CachedChallengeAuthBase(authorization_callback)
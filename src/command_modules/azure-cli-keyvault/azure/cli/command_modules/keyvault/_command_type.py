@@ -44,35 +44,41 @@ def _create_key_vault_command(module_name, name, operation, transform_result, ta
         from msrest.exceptions import ValidationError, ClientRequestError
         from msrestazure.azure_operation import AzureOperationPoller
         from azure.cli.core._profile import Profile
-        from azure.keyvault import \
-            (KeyVaultClient, KeyVaultAuthentication)
+        from azure.keyvault import KeyVaultClient
         from azure.keyvault.generated import \
             (KeyVaultClient as BaseKeyVaultClient)
         from azure.keyvault.generated.models import \
             (KeyVaultErrorException)
+        from azure.cli.command_modules.keyvault._challenge_cache import \
+            CachedChallengeAuthentication
 
-        try:
+        # the credentials of each resource, shared by all the requests of the command
+        credentials = {}
 
-            def get_token(server, resource, scope): # pylint: disable=unused-argument
-                import adal
-                try:
-                    return Profile().get_login_credentials(resource)[0]._token_retriever() # pylint: disable=protected-access
-                except adal.AdalError as err:
-                    #pylint: disable=no-member
-                    if (hasattr(err, 'error_response') and
-                            ('error_description' in err.error_response)
-                            and ('AADSTS70008:' in err.error_response['error_description'])):
-                        raise CLIError(
-                            "Credentials have expired due to inactivity. Please run 'az login'")
-                    raise CLIError(err)
+        def get_token(server, resource, scope): # pylint: disable=unused-argument
+            import adal
+            try:
+                if resource not in credentials:
+                    credentials[resource] = Profile().get_login_credentials(resource)[0]
+                return credentials[resource]._token_retriever() # pylint: disable=protected-access
+            except adal.AdalError as err:
+                #pylint: disable=no-member
+                if (hasattr(err, 'error_response') and
+                        ('error_description' in err.error_response)
+                        and ('AADSTS70008:' in err.error_response['error_description'])):
+                    raise CLIError(
+                        "Credentials have expired due to inactivity. Please run 'az login'")
+                raise CLIError(err)
 
+        try:
+            auth = CachedChallengeAuthentication(get_token)
             op = get_op_handler(operation)
             # since the convenience client can be inconvenient, we have to check and create the
             # correct client version
             if 'generated' in op.__module__:
-                client = BaseKeyVaultClient(KeyVaultAuthentication(get_token))
+                client = BaseKeyVaultClient(auth)
             else:
-                client = KeyVaultClient(KeyVaultAuthentication(get_token)) # pylint: disable=redefined-variable-type
+                client = KeyVaultClient(auth) # pylint: disable=redefined-variable-type
             result = op(client, **kwargs)
 
             # apply results transform if specified
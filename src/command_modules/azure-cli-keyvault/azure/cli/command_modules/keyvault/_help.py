@@ -49,6 +49,28 @@ helps['keyvault secret'] = """
     short-summary: Manage secrets.
 """
 
+helps['keyvault secret backup-all'] = """
+    type: command
+    short-summary: Back up the secrets of a vault to a single file.
+    long-summary: >
+        The secrets are listed once and their values are retrieved concurrently. The file holds the
+        secret values in plain text and is only readable by the current user.
+    examples:
+        - name: Copy all the secrets of a vault, with their versions, to another vault.
+          text: >
+            az keyvault secret backup-all --vault-name vault1 -f secrets.json --include-versions
+
+            az keyvault secret restore-all --vault-name vault2 -f secrets.json
+"""
+
+helps['keyvault secret restore-all'] = """
+    type: command
+    short-summary: Restore the secrets of a file created by 'az keyvault secret backup-all'.
+    long-summary: >
+        The secrets are set concurrently. The versions of a secret are set in their original order, so
+        the current version is the same as in the source vault.
+"""
+
 helps['keyvault certificate'] = """
     type: group
     short-summary: Manage certificates.
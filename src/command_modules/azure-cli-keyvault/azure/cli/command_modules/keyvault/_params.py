@@ -153,6 +153,11 @@ register_attributes_argument('keyvault secret set-attributes', 'secret', SecretA
 register_cli_argument('keyvault secret download', 'file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter(), help='File to receive the secret contents.')
 register_cli_argument('keyvault secret download', 'encoding', options_list=('--encoding', '-e'), help="Encoding of the destination file. By default, will look for the 'file-encoding' tag on the secret. Otherwise will assume 'utf-8'.", default=None, **enum_choice_list(secret_encoding_values))
 
+register_cli_argument('keyvault secret backup-all', 'file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter(), help='File to write the secrets to. It must not exist.')
+register_cli_argument('keyvault secret backup-all', 'secret_names', options_list=('--names',), nargs='+', help="Space separated list of the secrets to back up, as 'name' or 'name/version'. If omitted, backs up all the enabled secrets of the vault.")
+register_cli_argument('keyvault secret backup-all', 'include_versions', action='store_true', help='Back up all the enabled versions of the secrets, not only the current version.')
+register_cli_argument('keyvault secret restore-all', 'file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter(), help="File created by 'az keyvault secret backup-all'.")
+
 register_cli_argument('keyvault certificate', 'certificate_version', options_list=('--version', '-v'), help='The certificate version. If omitted, uses the latest version.', default='', required=False, completer=get_keyvault_version_completion_list('certificate'))
 register_attributes_argument('keyvault certificate create', 'certificate', CertificateAttributes, True)
 register_attributes_argument('keyvault certificate set-attributes', 'certificate', CertificateAttributes)
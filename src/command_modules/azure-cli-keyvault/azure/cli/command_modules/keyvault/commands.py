@@ -55,6 +55,8 @@ cli_keyvault_data_plane_command('keyvault secret set-attributes', base_client_pa
 cli_keyvault_data_plane_command('keyvault secret show', base_client_path.format('KeyVaultClient.get_secret'))
 cli_keyvault_data_plane_command('keyvault secret delete', convenience_path.format('KeyVaultClient.delete_secret'))
 cli_keyvault_data_plane_command('keyvault secret download', custom_path.format('download_secret'))
+cli_keyvault_data_plane_command('keyvault secret backup-all', custom_path.format('backup_secrets'))
+cli_keyvault_data_plane_command('keyvault secret restore-all', custom_path.format('restore_secrets'))
 
 cli_keyvault_data_plane_command('keyvault certificate create', custom_path.format('create_certificate'))
 cli_keyvault_data_plane_command('keyvault certificate list', convenience_path.format('KeyVaultClient.get_certificates'))
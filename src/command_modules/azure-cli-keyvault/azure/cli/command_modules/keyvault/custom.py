@@ -504,6 +504,156 @@ def download_secret(client, vault_base_url, secret_name, file_path, encoding=Non
         raise ex
 
 
+SECRET_ARCHIVE_VERSION = 1
+_MAX_SECRET_WORKERS = 8
+
+
+def _run_ordered(func, items, max_workers=_MAX_SECRET_WORKERS):
+    """ Calls func for each item concurrently and yields the results in the order of the items.
+    Only a few items are read ahead, so neither the items nor the results are all held in
+    memory. """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for item in items:
+            if len(pending) >= max_workers * 2:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, item))
+        while pending:
+            yield pending.popleft().result()
+
+
+def _get_secret_serializers():
+    from msrest.serialization import Serializer, Deserializer
+    from azure.keyvault.generated import models
+    client_models = {k: v for k, v in models.__dict__.items() if isinstance(v, type)}
+    return Serializer(client_models), Deserializer(client_models)
+
+
+def _is_secret_exportable(item):
+    if item.managed:
+        logger.warning("Skipping '%s', it is managed by a certificate.", item.id)
+        return False
+    if item.attributes and item.attributes.enabled is False:
+        logger.warning("Skipping '%s', it is disabled.", item.id)
+        return False
+    return True
+
+
+def _list_secret_versions(client, vault_base_url, secret_name, include_versions):
+    """ Returns the ids of the versions of a secret to back up, oldest first, so restoring them
+    in order leaves the same version current. """
+    from azure.keyvault.key_vault_id import create_secret_id
+    if not include_versions:
+        return [create_secret_id(vault_base_url, secret_name).id]
+    items = [i for i in client.get_secret_versions(vault_base_url, secret_name)
+             if _is_secret_exportable(i)]
+    items.sort(key=lambda i: i.attributes.created)
+    return [i.id for i in items]
+
+
+def backup_secrets(client, vault_base_url, file_path, secret_names=None,
+                   include_versions=False):
+    """ Back up the secrets of a vault to a single file. The secrets are listed once and their
+    values are retrieved concurrently.
+    :param list secret_names: The secrets to back up, as 'name' or 'name/version'. All the
+     enabled secrets of the vault are backed up if omitted.
+    :param bool include_versions: Back up all the versions of the secrets instead of the current
+     version only.
+    """
+    from itertools import chain
+    from azure.keyvault.key_vault_id import create_secret_id, parse_secret_id
+
+    if os.path.isfile(file_path) or os.path.isdir(file_path):
+        raise CLIError("File or directory named '{}' already exists.".format(file_path))
+    serializer, _ = _get_secret_serializers()
+
+    if secret_names:
+        names = [n.split('/', 1) for n in secret_names]
+        versioned_ids = [[create_secret_id(vault_base_url, n[0], n[1]).id]
+                         for n in names if len(n) == 2]
+        names = [n[0] for n in names if len(n) == 1]
+    else:
+        versioned_ids = []
+        names = (parse_secret_id(i.id).name for i in client.get_secrets(vault_base_url)
+                 if _is_secret_exportable(i))
+    secret_ids = chain(versioned_ids, _run_ordered(
+        lambda n: _list_secret_versions(client, vault_base_url, n, include_versions), names))
+
+    def _get_secret(secret_id):
+        sid = parse_secret_id(secret_id)
+        secret = client.keyvault.get_secret(vault_base_url, sid.name, sid.version or '')
+        attributes = serializer.body(secret.attributes, 'SecretAttributes') \
+            if secret.attributes else None
+        return {'name': sid.name, 'version': parse_secret_id(secret.id).version,
+                'value': secret.value, 'contentType': secret.content_type,
+                'tags': secret.tags, 'attributes': attributes}
+
+    names = set()
+    count = 0
+    # the file holds the secret values, only the current user may read it
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps({'version': SECRET_ARCHIVE_VERSION, 'vault': vault_base_url}))
+            f.write('\n')
+            for secret in _run_ordered(_get_secret, chain.from_iterable(secret_ids)):
+                f.write(json.dumps(secret, sort_keys=True))
+                f.write('\n')
+                names.add(secret['name'])
+                count += 1
+    except Exception:  # pylint: disable=broad-except
+        os.remove(file_path)
+        raise
+    return {'file': file_path, 'secrets': len(names), 'versions': count}
+
+
+def _read_secret_archive(file_path):
+    """ Yields the secrets of a backup file, the versions of each secret together. """
+    with open(file_path) as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get('version') != SECRET_ARCHIVE_VERSION:
+            raise CLIError("'{}' is not a secret backup file.".format(file_path))
+        versions = []
+        for line in f:
+            if not line.strip():
+                continue
+            secret = json.loads(line)
+            if versions and versions[0]['name'] != secret['name']:
+                yield versions
+                versions = []
+            versions.append(secret)
+        if versions:
+            yield versions
+
+
+def restore_secrets(client, vault_base_url, file_path):
+    """ Restore the secrets of a file created by 'backup-all'. The secrets are set
+    concurrently, the versions of a secret in their original order.
+    """
+    _, deserializer = _get_secret_serializers()
+
+    def _set_secret_versions(versions):
+        for secret in versions:
+            attributes = deserializer('SecretAttributes', secret['attributes']) \
+                if secret.get('attributes') else None
+            client.set_secret(vault_base_url, secret['name'], secret['value'],
+                              tags=secret.get('tags'), content_type=secret.get('contentType'),
+                              secret_attributes=attributes)
+        return len(versions)
+
+    secrets = 0
+    count = 0
+    for restored in _run_ordered(_set_secret_versions, _read_secret_archive(file_path)):
+        secrets += 1
+        count += restored
+    return {'secrets': secrets, 'versions': count}
+
+
 def create_certificate(client, vault_base_url, certificate_name, certificate_policy,
                        disabled=False, expires=None, not_before=None, tags=None):
     cert_attrs = CertificateAttributes(not disabled, not_before, expires)
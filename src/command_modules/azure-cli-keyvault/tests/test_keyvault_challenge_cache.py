@@ -0,0 +1,149 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+import requests
+
+from azure.keyvault import HttpBearerChallengeCache
+
+from azure.cli.core.util import get_file_json
+from azure.cli.command_modules.keyvault import _challenge_cache
+from azure.cli.command_modules.keyvault._challenge_cache import CachedChallengeAuthentication
+
+VAULT = 'https://vault1.vault.azure.net'
+CHALLENGE = 'Bearer authorization="https://login.windows.net/tenant1", ' \
+            'resource="https://vault.azure.net"'
+TOKEN = 'Bearer token-for-https://login.windows.net/tenant1'
+
+
+def _request(url=VAULT + '/secrets/s1'):
+    return requests.Request('GET', url).prepare()
+
+
+def _challenge_response(session, request):  # pylint: disable=unused-argument
+    response = requests.Response()
+    response.status_code = 401
+    response.headers['WWW-Authenticate'] = CHALLENGE
+    response.request = request
+    return response
+
+
+def _vault_response(adapter, request, **kwargs):  # pylint: disable=unused-argument
+    """ The vault only accepts the tokens of the tenant of its current challenge. """
+    response = requests.Response()
+    response.request = request
+    response.connection = adapter
+    response.raw = io.BytesIO()
+    if request.headers.get('Authorization') == TOKEN:
+        response.status_code = 200
+    else:
+        response.status_code = 401
+        response.headers['WWW-Authenticate'] = CHALLENGE
+    return response
+
+
+def _get_token(server, resource, scope):  # pylint: disable=unused-argument
+    return 'Bearer', 'token-for-' + server
+
+
+class TestKeyVaultChallengeCache(unittest.TestCase):
+
+    def setUp(self):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        patcher = mock.patch.dict(os.environ, {'AZURE_CONFIG_DIR': config_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache_file = os.path.join(config_dir, 'keyVaultChallenges.json')
+        self._reset()
+        self.addCleanup(self._reset)
+
+    @staticmethod
+    def _reset():
+        """ Start over as a new process would. """
+        challenge_cache = _challenge_cache._CHALLENGE_CACHE  # pylint: disable=protected-access
+        challenge_cache.__init__(ignore_corrupt_file=True)
+        HttpBearerChallengeCache.clear()
+
+    @mock.patch('requests.Session.send', side_effect=_challenge_response, autospec=True)
+    def test_keyvault_challenge_cached_between_commands(self, send):
+        auth = CachedChallengeAuthentication(_get_token).auth
+        request = auth(_request())
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(request.headers['Authorization'],
+                         'Bearer token-for-https://login.windows.net/tenant1')
+        self.assertEqual(get_file_json(self.cache_file)['vault1.vault.azure.net']['parameters'],
+                         {'authorization': 'https://login.windows.net/tenant1',
+                          'resource': 'https://vault.azure.net'})
+
+        self._reset()
+        auth = CachedChallengeAuthentication(_get_token).auth
+        request = auth(_request(VAULT + '/keys/k1'))
+        auth(_request(VAULT + '/keys/k2'))
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(request.headers['Authorization'],
+                         'Bearer token-for-https://login.windows.net/tenant1')
+        self.assertEqual(list(auth.cached_challenges), ['vault1.vault.azure.net'])
+
+        # other vaults still get their own challenge
+        auth(_request('https://vault2.vault.azure.net/secrets/s1'))
+        self.assertEqual(send.call_count, 2)
+
+    @mock.patch('azure.cli.command_modules.keyvault._challenge_cache.az_config')
+    @mock.patch('requests.Session.send', side_effect=_challenge_response, autospec=True)
+    def test_keyvault_challenge_cache_disabled(self, send, config):
+        config.getint.return_value = 0
+        for _ in range(2):
+            self._reset()
+            CachedChallengeAuthentication(_get_token).auth(_request())
+        self.assertEqual(send.call_count, 2)
+        self.assertFalse(os.path.exists(self.cache_file))
+
+    @mock.patch('requests.Session.send', side_effect=_challenge_response, autospec=True)
+    def test_keyvault_challenge_cache_corrupt_file(self, send):
+        with open(self.cache_file, 'w') as f:
+            f.write('{"vault1.vault.azure.net": {"timestamp": 14')  # torn by a parallel write
+        request = CachedChallengeAuthentication(_get_token).auth(_request())
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(request.headers['Authorization'],
+                         'Bearer token-for-https://login.windows.net/tenant1')
+        self.assertEqual(list(get_file_json(self.cache_file)), ['vault1.vault.azure.net'])
+
+    @mock.patch('requests.adapters.HTTPAdapter.send', side_effect=_vault_response,
+                autospec=True)
+    def test_keyvault_stale_challenge_retries_rejected_request(self, send):
+        _challenge_cache.cache_challenge(VAULT, mock.MagicMock(get_value={
+            'authorization': 'https://login.windows.net/old-tenant',
+            'resource': 'https://vault.azure.net'}.get))
+        self._reset()
+        session = CachedChallengeAuthentication(_get_token).signed_session()
+
+        # the request rejected with the challenge of a previous command is sent again, only once
+        response = session.get(VAULT + '/secrets/s1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r.status_code for r in response.history], [401])
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(get_file_json(self.cache_file)['vault1.vault.azure.net']['parameters'],
+                         {'authorization': 'https://login.windows.net/tenant1',
+                          'resource': 'https://vault.azure.net'})
+
+        # the requests that follow use the new challenge
+        self.assertEqual(session.get(VAULT + '/secrets/s2').status_code, 200)
+        self.assertEqual(send.call_count, 4)
+
+        # a request rejected with the new challenge too is not sent again
+        send.side_effect = lambda adapter, request, **kwargs: _vault_response(adapter, _request())
+        self.assertEqual(session.get(VAULT + '/secrets/s3').status_code, 401)
+        self.assertEqual(send.call_count, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from azure.keyvault.generated.models import SecretAttributes, SecretBundle, SecretItem
+
+from azure.cli.core.util import CLIError
+from azure.cli.command_modules.keyvault.custom import backup_secrets, restore_secrets
+
+VAULT = 'https://vault1.vault.azure.net'
+
+
+def _attributes(created, enabled=True):
+    attributes = SecretAttributes(enabled=enabled,
+                                  expires=datetime.datetime(2030, 1, 1, tzinfo=_UTC))
+    attributes.created = datetime.datetime(2017, 1, created, tzinfo=_UTC)
+    return attributes
+
+
+class _UTCZone(datetime.tzinfo):
+
+    def utcoffset(self, dt):
+        return datetime.timedelta(0)
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+
+_UTC = _UTCZone()
+
+
+class FakeVault(object):  # pylint: disable=too-few-public-methods
+    """ Holds the versions of each secret, oldest first. """
+
+    def __init__(self, url, secrets):
+        self.url = url
+        self.secrets = secrets
+        self.lock = threading.Lock()
+
+    def item(self, name, version, **kwargs):
+        return SecretItem(id='{}/secrets/{}/{}'.format(self.url, name, version), **kwargs)
+
+
+class FakeSecretClient(object):
+
+    def __init__(self, vault):
+        self.keyvault = self
+        self.vault = vault
+
+    def get_secrets(self, vault_base_url):
+        assert vault_base_url == self.vault.url
+        return [SecretItem(id='{}/secrets/{}'.format(self.vault.url, n),
+                           attributes=self.vault.secrets[n][-1]['attributes'])
+                for n in sorted(self.vault.secrets)]
+
+    def get_secret_versions(self, vault_base_url, secret_name):
+        assert vault_base_url == self.vault.url
+        return [self.vault.item(secret_name, v['version'], attributes=v['attributes'])
+                for v in reversed(self.vault.secrets[secret_name])]
+
+    def get_secret(self, vault_base_url, secret_name, secret_version):
+        assert vault_base_url == self.vault.url
+        versions = self.vault.secrets[secret_name]
+        secret = next(v for v in versions if v['version'] == secret_version) \
+            if secret_version else versions[-1]
+        return SecretBundle(value=secret['value'], attributes=secret['attributes'],
+                            id='{}/secrets/{}/{}'.format(self.vault.url, secret_name,
+                                                         secret['version']),
+                            tags=secret.get('tags'), content_type='text/plain')
+
+    def set_secret(self, vault_base_url, secret_name, value, tags=None, content_type=None,
+                   secret_attributes=None):
+        assert vault_base_url == self.vault.url
+        assert content_type == 'text/plain'
+        with self.vault.lock:
+            versions = self.vault.secrets.setdefault(secret_name, [])
+            versions.append({'version': str(len(versions)), 'value': value, 'tags': tags,
+                             'attributes': secret_attributes})
+
+
+class TestKeyVaultSecretBackup(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        secrets = {
+            's{}'.format(i): [{'version': 'v1', 'value': 'old{}'.format(i),
+                               'attributes': _attributes(1)},
+                              {'version': 'v2', 'value': 'new{}'.format(i),
+                               'attributes': _attributes(2), 'tags': {'a': 'b'}}]
+            for i in range(30)
+        }
+        secrets['disabled'] = [{'version': 'v1', 'value': 'x',
+                                'attributes': _attributes(1, enabled=False)}]
+        # disabled versions aren't backed up
+        secrets['s3'][0]['attributes'] = _attributes(1, enabled=False)
+        self.source = FakeVault(VAULT, secrets)
+
+    def test_keyvault_backup_restore_secrets(self):
+        file_path = os.path.join(self.temp_dir, 'secrets.json')
+        result = backup_secrets(FakeSecretClient(self.source), VAULT, file_path,
+                                include_versions=True)
+        self.assertEqual(result, {'file': file_path, 'secrets': 30, 'versions': 59})
+        if os.name == 'posix':
+            self.assertEqual(os.stat(file_path).st_mode & 0o777, 0o600)
+        with self.assertRaises(CLIError):
+            backup_secrets(FakeSecretClient(self.source), VAULT, file_path)
+
+        target = FakeVault('https://vault2.vault.azure.net', {})
+        result = restore_secrets(FakeSecretClient(target), target.url, file_path)
+        self.assertEqual(result, {'secrets': 30, 'versions': 59})
+        self.assertEqual(sorted(target.secrets), sorted('s{}'.format(i) for i in range(30)))
+        self.assertEqual([v['value'] for v in target.secrets['s1']], ['old1', 'new1'])
+        self.assertEqual([v['value'] for v in target.secrets['s3']], ['new3'])
+        restored = target.secrets['s1'][-1]
+        self.assertEqual(restored['tags'], {'a': 'b'})
+        self.assertTrue(restored['attributes'].enabled)
+        self.assertEqual(restored['attributes'].expires.year, 2030)
+
+    def test_keyvault_backup_named_secrets(self):
+        file_path = os.path.join(self.temp_dir, 'secrets.json')
+        backup_secrets(FakeSecretClient(self.source), VAULT, file_path,
+                       secret_names=['s1', 's2/v1'])
+        target = FakeVault('https://vault2.vault.azure.net', {})
+        result = restore_secrets(FakeSecretClient(target), target.url, file_path)
+        self.assertEqual(result, {'secrets': 2, 'versions': 2})
+        self.assertEqual({n: [v['value'] for v in versions]
+                          for n, versions in target.secrets.items()},
+                         {'s1': ['new1'], 's2': ['old2']})
+
+        not_a_backup = os.path.join(self.temp_dir, 'other.json')
+        with open(not_a_backup, 'w') as f:
+            f.write('{"id": 1}\n')
+        with self.assertRaises(CLIError):
+            restore_secrets(FakeSecretClient(target), target.url, not_a_backup)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -534,6 +534,24 @@ for item in ['a', 'aaaa', 'mx', 'ns', 'ptr', 'srv', 'txt']:
         short-summary: Add {} record.
     """.format(record.upper())
 
+helps['network dns record-set batch'] = """
+    type: command
+    short-summary: Add and remove many DNS records in a single command.
+    long-summary: >
+        The operations on the same record set are applied with a single conditional update, and
+        different record sets are updated concurrently. The file is a JSON list of operations,
+        each with 'operation' (add or remove), 'recordSetName', 'recordType' and 'record'.
+        By default, record sets whose last record is removed are deleted. A record set that
+        fails to update doesn't stop the others, but the command fails.
+    examples:
+        - name: Add an A record and remove an MX record.
+          text: >
+            echo '[{"operation": "add", "recordSetName": "www", "recordType": "a", "record": {"ipv4Address": "10.0.0.4"}},
+            {"operation": "remove", "recordSetName": "@", "recordType": "mx", "record": {"exchange": "mail.mysite.com"}}]' > records.json
+
+            az network dns record-set batch -g MyResourceGroup -z www.mysite.com -f records.json
+"""
+
 helps['network dns record-set cname set-record'] = """
     type: command
     short-summary: Set the value of the CNAME record.
@@ -597,11 +615,20 @@ helps['network dns zone delete'] = """
 helps['network dns zone export'] = """
     type: command
     short-summary: Export a DNS zone as a DNS zone file.
+    long-summary: The record sets are written as they are retrieved, to standard output or to a file.
+    examples:
+        - name: Export a DNS zone to a local zone file.
+          text: >
+            az network dns zone export
+            -g MyResourceGroup
+            -n MyZone
+            -f /path/to/zone/file
 """
 
 helps['network dns zone import'] = """
     type: command
     short-summary: Create a DNS zone using a DNS zone file.
+    long-summary: Only the record sets which differ from those in the zone are written.
     examples:
         - name: Import a local zone file into a DNS zone resource.
           text: >
@@ -609,6 +636,13 @@ helps['network dns zone import'] = """
             -g MyResourceGroup
             -n MyZone
             -f /path/to/zone/file
+        - name: Show the changes needed to make a DNS zone match a local zone file.
+          text: >
+            az network dns zone import
+            -g MyResourceGroup
+            -n MyZone
+            -f /path/to/zone/file
+            --delete-missing --dry-run
 """
 
 helps['network dns zone list'] = """
@@ -560,6 +560,8 @@ register_cli_argument('network dns zone', 'zone_name', name_arg_type)
 register_cli_argument('network dns zone', 'location', ignore_type)
 
 register_cli_argument('network dns zone import', 'file_name', options_list=('--file-name', '-f'), type=file_type, completer=FilesCompleter(), help='Path to the DNS zone file to import')
+register_cli_argument('network dns zone import', 'dry_run', action='store_true', help='Only report the record sets which would be created, updated or deleted.')
+register_cli_argument('network dns zone import', 'delete_missing', action='store_true', help='Delete the record sets of the zone which are not in the zone file.')
 register_cli_argument('network dns zone export', 'file_name', options_list=('--file-name', '-f'), type=file_type, completer=FilesCompleter(), help='Path to the DNS zone file to save')
 register_cli_argument('network dns zone update', 'if_none_match', ignore_type)
 
@@ -573,6 +575,8 @@ for item in ['a', 'aaaa', 'cname', 'mx', 'ns', 'ptr', 'srv', 'txt']:
     register_cli_argument('network dns record-set {} add-record'.format(item), 'record_set_name', options_list=('--record-set-name', '-n'), help='The name of the record set relative to the zone. Creates a new record set if one does not exist.')
     register_cli_argument('network dns record-set {} remove-record'.format(item), 'record_set_name', options_list=('--record-set-name', '-n'), help='The name of the record set relative to the zone.')
     register_cli_argument('network dns record-set {} remove-record'.format(item), 'keep_empty_record_set', action='store_true', help='Keep the empty record set if the last record is removed.')
+register_cli_argument('network dns record-set batch', 'file_name', options_list=('--file-name', '-f'), type=file_type, completer=FilesCompleter(), help='Path to a JSON file with the list of record operations.')
+register_cli_argument('network dns record-set batch', 'keep_empty_record_sets', action='store_true', help='Keep the empty record sets if their last record is removed.')
 register_cli_argument('network dns record-set cname set-record', 'record_set_name', options_list=('--record-set-name', '-n'), help='The name of the record set relative to the zone. Creates a new record set if one does not exist.')
 
 register_cli_argument('network dns record-set soa', 'relative_record_set_name', ignore_type, default='@')
@@ -416,6 +416,8 @@ for record in ['a', 'aaaa', 'mx', 'ns', 'ptr', 'srv', 'txt']:
                                custom_function_op=custom_path.format('update_dns_record_set'),
                                transform=transform_dns_record_set_output)
 
+cli_command(__name__, 'network dns record-set batch', custom_path.format('update_dns_records'))
+
 cli_command(__name__, 'network dns record-set soa show', dns_record_set_path + 'get', cf_dns_mgmt_record_sets, transform=transform_dns_record_set_output, exception_handler=empty_on_404)
 cli_command(__name__, 'network dns record-set soa update', custom_path.format('update_dns_soa_record'), transform=transform_dns_record_set_output)
 
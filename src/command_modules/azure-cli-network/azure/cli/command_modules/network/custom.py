@@ -22,7 +22,7 @@ from azure.mgmt.dns.models import (RecordSet, AaaaRecord, ARecord, CnameRecord,
                                    NsRecord, PtrRecord, SoaRecord, SrvRecord, TxtRecord, Zone)
 
 from azure.cli.command_modules.network.zone_file.parse_zone_file import parse_zone_file
-from azure.cli.command_modules.network.zone_file.make_zone_file import make_zone_file
+from azure.cli.command_modules.network.zone_file.make_zone_file import ZoneFileWriter
 from azure.cli.core.profiles import get_sdk, supported_api_version, ResourceType
 
 logger = azlogging.get_az_logger(__name__)
@@ -1860,71 +1860,94 @@ def _type_to_property_name(key):
     return type_dict[key.lower()]
 
 
-def export_zone(resource_group_name, zone_name):
+def _get_zone_file_records(record_set, record_type):
+    """ Convert the records of a record set to the json-encoded records of a zone file. """
+    record_data = getattr(record_set, _type_to_property_name(record_type), None)
+
+    # ignore empty record sets
+    if not record_data:
+        return []
+
+    if not isinstance(record_data, list):
+        record_data = [record_data]
+
+    records = []
+    for record in record_data:
+
+        record_obj = {'ttl': record_set.ttl}
+
+        if record_type == 'aaaa':
+            record_obj.update({'ip': record.ipv6_address})
+        elif record_type == 'a':
+            record_obj.update({'ip': record.ipv4_address})
+        elif record_type == 'cname':
+            record_obj.update({'alias': record.cname})
+        elif record_type == 'mx':
+            record_obj.update({'preference': record.preference, 'host': record.exchange})
+        elif record_type == 'ns':
+            record_obj.update({'host': record.nsdname})
+        elif record_type == 'ptr':
+            record_obj.update({'host': record.ptrdname})
+        elif record_type == 'soa':
+            record_obj.update({
+                'mname': record.host.rstrip('.') + '.',
+                'rname': record.email.rstrip('.') + '.',
+                'serial': record.serial_number, 'refresh': record.refresh_time,
+                'retry': record.retry_time, 'expire': record.expire_time,
+                'minimum': record.minimum_ttl
+            })
+        elif record_type == 'srv':
+            record_obj.update({'priority': record.priority, 'weight': record.weight,
+                               'port': record.port, 'target': record.target})
+        elif record_type == 'txt':
+            record_obj.update({'txt': ' '.join(record.value)})
+
+        records.append(record_obj)
+    return records
+
+
+# record sets are listed 100 at a time
+_ZONE_EXPORT_FLUSH_INTERVAL = 100
+
+
+def export_zone(resource_group_name, zone_name, file_name=None):
+    """ Export a DNS zone as a zone file. The record sets are written as they are listed, a page
+    at a time, so the output starts right away and memory use doesn't grow with the zone.
+    :param file_name: Path to the zone file to write. Defaults to standard output.
+    """
+    from codecs import open as codecs_open
     from time import localtime, strftime
+    import sys
 
     client = get_mgmt_service_client(DnsManagementClient)
+    # the SOA record set comes first and holds the default TTL of the zone
+    soa = client.record_sets.get(resource_group_name, zone_name, '@', 'SOA')
     record_sets = client.record_sets.list_by_dns_zone(resource_group_name, zone_name)
 
-    zone_obj = OrderedDict({
-        '$origin': zone_name.rstrip('.') + '.',
-        'resource-group': resource_group_name,
-        'zone-name': zone_name.rstrip('.'),
-        'datetime': strftime('%a, %d %b %Y %X %z', localtime())
-    })
-
-    for record_set in record_sets:
-        record_type = record_set.type.rsplit('/', 1)[1].lower()
-        record_set_name = record_set.name
-        record_data = getattr(record_set, _type_to_property_name(record_type), None)
-
-        # ignore empty record sets
-        if not record_data:
-            continue
-
-        if not isinstance(record_data, list):
-            record_data = [record_data]
-
-        if record_set_name not in zone_obj:
-            zone_obj[record_set_name] = OrderedDict()
-
-        for record in record_data:
-
-            record_obj = {'ttl': record_set.ttl}
-
-            if record_type not in zone_obj[record_set_name]:
-                zone_obj[record_set_name][record_type] = []
-
-            if record_type == 'aaaa':
-                record_obj.update({'ip': record.ipv6_address})
-            elif record_type == 'a':
-                record_obj.update({'ip': record.ipv4_address})
-            elif record_type == 'cname':
-                record_obj.update({'alias': record.cname})
-            elif record_type == 'mx':
-                record_obj.update({'preference': record.preference, 'host': record.exchange})
-            elif record_type == 'ns':
-                record_obj.update({'host': record.nsdname})
-            elif record_type == 'ptr':
-                record_obj.update({'host': record.ptrdname})
-            elif record_type == 'soa':
-                record_obj.update({
-                    'mname': record.host.rstrip('.') + '.',
-                    'rname': record.email.rstrip('.') + '.',
-                    'serial': record.serial_number, 'refresh': record.refresh_time,
-                    'retry': record.retry_time, 'expire': record.expire_time,
-                    'minimum': record.minimum_ttl
-                })
-                zone_obj['$ttl'] = record.minimum_ttl
-            elif record_type == 'srv':
-                record_obj.update({'priority': record.priority, 'weight': record.weight,
-                                   'port': record.port, 'target': record.target})
-            elif record_type == 'txt':
-                record_obj.update({'txt': ' '.join(record.value)})
-
-            zone_obj[record_set_name][record_type].append(record_obj)
-
-    print(make_zone_file(zone_obj))
+    output = codecs_open(file_name, 'w', encoding='utf-8') if file_name else sys.stdout
+    try:
+        writer = ZoneFileWriter(output)
+        writer.write_header(
+            zone_name=zone_name.rstrip('.'),
+            resource_group=resource_group_name,
+            datetime=strftime('%a, %d %b %Y %X %z', localtime()),
+            ttl=soa.soa_record.minimum_ttl,
+            origin=zone_name.rstrip('.') + '.')
+        writer.write_record_set(soa.name, 'soa', _get_zone_file_records(soa, 'soa'))
+        output.flush()
+
+        for index, record_set in enumerate(record_sets, 1):
+            record_type = record_set.type.rsplit('/', 1)[1].lower()
+            if record_type == 'soa':
+                continue
+            records = _get_zone_file_records(record_set, record_type)
+            if records:
+                writer.write_record_set(record_set.name, record_type, records)
+            if index % _ZONE_EXPORT_FLUSH_INTERVAL == 0:
+                output.flush()
+    finally:
+        if file_name:
+            output.close()
 
 
 # pylint: disable=too-many-return-statements
@@ -1956,15 +1979,15 @@ def _build_record(data):
         raise CLIError("The {} record '{}' is missing a property.  {}"
                        .format(record_type, data['name'], ke))
 
-# pylint: disable=too-many-statements
-def import_zone(resource_group_name, zone_name, file_name):
-    from azure.cli.core.util import read_file_content
-    import sys
-    file_text = read_file_content(file_name)
-    zone_obj = parse_zone_file(file_text, zone_name)
 
+_DNS_MAX_WORKERS = 8
+_DNS_MAX_ATTEMPTS = 5
+
+
+def _build_record_sets(zone_obj, zone_name):
+    """ Build the record sets of a parsed zone file, keyed by lower case name and type. """
     origin = zone_name
-    record_sets = {}
+    record_sets = OrderedDict()
     for record_set_name in zone_obj:
         for record_set_type in zone_obj[record_set_name]:
             record_set_obj = zone_obj[record_set_name][record_set_type]
@@ -2001,47 +2024,146 @@ def import_zone(resource_group_name, zone_name, file_name):
                 _add_record(record_set, record, record_set_type,
                             is_list=record_set_type.lower() not in ['soa', 'cname'])
 
-    total_records = 0
-    for rs in record_sets.values():
-        try:
-            record_count = len(getattr(rs, _type_to_property_name(rs.type)))
-        except TypeError:
-            record_count = 1
-        total_records += record_count
-    cum_records = 0
-
-    client = get_mgmt_service_client(DnsManagementClient)
-    print('== BEGINNING ZONE IMPORT: {} ==\n'.format(zone_name), file=sys.stderr)
-    client.zones.create_or_update(resource_group_name, zone_name, Zone('global'))
+    result = OrderedDict()
     for rs in record_sets.values():
-
         rs.type = rs.type.lower()
         rs.name = '@' if rs.name == origin else rs.name
+        result[(rs.name.lower(), rs.type)] = rs
+    return result
 
+
+def _get_record_count(record_set):
+    try:
+        return len(getattr(record_set, _type_to_property_name(record_set.type)))
+    except TypeError:
+        return 1 if getattr(record_set, _type_to_property_name(record_set.type)) else 0
+
+
+def _get_records_key(record_set):
+    """ A comparable form of the TTL and records of a record set, regardless of their order. """
+    records = getattr(record_set, _type_to_property_name(record_set.type))
+    if not isinstance(records, list):
+        records = [records] if records is not None else []
+    return record_set.ttl, sorted(
+        sorted((k, str(v)) for k, v in record.__dict__.items() if v is not None)
+        for record in records)
+
+
+def _plan_zone_import(record_sets, existing_record_sets, delete_missing=False):
+    """ Compare the record sets of a zone file with those of the zone.
+    Returns the record sets to create, update and delete, and the number of unchanged ones. """
+    changes = []
+    unchanged = 0
+    for key, rs in record_sets.items():
+        existing = existing_record_sets.get(key)
+        if key == ('@', 'soa') and existing:
+            # the host of the zone's SOA record can't be changed
+            rs.soa_record.host = existing.soa_record.host
+        elif key == ('@', 'ns') and existing:
+            # the name servers of the zone are assigned by Azure DNS, only the TTL is imported
+            rs.ns_records = existing.ns_records
+        if not existing:
+            changes.append(('create', rs, None))
+        elif _get_records_key(rs) != _get_records_key(existing):
+            rs.metadata = existing.metadata
+            changes.append(('update', rs, existing.etag))
+        else:
+            unchanged += 1
+    if delete_missing:
+        for key, existing in existing_record_sets.items():
+            if key not in record_sets and key not in [('@', 'soa'), ('@', 'ns')]:
+                changes.append(('delete', existing, existing.etag))
+    return changes, unchanged
+
+
+def _call_with_retry(func, *args, **kwargs):
+    """ Retry a DNS operation throttled by the service or failing with a server error. """
+    import time
+    for attempt in range(_DNS_MAX_ATTEMPTS):
         try:
-            record_count = len(getattr(rs, _type_to_property_name(rs.type)))
-        except TypeError:
-            record_count = 1
-        if rs.name == '@' and rs.type == 'soa':
-            root_soa = client.record_sets.get(resource_group_name, zone_name, '@', 'SOA')
-            rs.soa_record.host = root_soa.soa_record.host
-            rs.name = '@'
-        elif rs.name == '@' and rs.type == 'ns':
-            root_ns = client.record_sets.get(resource_group_name, zone_name, '@', 'NS')
-            root_ns.ttl = rs.ttl
-            rs = root_ns
-            rs.type = rs.type.rsplit('/', 1)[1]
-        try:
-            client.record_sets.create_or_update(
-                resource_group_name, zone_name, rs.name, rs.type, rs)
-            cum_records += record_count
-            print("({}/{}) Imported {} records of type '{}' and name '{}'"
-                  .format(cum_records, total_records, record_count, rs.type, rs.name),
-                  file=sys.stderr)
+            return func(*args, **kwargs)
         except CloudError as ex:
-            logger.error(ex)
-    print("\n== {}/{} RECORDS IMPORTED SUCCESSFULLY: '{}' =="
-          .format(cum_records, total_records, zone_name), file=sys.stderr)
+            status_code = getattr(ex, 'status_code', None) or 0
+            if attempt == _DNS_MAX_ATTEMPTS - 1 or (status_code != 429 and status_code < 500):
+                raise
+            headers = getattr(getattr(ex, 'response', None), 'headers', None) or {}
+            try:
+                delay = int(headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                delay = 2 ** attempt
+            logger.info('DNS request failed with status %s. Retrying in %s seconds.',
+                        status_code, delay)
+            time.sleep(delay)
+
+
+def _apply_zone_change(client, resource_group_name, zone_name, change):
+    action, rs, etag = change
+    if action == 'delete':
+        record_type = rs.type.rsplit('/', 1)[-1]
+        return _call_with_retry(client.record_sets.delete, resource_group_name, zone_name,
+                                rs.name, record_type, if_match=etag)
+    return _call_with_retry(client.record_sets.create_or_update, resource_group_name, zone_name,
+                            rs.name, rs.type, rs, if_match=etag,
+                            if_none_match='*' if action == 'create' else None)
+
+
+# pylint: disable=too-many-locals
+def import_zone(resource_group_name, zone_name, file_name, dry_run=False, delete_missing=False):
+    """ Import a zone file into a DNS zone. Only the record sets that differ from the zone are
+    written, concurrently.
+    :param dry_run: Report the record sets that would be created, updated or deleted without
+     changing the zone.
+    :param delete_missing: Delete the record sets of the zone that are not in the zone file.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from azure.cli.core.util import read_file_content
+    import sys
+    file_text = read_file_content(file_name)
+    zone_obj = parse_zone_file(file_text, zone_name)
+    record_sets = _build_record_sets(zone_obj, zone_name)
+
+    client = get_mgmt_service_client(DnsManagementClient)
+    if not dry_run:
+        print('== BEGINNING ZONE IMPORT: {} ==\n'.format(zone_name), file=sys.stderr)
+        client.zones.create_or_update(resource_group_name, zone_name, Zone('global'))
+    try:
+        existing_record_sets = {}
+        for rs in client.record_sets.list_by_dns_zone(resource_group_name, zone_name):
+            rs.type = rs.type.rsplit('/', 1)[1].lower()
+            existing_record_sets[(rs.name.lower(), rs.type)] = rs
+    except CloudError as ex:
+        if not dry_run or getattr(ex, 'status_code', None) != 404:
+            raise
+    changes, unchanged = _plan_zone_import(record_sets, existing_record_sets, delete_missing)
+
+    if dry_run:
+        return [OrderedDict([('action', action), ('name', rs.name), ('type', rs.type),
+                             ('records', _get_record_count(rs))])
+                for action, rs, _ in changes]
+
+    total = len(changes)
+    done = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=_DNS_MAX_WORKERS) as executor:
+        futures = {executor.submit(_apply_zone_change, client, resource_group_name, zone_name,
+                                   change): change for change in changes}
+        for future in as_completed(futures):
+            action, rs, _ = futures[future]
+            try:
+                future.result()
+                done += 1
+                print("({}/{}) {} {} records of type '{}' and name '{}'".format(
+                    done, total, {'create': 'Created', 'update': 'Updated',
+                                  'delete': 'Deleted'}[action],
+                    _get_record_count(rs), rs.type, rs.name), file=sys.stderr)
+            except CloudError as ex:
+                failed += 1
+                logger.error("Failed to %s record set '%s' of type '%s': %s",
+                             action, rs.name, rs.type, ex)
+    print("\n== {}/{} RECORD SETS CHANGED SUCCESSFULLY, {} UNCHANGED: '{}' =="
+          .format(done, total, unchanged, zone_name), file=sys.stderr)
+    if failed:
+        raise CLIError('{} of {} record set changes failed.'.format(failed, total))
 
 
 def add_dns_aaaa_record(resource_group_name, zone_name, record_set_name, ipv6_address):
@@ -2243,4 +2365,146 @@ def lists_match(l1, l2):
     except TypeError:
         return False
 
+
+_DNS_BATCH_RECORD_TYPES = {
+    'a': 'ARecord', 'aaaa': 'AaaaRecord', 'cname': 'CnameRecord', 'mx': 'MxRecord',
+    'ns': 'NsRecord', 'ptr': 'PtrRecord', 'srv': 'SrvRecord', 'txt': 'TxtRecord'
+}
+
+
+def _load_dns_record_operations(file_name):
+    """ Read the record operations of a batch file and group them by record set, in order. """
+    from msrest.exceptions import DeserializationError
+    from msrest.serialization import Deserializer
+    from azure.cli.core.util import get_file_json
+    import azure.mgmt.dns.models as dns_models
+
+    deserialize = Deserializer({k: getattr(dns_models, k) for k in
+                                _DNS_BATCH_RECORD_TYPES.values()})
+    operations = get_file_json(file_name)
+    if not isinstance(operations, list):
+        raise CLIError('The batch file must contain a list of record operations.')
+    record_sets = OrderedDict()
+    for index, operation in enumerate(operations):
+        try:
+            action = operation['operation'].lower()
+            record_type = operation['recordType'].lower()
+            name = operation['recordSetName']
+            if action not in ['add', 'remove'] or record_type not in _DNS_BATCH_RECORD_TYPES:
+                raise ValueError
+            record = deserialize(_DNS_BATCH_RECORD_TYPES[record_type], operation['record'])
+        except (KeyError, TypeError, ValueError, AttributeError, DeserializationError):
+            raise CLIError("Invalid record operation #{}: {}. Expected 'operation' (add or "
+                           "remove), 'recordSetName', 'recordType' ({}) and 'record'."
+                           .format(index + 1, operation,
+                                   ', '.join(sorted(_DNS_BATCH_RECORD_TYPES))))
+        record_sets.setdefault((name.lower(), record_type), []).append((action, record))
+    return record_sets
+
+
+def _apply_dns_record_operations(record_set, record_type, operations):
+    """ Add and remove records of a record set in place. Returns the number of records added,
+    removed and the removals which didn't match any record. """
+    record_property = _type_to_property_name(record_type)
+    is_list = record_type != 'cname'
+    added = removed = 0
+    not_found = []
+    for action, record in operations:
+        records = getattr(record_set, record_property)
+        if not is_list:
+            records = [records] if records else []
+        matches = [r for r in records or []
+                   if dict_matches_filter(r.__dict__, record.__dict__)]
+        if action == 'add':
+            if matches:
+                continue
+            _add_record(record_set, record, record_type, is_list)
+            added += 1
+        elif not matches:
+            not_found.append(record)
+        elif is_list:
+            setattr(record_set, record_property, [r for r in records if r not in matches])
+            removed += len(matches)
+        else:
+            setattr(record_set, record_property, None)
+            removed += 1
+    return added, removed, not_found
+
+
+def _update_dns_record_set(client, resource_group_name, zone_name, name, record_type,
+                           operations, keep_empty_record_set):
+    """ Apply the record operations of one record set with a single read-modify-write. The write
+    is conditional on the ETag that was read, and starts over when the record set changed. """
+    status = OrderedDict([('name', name), ('type', record_type), ('status', 'Succeeded'),
+                          ('added', 0), ('removed', 0), ('error', None)])
+    for _ in range(_DNS_MAX_ATTEMPTS):
+        try:
+            record_set = _call_with_retry(client.record_sets.get, resource_group_name, zone_name,
+                                          name, record_type)
+        except CloudError as ex:
+            if getattr(ex, 'status_code', None) != 404:
+                raise
+            # pylint: disable=redefined-variable-type
+            record_set = RecordSet(name=name, type=record_type, ttl=3600)
+        status['added'], status['removed'], not_found = _apply_dns_record_operations(
+            record_set, record_type, operations)
+        if not_found:
+            status['error'] = 'Records not found: {}'.format(
+                ', '.join(str(r.__dict__) for r in not_found))
+        if not status['added'] and not status['removed']:
+            status['status'] = 'Unchanged'
+            return status
+        try:
+            if record_set.etag and not keep_empty_record_set and \
+                    not getattr(record_set, _type_to_property_name(record_type)):
+                _call_with_retry(client.record_sets.delete, resource_group_name, zone_name,
+                                 name, record_type, if_match=record_set.etag)
+                status['status'] = 'Deleted'
+            else:
+                _call_with_retry(client.record_sets.create_or_update, resource_group_name,
+                                 zone_name, name, record_type, record_set,
+                                 if_match=record_set.etag,
+                                 if_none_match=None if record_set.etag else '*')
+            return status
+        except CloudError as ex:
+            # 412: the record set was changed since it was read
+            if getattr(ex, 'status_code', None) != 412:
+                raise
+            logger.info("Record set '%s' of type '%s' changed, retrying.", name, record_type)
+    raise CLIError("Record set '{}' of type '{}' kept changing.".format(name, record_type))
+
+
+def update_dns_records(resource_group_name, zone_name, file_name, keep_empty_record_sets=False):
+    """ Add and remove many DNS records. The operations on the same record set are applied
+    with a single read-modify-write, and record sets are updated concurrently.
+    :param file_name: Path to a JSON file with a list of record operations, such as
+     {"operation": "add", "recordSetName": "www", "recordType": "a",
+     "record": {"ipv4Address": "10.0.0.1"}}. Records are given in the format of
+     'network dns record-set show'. Operation is either 'add' or 'remove'.
+    :param keep_empty_record_sets: Keep record sets whose last record is removed.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    record_sets = _load_dns_record_operations(file_name)
+    client = get_mgmt_service_client(DnsManagementClient)
+
+    def _update(item):
+        (name, record_type), operations = item
+        try:
+            return _update_dns_record_set(client, resource_group_name, zone_name, name,
+                                          record_type, operations, keep_empty_record_sets)
+        except Exception as ex:  # pylint: disable=broad-except
+            # only this record set failed, the others are still updated
+            return OrderedDict([('name', name), ('type', record_type), ('status', 'Failed'),
+                                ('added', 0), ('removed', 0), ('error', str(ex))])
+
+    with ThreadPoolExecutor(max_workers=_DNS_MAX_WORKERS) as executor:
+        results = list(executor.map(_update, record_sets.items()))
+    failed = [r for r in results if r['status'] == 'Failed']
+    if failed:
+        for result in failed:
+            logger.error("Failed to update record set '%s' of type '%s': %s",
+                         result['name'], result['type'], result['error'])
+        raise CLIError('{} of {} record sets failed to update.'.format(len(failed), len(results)))
+    return results
+
 #endregion
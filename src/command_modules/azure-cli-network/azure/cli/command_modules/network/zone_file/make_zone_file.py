@@ -26,6 +26,47 @@
 #pylint: skip-file
 from __future__ import print_function
 
+import azure.cli.command_modules.network.zone_file.record_processors as record_processors
+
+HEADER = """
+; Exported zone file from Azure DNS\n\
+;      Zone name: {zone_name}\n\
+;      Resource Group Name: {resource_group}\n\
+;      Date and time (UTC): {datetime}\n\n\
+$TTL {ttl}\n\
+$ORIGIN {origin}\n\
+    """
+
+
+class ZoneFileWriter(object):
+    """
+    Write a DNS zonefile incrementally, one record set at a time, to a file-like object.
+    The SOA record set must be written first.
+    """
+
+    def __init__(self, io):
+        self.io = io
+
+    def write_header(self, zone_name, resource_group, datetime, ttl, origin):
+        print(HEADER.format(
+            zone_name=zone_name,
+            resource_group=resource_group,
+            datetime=datetime,
+            ttl=ttl,
+            origin=origin
+        ), file=self.io)
+
+    def write_record_set(self, name, record_type, records, print_name=True):
+        """
+        Write the records of a record set, given as a list of json-encoded records
+        """
+        method = getattr(record_processors, 'process_{}'.format(record_type.strip('$')))
+        for entry in records:
+            method(self.io, entry, name, print_name)
+            print_name = False
+        print('', file=self.io)
+
+
 def make_zone_file(json_obj):
     """
     Generate the DNS zonefile, given a json-encoded description of the
@@ -47,28 +88,18 @@ def make_zone_file(json_obj):
         "uri":     [ uri records ]
     }
     """
-    import sys
-    import azure.cli.command_modules.network.zone_file.record_processors as record_processors
     from six import StringIO
 
     zone_file = StringIO()
+    writer = ZoneFileWriter(zone_file)
 
-    HEADER = """
-; Exported zone file from Azure DNS\n\
-;      Zone name: {zone_name}\n\
-;      Resource Group Name: {resource_group}\n\
-;      Date and time (UTC): {datetime}\n\n\
-$TTL {ttl}\n\
-$ORIGIN {origin}\n\
-    """
-    zone_name = json_obj.pop('zone-name')
-    print(HEADER.format(
-        zone_name=zone_name,
+    writer.write_header(
+        zone_name=json_obj.pop('zone-name'),
         resource_group=json_obj.pop('resource-group'),
         datetime=json_obj.pop('datetime'),
         ttl=json_obj.pop('$ttl'),
         origin=json_obj.pop('$origin')
-    ), file=zone_file)
+    )
 
     for record_set_name in json_obj.keys():
 
@@ -88,14 +119,10 @@ $ORIGIN {origin}\n\
             record = record_set[record_type]
             if not isinstance(record, list):
                 record = [record]
-            
-            for entry in record:
-                method = 'process_{}'.format(record_type.strip('$'))
-                getattr(record_processors, method)(zone_file, entry, record_set_name, first_line)
-                first_line = False
-
-            print('', file=zone_file)
-    
+
+            writer.write_record_set(record_set_name, record_type, record, first_line)
+            first_line = False
+
     result = zone_file.getvalue()
     zone_file.close()
 
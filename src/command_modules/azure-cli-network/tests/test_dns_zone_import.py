@@ -6,6 +6,7 @@
 import os
 import unittest
 
+from azure.cli.core.util import CLIError
 from azure.cli.command_modules.network.zone_file import parse_zone_file
 
 TEST_DIR = os.path.abspath(os.path.join(os.path.abspath(__file__), '..'))
@@ -290,11 +291,28 @@ class TestDnsZoneImport(unittest.TestCase):
 
 
     def test_zone_import_errors(self):
-        from azure.cli.core.util import CLIError
         for f in ['fail1', 'fail2', 'fail3', 'fail4', 'fail5']:
             with self.assertRaises(CLIError):
                 self._get_zone_object('{}.txt'.format(f), 'example.com')
 
+    def test_zone_file_lines(self):
+        zn = 'example.com.'
+        lines = [
+            '@ 3600 IN SOA ns1 hostmaster ( 1 3600 300 2419200 300 )',
+            'www in a 1.2.3.4 ; record type and class in lower case',
+            '    IN TXT -all "v=spf1;" ( "x"',
+            '  "y" )',
+            'bad IN A',
+            '$INCLUDE other.txt'
+        ]
+        with self.assertRaises(CLIError):
+            parse_zone_file(lines, zn)
+
+        zone = parse_zone_file(iter(lines), zn, ignore_invalid=True)
+        self._check_a(zone, 'www.' + zn, [(3600, '1.2.3.4')])
+        self._check_txt(zone, 'www.' + zn, [(3600, None, '-allv=spf1;xy')])
+        self.assertNotIn('bad.' + zn, zone)
+
 
 if __name__ == '__main__':
     unittest.main()
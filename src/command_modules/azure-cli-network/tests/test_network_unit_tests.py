@@ -79,6 +79,197 @@ class Test_Network_Unit_Tests(unittest.TestCase):
         self.assertEqual(len(result), 2)
         self.assertEqual(result[1].value, 'noodle')
 
+    @mock.patch('azure.cli.command_modules.network.custom.get_mgmt_service_client')
+    def test_network_dns_zone_import_diff(self, client_factory_mock):
+        import os
+        from azure.mgmt.dns.models import RecordSet, ARecord, NsRecord, SoaRecord
+        from azure.cli.command_modules.network.custom import import_zone
+
+        def record_set(name, record_type, ttl, **kwargs):
+            return RecordSet(name=name, type='Microsoft.Network/dnszones/' + record_type, ttl=ttl,
+                             etag='etag-' + name, **kwargs)
+
+        def list_existing(*_):
+            return [
+                record_set('@', 'SOA', 3600, soa_record=SoaRecord(
+                    'ns1.azure-dns.com.', 'azuredns-hostmaster.microsoft.com.', 1, 3600, 300,
+                    2419200, 300)),
+                record_set('@', 'NS', 172800, ns_records=[NsRecord('ns1.azure-dns.com.')]),
+                record_set('manuala', 'A', 3600, arecords=[ARecord('10.0.0.10')]),
+                record_set('mya', 'A', 0, arecords=[ARecord('10.0.1.1'), ARecord('10.0.1.2')]),
+                record_set('stale', 'A', 3600, arecords=[ARecord('10.0.2.1')])
+            ]
+        client = client_factory_mock.return_value
+        client.record_sets.list_by_dns_zone.side_effect = list_existing
+        zone_file = os.path.join(os.path.dirname(__file__), 'zone_files', 'zone1.txt')
+
+        plan = import_zone('rg', 'zone1.com', zone_file, dry_run=True, delete_missing=True)
+        self.assertEqual(len(plan), 12)
+        self.assertEqual([(c['action'], c['name']) for c in plan if c['action'] != 'create'],
+                         [('update', 'mya'), ('delete', 'stale')])
+        client.zones.create_or_update.assert_not_called()
+        client.record_sets.create_or_update.assert_not_called()
+
+        import_zone('rg', 'zone1.com', zone_file)
+        self.assertEqual(client.record_sets.create_or_update.call_count, 11)
+        client.record_sets.delete.assert_not_called()
+        update = [c for c in client.record_sets.create_or_update.call_args_list
+                  if c[0][2] == 'mya'][0]
+        self.assertEqual(update[1]['if_match'], 'etag-mya')
+        self.assertEqual([r.ipv4_address for r in update[0][4].arecords],
+                         ['10.0.1.0', '10.0.1.1'])
+
+        import_zone('rg', 'zone1.com', zone_file, delete_missing=True)
+        client.record_sets.delete.assert_called_once_with('rg', 'zone1.com', 'stale', 'a',
+                                                          if_match='etag-stale')
+
+    @mock.patch('azure.cli.command_modules.network.custom.get_mgmt_service_client')
+    def test_network_dns_zone_export_streams_record_sets(self, client_factory_mock):
+        import os
+        import shutil
+        import tempfile
+        from azure.mgmt.dns.models import RecordSet, ARecord, MxRecord, SoaRecord, TxtRecord
+        from azure.cli.command_modules.network.custom import export_zone
+        from azure.cli.command_modules.network.zone_file import parse_zone_file
+
+        def record_set(name, record_type, ttl, **kwargs):
+            return RecordSet(name=name, type='Microsoft.Network/dnszones/' + record_type, ttl=ttl,
+                             **kwargs)
+
+        soa = record_set('@', 'SOA', 3600, soa_record=SoaRecord(
+            'ns1.azure-dns.com.', 'azuredns-hostmaster.microsoft.com', 1, 3600, 300, 2419200, 300))
+        written = []
+
+        def list_record_sets(*_):
+            for i in range(3):
+                # the header and SOA record are written before the record sets are listed
+                self.assertGreater(os.path.getsize(zone_file), 0)
+                written.append(i)
+                yield record_set('www{}'.format(i), 'A', 60, arecords=[ARecord('10.0.0.1'),
+                                                                       ARecord('10.0.0.2')])
+            yield soa
+            yield record_set('@', 'MX', 300, mx_records=[MxRecord(10, 'mail.contoso.com.')])
+            yield record_set('txt', 'TXT', 300, txt_records=[TxtRecord(['v=spf1 -all'])])
+            yield record_set('empty', 'A', 300)
+
+        client = client_factory_mock.return_value
+        client.record_sets.get.return_value = soa
+        client.record_sets.list_by_dns_zone.side_effect = list_record_sets
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        zone_file = os.path.join(temp_dir, 'zone.txt')
+
+        export_zone('rg', 'contoso.com', zone_file)
+
+        with open(zone_file) as f:
+            zone = parse_zone_file(f, 'contoso.com')
+        self.assertEqual(written, [0, 1, 2])
+        self.assertEqual(list(zone.keys()), ['contoso.com.', 'www0.contoso.com.',
+                                             'www1.contoso.com.', 'www2.contoso.com.',
+                                             'txt.contoso.com.'])
+        self.assertEqual(zone['contoso.com.']['soa']['email'], 'azuredns-hostmaster.microsoft.com.')
+        self.assertEqual(zone['contoso.com.']['mx'][0]['host'], 'mail.contoso.com.')
+        self.assertEqual([r['ip'] for r in zone['www1.contoso.com.']['a']],
+                         ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(zone['txt.contoso.com.']['txt'][0]['txt'], ['v=spf1 -all'])
+
+    @mock.patch('azure.cli.command_modules.network.custom.get_mgmt_service_client')
+    def test_network_dns_record_set_batch(self, client_factory_mock):
+        import json
+        import os
+        import shutil
+        import tempfile
+        from msrestazure.azure_exceptions import CloudError
+        from azure.mgmt.dns.models import RecordSet, ARecord, MxRecord
+        from azure.cli.command_modules.network.custom import update_dns_records
+
+        def cloud_error(status_code):
+            error = CloudError.__new__(CloudError)
+            error.status_code = status_code
+            error.response = mock.MagicMock(status_code=status_code, headers={})
+            return error
+
+        existing = {
+            'www': [RecordSet(name='www', ttl=60, etag='etag-1', arecords=[ARecord('10.0.0.1')]),
+                    RecordSet(name='www', ttl=60, etag='etag-2',
+                              arecords=[ARecord('10.0.0.1'), ARecord('10.0.0.9')])],
+            '@': [RecordSet(name='@', ttl=60, etag='etag-mx',
+                            mx_records=[MxRecord(10, 'mail.contoso.com')])]
+        }
+
+        def get_record_set(_, __, name, ___):
+            if name not in existing:
+                raise cloud_error(404)
+            return existing[name].pop(0)
+
+        writes = []
+
+        def create_or_update(*args, **kwargs):
+            writes.append((args[2], kwargs['if_match'], kwargs['if_none_match']))
+            if kwargs['if_match'] == 'etag-1':
+                # the record set was changed by someone else since it was read
+                raise cloud_error(412)
+            return args[4]
+
+        client = client_factory_mock.return_value
+        client.record_sets.get.side_effect = get_record_set
+        client.record_sets.create_or_update.side_effect = create_or_update
+
+        operations = [
+            {'operation': 'add', 'recordSetName': 'www', 'recordType': 'a',
+             'record': {'ipv4Address': '10.0.0.2'}},
+            {'operation': 'remove', 'recordSetName': '@', 'recordType': 'mx',
+             'record': {'exchange': 'mail.contoso.com'}},
+            {'operation': 'add', 'recordSetName': 'WWW', 'recordType': 'A',
+             'record': {'ipv4Address': '10.0.0.3'}},
+            {'operation': 'add', 'recordSetName': 'new', 'recordType': 'a',
+             'record': {'ipv4Address': '10.0.1.1'}},
+            {'operation': 'add', 'recordSetName': 'www', 'recordType': 'a',
+             'record': {'ipv4Address': '10.0.0.1'}}
+        ]
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        batch_file = os.path.join(temp_dir, 'records.json')
+        with open(batch_file, 'w') as f:
+            json.dump(operations, f)
+
+        results = update_dns_records('rg', 'contoso.com', batch_file)
+
+        self.assertEqual([(r['name'], r['type'], r['status'], r['added'], r['removed'])
+                          for r in results],
+                         [('www', 'a', 'Succeeded', 2, 0), ('@', 'mx', 'Deleted', 0, 1),
+                          ('new', 'a', 'Succeeded', 1, 0)])
+        self.assertEqual(sorted(writes), [('new', None, '*'), ('www', 'etag-1', None),
+                                          ('www', 'etag-2', None)])
+        www = [c[0][4] for c in client.record_sets.create_or_update.call_args_list
+               if c[1]['if_match'] == 'etag-2'][0]
+        self.assertEqual([r.ipv4_address for r in www.arecords],
+                         ['10.0.0.1', '10.0.0.9', '10.0.0.2', '10.0.0.3'])
+        client.record_sets.delete.assert_called_once_with('rg', 'contoso.com', '@', 'mx',
+                                                          if_match='etag-mx')
+
+        with open(batch_file, 'w') as f:
+            json.dump([{'operation': 'replace', 'recordSetName': 'www', 'recordType': 'a',
+                        'record': {'ipv4Address': '10.0.0.2'}}], f)
+        with self.assertRaises(CLIError):
+            update_dns_records('rg', 'contoso.com', batch_file)
+
+        # a record set which fails doesn't stop the others, but fails the command
+        def get_or_fail(_, __, name, ___):
+            if name == 'broken':
+                raise ValueError('unexpected response')
+            raise cloud_error(404)
+        client.record_sets.get.side_effect = get_or_fail
+        client.record_sets.create_or_update.reset_mock()
+        with open(batch_file, 'w') as f:
+            json.dump([{'operation': 'add', 'recordSetName': name, 'recordType': 'a',
+                        'record': {'ipv4Address': '10.0.2.1'}} for name in ['broken', 'other']],
+                      f)
+        with self.assertRaisesRegexp(CLIError, '1 of 2 record sets failed to update'):
+            update_dns_records('rg', 'contoso.com', batch_file)
+        self.assertEqual([c[0][2] for c in client.record_sets.create_or_update.call_args_list],
+                         ['other'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -107,6 +107,29 @@ helps['resource list'] = """
         - name: List resources using a tag value.
           text: >
             az resource list --tag something=else
+        - name: List the virtual machines in a region with a tag, from the local resource snapshot.
+          text: >
+            az resource list --from-snapshot --location westus --tag env=prod --resource-type Microsoft.Compute/virtualMachines
+"""
+
+helps['resource snapshot'] = """
+    type: group
+    short-summary: Manage the local snapshot of the resources of the subscription.
+    long-summary: >
+        The snapshot is indexed by resource type, resource group, location and tag, so
+        'az resource list --from-snapshot' can answer any combination of filters locally.
+        It is not updated when resources change; create it again to refresh it.
+"""
+
+helps['resource snapshot create'] = """
+    type: command
+    short-summary: Save the resources of the current subscription to the local snapshot.
+    long-summary: The resources of all resource groups are listed concurrently. An existing snapshot is replaced.
+"""
+
+helps['resource snapshot delete'] = """
+    type: command
+    short-summary: Delete the local snapshot of the current subscription.
 """
 
 helps['resource show'] = """
@@ -145,6 +168,9 @@ helps['resource delete'] = """
         - name: Delete a subnet using a resource identifier.
           text: >
             az resource delete --id /subscriptions/0b1f6471-1bf0-4dda-aec3-111111111111/resourceGroups/MyResourceGroup/providers/Microsoft.Network/virtualNetworks/MyVnet/subnets/MySubnet
+        - name: Delete several resources.
+          text: >
+            az resource delete --ids $(az resource list --tag env=test --query [].id -o tsv)
 """
 
 helps['resource tag'] = """
@@ -158,6 +184,9 @@ helps['resource tag'] = """
         - name: Tag a web app using a resource identifier.
           text: >
             az resource tag --tags vmlist=vm1 --id /subscriptions/0b1f6471-1bf0-4dda-aec3-111111111111/resourceGroups/MyResourceGroup/providers/Microsoft.Web/sites/MyWebapp
+        - name: Tag all resources of a resource group.
+          text: >
+            az resource tag --tags env=test --ids $(az resource list -g MyResourceGroup --query [].id -o tsv)
 """
 
 helps['resource update'] = """
@@ -233,6 +262,9 @@ helps['group deployment create'] = """
         - name: Create a deployment from a local template file and use parameter values in a string. 
           text: >
             az group deployment create -g MyResourceGroup --template-file azuredeploy.json --parameters "{\\"location\\": {\\"value\\": \\"westus\\"}}"
+        - name: Create a deployment and report the progress of its operations.
+          text: >
+            az group deployment create -g MyResourceGroup --template-file azuredeploy.json --watch
 """
 helps['group deployment export'] = """
     type: command
@@ -241,6 +273,14 @@ helps['group deployment export'] = """
 helps['group deployment validate'] = """
     type: command
     short-summary: Validate whether the specified template is syntactically correct and will be accepted by Azure Resource Manager.
+    long-summary: >
+        A local template file is checked first, without calling the service: expressions, references
+        to parameters and variables, resourceId() calls, parameter values and circular dependencies.
+        A template that passes is sent to Azure Resource Manager, unless the same template and
+        parameters were successfully validated for the resource group in the last hour. Set
+        'template_validation_cache_ttl' in the [resource] section of the configuration to change
+        this period in seconds, 0 disables the cache. Use --skip-local-validation if the local
+        checks reject a template the service accepts.
 """
 helps['group deployment wait'] = """
     type: command
@@ -36,7 +36,10 @@ register_cli_argument('resource', 'resource_type', arg_type=resource_type_type,
 register_cli_argument('resource', 'parent_resource_path', resource_parent_type)
 register_cli_argument('resource', 'tag', tag_type)
 register_cli_argument('resource', 'tags', tags_type)
+register_cli_argument('resource', 'resource_ids', options_list=('--ids',), nargs='+',
+                      help='One or more resource IDs (space delimited). The resources are processed concurrently and the status of each is returned.')
 register_cli_argument('resource list', 'name', resource_name_type)
+register_cli_argument('resource list', 'from_snapshot', action='store_true', help="Query the local snapshot created by 'az resource snapshot create' instead of the service. The tag filter can then be combined with the other filters.")
 register_cli_argument('resource move', 'ids', nargs='+')
 
 register_cli_argument('provider', 'top', ignore_type)
@@ -72,6 +75,8 @@ register_cli_argument('group deployment', 'template_uri', help='a uri to a remot
 register_cli_argument('group deployment', 'mode', help='Incremental (only add resources to resource group) or Complete (remove extra resources from resource group)', **enum_choice_list(DeploymentMode))
 register_cli_argument('group deployment create', 'deployment_name', options_list=('--name', '-n'), required=False,
                       validator=validate_deployment_name, help='The deployment name. Default to template file base name')
+register_cli_argument('group deployment create', 'watch', action='store_true', help='Report the deployment operations whose state changed while waiting for the deployment to complete.')
+register_cli_argument('group deployment validate', 'skip_local_validation', action='store_true', help='Send the template to the service without checking it locally first.')
 register_cli_argument('group deployment operation show', 'operation_ids', nargs='+', help='A list of operation ids to show')
 register_cli_argument('group export', 'include_comments', action='store_true')
 register_cli_argument('group export', 'include_parameter_default_value', action='store_true')
@@ -0,0 +1,115 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+from codecs import open as codecs_open
+from datetime import datetime
+
+from azure.cli.core._environment import get_config_dir
+from azure.cli.core.commands.arm import parse_resource_id
+from azure.cli.core.util import CLIError, write_file_atomically
+
+SNAPSHOT_VERSION = 1
+
+# the indexed fields of a resource; tags are indexed by key, then by value
+_INDEXED_FIELDS = ['type', 'resourceGroup', 'location']
+
+
+def get_snapshot_path(subscription_id):
+    return os.path.join(get_config_dir(), 'resourceSnapshots', '{}.json'.format(subscription_id))
+
+
+class ResourceSnapshot(object):
+    """ The resource inventory of a subscription at a point in time, with indexes on the resource
+    type, resource group, location and tags. Indexes map lower-cased values to the positions of
+    the matching resources, so combined filters are answered by intersecting them. """
+
+    def __init__(self, subscription_id, resources, created_at=None, indexes=None):
+        self.subscription_id = subscription_id
+        self.resources = resources
+        self.created_at = created_at or datetime.utcnow().isoformat()
+        self.indexes = indexes or self._build_indexes(resources)
+
+    @staticmethod
+    def _build_indexes(resources):
+        indexes = {field: {} for field in _INDEXED_FIELDS + ['tag']}
+        for position, resource in enumerate(resources):
+            values = {
+                'type': resource.get('type'),
+                'resourceGroup': parse_resource_id(resource['id']).get('resource_group'),
+                'location': resource.get('location')
+            }
+            for field in _INDEXED_FIELDS:
+                if values[field]:
+                    indexes[field].setdefault(values[field].lower(), []).append(position)
+            for key, value in (resource.get('tags') or {}).items():
+                indexes['tag'].setdefault(key.lower(), {}) \
+                    .setdefault((value or '').lower(), []).append(position)
+        return indexes
+
+    @classmethod
+    def load(cls, subscription_id):
+        path = get_snapshot_path(subscription_id)
+        try:
+            with codecs_open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, IOError):
+            raise CLIError("No resource snapshot of subscription '{}'. Create one with "
+                           "'az resource snapshot create'.".format(subscription_id))
+        except ValueError:
+            raise CLIError("The resource snapshot '{}' is corrupted. Create it again with "
+                           "'az resource snapshot create'.".format(path))
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise CLIError("The resource snapshot '{}' was created by another version of the "
+                           "CLI. Create it again with 'az resource snapshot create'.".format(path))
+        return cls(subscription_id, data['resources'], data['createdAt'], data['indexes'])
+
+    def save(self):
+        path = get_snapshot_path(self.subscription_id)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        data = {'version': SNAPSHOT_VERSION, 'subscriptionId': self.subscription_id,
+                'createdAt': self.created_at, 'resources': self.resources,
+                'indexes': self.indexes}
+        # a failed or concurrent write must not destroy the last snapshot
+        write_file_atomically(path, json.dumps(data, separators=(',', ':')))
+        return path
+
+    def _find_tag(self, tag_name, tag_value):
+        if tag_name.endswith('*'):
+            prefix = tag_name[:-1].lower()
+            keys = [k for k in self.indexes['tag'] if k.startswith(prefix)]
+        else:
+            keys = [tag_name.lower()]
+        positions = set()
+        for key in keys:
+            values = self.indexes['tag'].get(key, {})
+            if tag_value:
+                positions.update(values.get(tag_value.lower(), []))
+            else:
+                for matches in values.values():
+                    positions.update(matches)
+        return positions
+
+    def query(self, resource_group_name=None, resource_type=None, name=None, tag_name=None,
+              tag_value=None, location=None):
+        """ Returns the resources matching all of the given filters, in inventory order. Values
+        are compared case-insensitively, a tag name ending with '*' matches by prefix. """
+        candidates = None
+        for field, value in [('resourceGroup', resource_group_name), ('type', resource_type),
+                             ('location', location)]:
+            if value:
+                matches = set(self.indexes[field].get(value.lower(), []))
+                candidates = matches if candidates is None else candidates & matches
+        if tag_name:
+            matches = self._find_tag(tag_name, tag_value)
+            candidates = matches if candidates is None else candidates & matches
+        positions = range(len(self.resources)) if candidates is None else sorted(candidates)
+        resources = (self.resources[p] for p in positions)
+        if name:
+            name = name.lower()
+            resources = (r for r in resources if r.get('name', '').lower() == name)
+        return list(resources)
@@ -0,0 +1,360 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from six import string_types
+
+from azure.cli.core._config import az_config
+from azure.cli.core._environment import get_config_dir
+from azure.cli.core._session import Session
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+DEFAULT_VALIDATION_CACHE_TTL = 60 * 60
+
+_REFERENCE_REGEX = re.compile(r"\b(parameters|variables)\s*\(\s*'((?:[^']|'')*)'\s*\)",
+                              re.IGNORECASE)
+_RESOURCE_ID_REGEX = re.compile(r'\bresourceId\s*\(', re.IGNORECASE)
+_RESOURCE_TYPE_REGEX = re.compile(r'^[\w-]+(\.[\w-]+)+(/[\w-]+)+$')
+
+_PARAMETER_TYPES = {
+    'string': string_types,
+    'securestring': string_types,
+    'int': int,
+    'bool': bool,
+    'object': dict,
+    'secureobject': dict,
+    'array': list
+}
+
+# The template validation cache maps hashes of validation requests to the result of successful
+# validations by the service
+_VALIDATION_CACHE = Session(ignore_corrupt_file=True)
+_VALIDATION_CACHE_LOCK = threading.Lock()
+
+
+def _iter_expressions(value, path):
+    """ Yields (path, expression) for all the template language expressions in a JSON value. The
+    inline templates of nested deployments are skipped, they have their own scope. """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == 'template' and path.endswith('.properties') and \
+                    isinstance(item, dict) and 'resources' in item:
+                continue
+            for expression in _iter_expressions(item, '{}.{}'.format(path, key)):
+                yield expression
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            for expression in _iter_expressions(item, '{}[{}]'.format(path, index)):
+                yield expression
+    elif isinstance(value, string_types):
+        text = value.strip()
+        # '[[' escapes a literal string starting with '['
+        if text.startswith('[') and text.endswith(']') and not text.startswith('[['):
+            yield path, text[1:-1]
+
+
+def _check_syntax(expression):
+    """ Returns an error message if the quotes or parentheses of an expression don't match. """
+    depth = 0
+    in_string = False
+    index = 0
+    while index < len(expression):
+        char = expression[index]
+        if in_string:
+            if char == "'":
+                if expression[index + 1:index + 2] == "'":
+                    index += 1
+                else:
+                    in_string = False
+        elif char == "'":
+            in_string = True
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+            if depth < 0:
+                return "unexpected '{}'".format(char)
+        index += 1
+    if in_string:
+        return 'unterminated string'
+    if depth:
+        return 'unbalanced parentheses'
+    return None
+
+
+def _split_arguments(expression, start):
+    """ Splits the arguments of the function call whose '(' is at 'start'. """
+    arguments = []
+    depth = 0
+    in_string = False
+    current = start + 1
+    for index in range(start + 1, len(expression)):
+        char = expression[index]
+        if char == "'":
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char in '([':
+            depth += 1
+        elif char in ')]' and depth:
+            depth -= 1
+        elif char == ')' or (char == ',' and not depth):
+            arguments.append(expression[current:index].strip())
+            current = index + 1
+            if char == ')':
+                break
+    return [a for a in arguments if a]
+
+
+def _literal(argument):
+    if len(argument) > 1 and argument[0] == argument[-1] == "'":
+        return argument[1:-1].replace("''", "'")
+    return None
+
+
+def _parse_resource_id(expression):
+    """ Returns the (resource type, [resource name arguments]) of a resourceId() call, or None
+    if the resource type is not a literal. """
+    match = _RESOURCE_ID_REGEX.search(expression)
+    if not match:
+        return None
+    arguments = _split_arguments(expression, match.end() - 1)
+    # the resource type may follow the optional subscription id and resource group name
+    for index, argument in enumerate(arguments[:3]):
+        resource_type = _literal(argument)
+        if resource_type and _RESOURCE_TYPE_REGEX.match(resource_type):
+            return resource_type, arguments[index + 1:]
+    return None
+
+
+def _get_declared_variables(template):
+    variables = template.get('variables') or {}
+    declared = {k.lower() for k in variables}
+    # a 'copy' section declares the variables its loops create
+    copy_loops = variables.get('copy') if isinstance(variables, dict) else None
+    if isinstance(copy_loops, list):
+        declared.update(c['name'].lower() for c in copy_loops
+                        if isinstance(c, dict) and isinstance(c.get('name'), string_types))
+    return declared
+
+
+def _check_expressions(template, errors):
+    declared = {
+        'parameters': {k.lower() for k in template.get('parameters') or {}},
+        'variables': _get_declared_variables(template)
+    }
+    for section in ['parameters', 'variables', 'resources', 'outputs']:
+        for path, expression in _iter_expressions(template.get(section), section):
+            syntax_error = _check_syntax(expression)
+            if syntax_error:
+                errors.append("{}: invalid expression '[{}]': {}".format(path, expression,
+                                                                         syntax_error))
+                continue
+            for kind, name in _REFERENCE_REGEX.findall(expression):
+                if name.replace("''", "'").lower() not in declared[kind.lower()]:
+                    errors.append("{}: the {} '{}' is not defined in the template".format(
+                        path, kind.lower()[:-1], name))
+            for match in _RESOURCE_ID_REGEX.finditer(expression):
+                resource_id = _parse_resource_id(expression[match.start():])
+                if resource_id:
+                    resource_type, names = resource_id
+                    expected = resource_type.count('/')
+                    literals = [_literal(n) for n in names]
+                    # a name which isn't a literal may hold several segments
+                    if all(literal is not None for literal in literals):
+                        found = sum(literal.count('/') + 1 for literal in literals)
+                    else:
+                        found = len(names) if len(names) > expected else expected
+                    if found != expected:
+                        errors.append(
+                            "{}: resourceId() of type '{}' expects {} resource name(s), got {}"
+                            .format(path, resource_type, expected, found))
+
+
+def _check_parameters(template, parameters, errors):
+    declared = {k.lower(): v for k, v in (template.get('parameters') or {}).items()}
+    for name, parameter in (parameters or {}).items():
+        definition = declared.get(name.lower())
+        if definition is None:
+            errors.append("parameters: '{}' is not defined in the template".format(name))
+            continue
+        if not isinstance(parameter, dict) or 'value' not in parameter:
+            continue  # e.g. a key vault reference
+        value = parameter['value']
+        expected_type = _PARAMETER_TYPES.get(str(definition.get('type', '')).lower())
+        if expected_type is int and isinstance(value, bool) or \
+                expected_type and not isinstance(value, expected_type):
+            errors.append("parameters: '{}' expects a value of type '{}'".format(
+                name, definition.get('type')))
+        elif definition.get('allowedValues') and value not in definition['allowedValues']:
+            errors.append("parameters: '{}' must be one of {}".format(
+                name, definition['allowedValues']))
+
+
+def _get_resource_key(resource_type, name):
+    """ The type and name of a resource, with expressions normalized, to match dependencies. """
+    name = name.strip()
+    if name.startswith('[') and name.endswith(']'):
+        name = re.sub(r'\s+', '', name[1:-1])
+    else:
+        name = "'{}'".format(name.replace("'", "''"))
+    return resource_type.lower(), name.lower()
+
+
+def _resolve_dependency(dependency, lookup):
+    """ Returns the index of the resource a 'dependsOn' entry refers to, or None if it can't be
+    resolved locally. """
+    if dependency.startswith('[') and dependency.endswith(']'):
+        resource_id = _parse_resource_id(dependency[1:-1])
+        if not resource_id or not resource_id[1]:
+            return None
+        resource_type, names = resource_id
+        literals = [_literal(n) for n in names]
+        if all(literal is not None for literal in literals):
+            key = _get_resource_key(resource_type, '/'.join(literals))
+        elif len(names) == 1:
+            key = _get_resource_key(resource_type, '[{}]'.format(names[0]))
+        else:
+            return None
+        matches = lookup.get(key, [])
+    else:
+        # a resource name, optionally prefixed with its type
+        matches = lookup.get(dependency.lower(), [])
+    return matches[0] if len(matches) == 1 else None
+
+
+def _check_resources(template, errors):
+    resources = template.get('resources')
+    if not isinstance(resources, list):
+        errors.append("resources: a template must have a list of resources")
+        return
+    # the resources by key, by literal name and by literal type/name
+    lookup = {}
+    for index, resource in enumerate(resources):
+        path = 'resources[{}]'.format(index)
+        if not isinstance(resource, dict):
+            errors.append('{}: a resource must be an object'.format(path))
+            continue
+        for prop in ['type', 'name', 'apiVersion']:
+            if not isinstance(resource.get(prop), string_types):
+                errors.append("{}: the property '{}' is required".format(path, prop))
+        resource_type, name = resource.get('type'), resource.get('name')
+        if isinstance(resource_type, string_types) and isinstance(name, string_types):
+            lookup.setdefault(_get_resource_key(resource_type, name), []).append(index)
+            if not name.strip().startswith('['):
+                lookup.setdefault(name.lower(), []).append(index)
+                lookup.setdefault('{}/{}'.format(resource_type, name).lower(), []).append(index)
+
+    dependencies = []
+    for resource in resources:
+        depends_on = resource.get('dependsOn') if isinstance(resource, dict) else None
+        resolved = [_resolve_dependency(d.strip(), lookup) for d in depends_on or []
+                    if isinstance(d, string_types)]
+        dependencies.append([d for d in resolved if d is not None])
+    cycle = _find_cycle(dependencies)
+    if cycle:
+        errors.append('resources: circular dependency between {}'.format(
+            ' -> '.join(resources[i]['name'] for i in cycle)))
+
+
+def _find_cycle(dependencies):
+    """ Returns the indexes of the resources in a dependency cycle, or None. The graph is walked
+    depth first without recursion, templates can have hundreds of resources. """
+    visited = set()
+    for root in range(len(dependencies)):
+        if root in visited:
+            continue
+        path = [root]
+        stack = [iter(dependencies[root])]
+        on_path = {root}
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                done = path.pop()
+                visited.add(done)
+                on_path.discard(done)
+                stack.pop()
+                continue
+            if dependency in on_path:
+                return path[path.index(dependency):] + [dependency]
+            if dependency not in visited:
+                path.append(dependency)
+                on_path.add(dependency)
+                stack.append(iter(dependencies[dependency]))
+    return None
+
+
+def validate_template_locally(template, parameters=None):
+    """ Checks a template and its parameters without calling the service: the syntax of
+    expressions, references to parameters and variables, resourceId() calls, the parameter
+    values and dependency cycles between the resources. Returns a list of likely errors. Only
+    what can be decided locally is reported, anything else is left for the service to validate.
+    """
+    if not isinstance(template, dict):
+        return ['the template must be a JSON object']
+    errors = []
+    _check_parameters(template, parameters, errors)
+    _check_expressions(template, errors)
+    _check_resources(template, errors)
+    return errors
+
+
+def get_validation_cache_key(*args):
+    """ A hash of everything that is sent to the service for the validation. """
+    content = json.dumps(args, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _get_validation_cache_ttl():
+    return az_config.getint('resource', 'template_validation_cache_ttl',
+                            fallback=DEFAULT_VALIDATION_CACHE_TTL)
+
+
+def _load_validation_cache():
+    # the session is replaced atomically on save and a corrupt file is loaded as an empty cache
+    if not _VALIDATION_CACHE.filename:
+        try:
+            _VALIDATION_CACHE.load(os.path.join(get_config_dir(),
+                                                'templateValidationCache.json'))
+        except (OSError, IOError) as ex:
+            logger.debug('Unable to load the template validation cache: %s', ex)
+
+
+def get_cached_validation(key):
+    """ Returns the result of a previous successful validation, or None. """
+    ttl = _get_validation_cache_ttl()
+    if ttl <= 0:
+        return None
+    with _VALIDATION_CACHE_LOCK:
+        _load_validation_cache()
+        entry = _VALIDATION_CACHE.get(key)
+    if entry and entry['timestamp'] + ttl >= time.time():
+        return entry['result']
+    return None
+
+
+def cache_validation(key, result):
+    ttl = _get_validation_cache_ttl()
+    if ttl <= 0:
+        return
+    now = time.time()
+    with _VALIDATION_CACHE_LOCK:
+        _load_validation_cache()
+        # drop the expired entries, so the cache doesn't grow with every template version
+        _VALIDATION_CACHE.data = {k: v for k, v in _VALIDATION_CACHE.data.items()
+                                  if v['timestamp'] + ttl >= now}
+        _VALIDATION_CACHE.data[key] = {'timestamp': now, 'result': result}
+        try:
+            _VALIDATION_CACHE.save_with_retry()
+        except (OSError, IOError) as ex:
+            logger.debug('Unable to save the template validation cache: %s', ex)
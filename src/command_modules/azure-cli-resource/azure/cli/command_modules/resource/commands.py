@@ -42,7 +42,7 @@ def transform_resource_list(result):
             ('Location', r['location']), ('Type', r['type'])])
         try:
             res['Status'] = r['properties']['provisioningStatus']
-        except TypeError:
+        except (KeyError, TypeError):
             res['Status'] = ' '
         transformed.append(res)
     return transformed
@@ -52,6 +52,8 @@ cli_command(__name__, 'resource show', 'azure.cli.command_modules.resource.custo
 cli_command(__name__, 'resource list', 'azure.cli.command_modules.resource.custom#list_resources', table_transformer=transform_resource_list)
 cli_command(__name__, 'resource tag', 'azure.cli.command_modules.resource.custom#tag_resource')
 cli_command(__name__, 'resource move', 'azure.cli.command_modules.resource.custom#move_resource')
+cli_command(__name__, 'resource snapshot create', 'azure.cli.command_modules.resource.custom#create_resource_snapshot')
+cli_command(__name__, 'resource snapshot delete', 'azure.cli.command_modules.resource.custom#delete_resource_snapshot')
 
 # Resource provider commands
 cli_command(__name__, 'provider list', 'azure.mgmt.resource.resources.operations.providers_operations#ProvidersOperations.list', cf_providers)
@@ -10,6 +10,7 @@ import json
 import os
 import re
 import uuid
+from collections import OrderedDict
 
 from azure.mgmt.resource.resources.models import GenericResource
 
@@ -94,14 +95,31 @@ def export_group_as_template(
 
 def deploy_arm_template(
         resource_group_name, template_file=None, template_uri=None, deployment_name=None,
-        parameters=None, mode='incremental', no_wait=False):
-    return _deploy_arm_template_core(resource_group_name, template_file, template_uri,
-                                     deployment_name, parameters, mode, no_wait=no_wait)
+        parameters=None, mode='incremental', no_wait=False, watch=False):
+    """
+    :param watch: Report the deployment operations whose state changed while waiting for the
+     deployment to complete.
+    """
+    if watch and no_wait:
+        raise CLIError('usage error: --watch | --no-wait')
+    poller = _deploy_arm_template_core(resource_group_name, template_file, template_uri,
+                                       deployment_name, parameters, mode, no_wait=no_wait)
+    if watch:
+        smc = get_mgmt_service_client(ResourceType.MGMT_RESOURCE_RESOURCES)
+        _DeploymentWatcher(smc.deployment_operations, resource_group_name,
+                           deployment_name).watch(poller)
+    return poller
+
 
 def validate_arm_template(resource_group_name, template_file=None, template_uri=None,
-                          parameters=None, mode='incremental'):
+                          parameters=None, mode='incremental', skip_local_validation=False):
+    """
+    :param skip_local_validation: Send the template to the service without checking it locally
+     first.
+    """
     return _deploy_arm_template_core(resource_group_name, template_file, template_uri,
-                                     'deployment_dry_run', parameters, mode, validate_only=True)
+                                     'deployment_dry_run', parameters, mode, validate_only=True,
+                                     skip_local_validation=skip_local_validation)
 
 def _find_missing_parameters(parameters, template):
     if template is None:
@@ -167,7 +185,7 @@ def _merge_parameters(parameter_list):
 
 def _deploy_arm_template_core(resource_group_name, template_file=None, template_uri=None,
                               deployment_name=None, parameter_list=None, mode='incremental',
-                              validate_only=False, no_wait=False):
+                              validate_only=False, no_wait=False, skip_local_validation=False):
     DeploymentProperties, TemplateLink = get_sdk(ResourceType.MGMT_RESOURCE_RESOURCES,
                                                  'DeploymentProperties',
                                                  'TemplateLink',
@@ -196,13 +214,44 @@ def _deploy_arm_template_core(resource_group_name, template_file=None, template_
 
     smc = get_mgmt_service_client(ResourceType.MGMT_RESOURCE_RESOURCES)
     if validate_only:
-        return smc.deployments.validate(resource_group_name, deployment_name,
-                                        properties, raw=no_wait)
+        return _validate_deployment(smc, resource_group_name, deployment_name, properties,
+                                    no_wait, skip_local_validation)
     else:
         return smc.deployments.create_or_update(resource_group_name, deployment_name,
                                                 properties, raw=no_wait)
 
 
+def _validate_deployment(smc, resource_group_name, deployment_name, properties, no_wait=False,
+                         skip_local_validation=False):
+    """ Check the template locally first, then send it to the service unless the same template
+    and parameters were validated successfully before. """
+    from azure.cli.core.util import todict
+    from ._template_validation import (validate_template_locally, get_validation_cache_key,
+                                       get_cached_validation, cache_validation)
+    if properties.template is None or no_wait:
+        # a linked template can change without the uri changing
+        return smc.deployments.validate(resource_group_name, deployment_name,
+                                        properties, raw=no_wait)
+
+    errors = None if skip_local_validation else \
+        validate_template_locally(properties.template, properties.parameters)
+    if errors:
+        raise CLIError('The template is not valid:\n{}\nUse --skip-local-validation to have '
+                       'the service validate it anyway.'.format('\n'.join(errors)))
+
+    mode = getattr(properties.mode, 'value', properties.mode)
+    key = get_validation_cache_key(smc.config.subscription_id, resource_group_name.lower(),
+                                   mode, properties.template, properties.parameters)
+    result = get_cached_validation(key)
+    if result is not None:
+        logger.info('The template and parameters were validated before, using the cached result')
+        return result
+    result = smc.deployments.validate(resource_group_name, deployment_name, properties)
+    if result.error is None:
+        cache_validation(key, todict(result))
+    return result
+
+
 def export_deployment_as_template(resource_group_name, deployment_name):
     smc = get_mgmt_service_client(ResourceType.MGMT_RESOURCE_RESOURCES)
     result = smc.deployments.export_template(resource_group_name, deployment_name)
@@ -210,7 +259,14 @@ def export_deployment_as_template(resource_group_name, deployment_name):
 
 def show_resource(resource_group_name=None, resource_provider_namespace=None,
                   parent_resource_path=None, resource_type=None, resource_name=None,
-                  resource_id=None, api_version=None):
+                  resource_id=None, api_version=None, resource_ids=None):
+    ''' Get the details of a resource.
+    :param resource_ids: One or more resource IDs. The resources are retrieved concurrently and
+     the status of each is reported.
+    '''
+    if resource_ids:
+        return _check_bulk_resource_statuses(_run_bulk_resource_operation(
+            resource_ids, api_version, lambda res: res.get_resource()))
     res = _ResourceUtils(resource_group_name, resource_provider_namespace,
                          parent_resource_path, resource_type, resource_name,
                          resource_id, api_version)
@@ -218,7 +274,14 @@ def show_resource(resource_group_name=None, resource_provider_namespace=None,
 
 def delete_resource(resource_group_name=None, resource_provider_namespace=None,
                     parent_resource_path=None, resource_type=None, resource_name=None,
-                    resource_id=None, api_version=None):
+                    resource_id=None, api_version=None, resource_ids=None):
+    ''' Delete a resource.
+    :param resource_ids: One or more resource IDs. The resources are deleted concurrently and
+     the status of each is reported.
+    '''
+    if resource_ids:
+        return _check_bulk_resource_statuses(_run_bulk_resource_operation(
+            resource_ids, api_version, lambda res: res.delete(), 'Deleting'))
     res = _ResourceUtils(resource_group_name, resource_provider_namespace,
                          parent_resource_path, resource_type, resource_name,
                          resource_id, api_version)
@@ -236,35 +299,115 @@ def update_resource(parameters, resource_group_name=None, resource_provider_name
 
 def tag_resource(tags, resource_group_name=None, resource_provider_namespace=None,
                  parent_resource_path=None, resource_type=None, resource_name=None,
-                 resource_id=None, api_version=None):
+                 resource_id=None, api_version=None, resource_ids=None):
     ''' Updates the tags on an existing resource. To clear tags, specify the --tag option
-    without anything else. '''
+    without anything else.
+    :param resource_ids: One or more resource IDs. The resources are tagged concurrently and
+     the status of each is reported.
+    '''
+    if resource_ids:
+        return _check_bulk_resource_statuses(_run_bulk_resource_operation(
+            resource_ids, api_version, lambda res: res.tag(tags), 'Tagging'))
     res = _ResourceUtils(resource_group_name, resource_provider_namespace,
                          parent_resource_path, resource_type, resource_name,
                          resource_id, api_version)
     return res.tag(tags)
 
+
+_MAX_DEPLOYMENT_OPERATION_WORKERS = 16
+
+
 def get_deployment_operations(client, resource_group_name, deployment_name, operation_ids):
     """get a deployment's operation.
     """
-    result = []
-    for op_id in operation_ids:
-        dep = client.get(resource_group_name, deployment_name, op_id)
-        result.append(dep)
-    return result
+    from concurrent.futures import ThreadPoolExecutor
+    if len(operation_ids) < 2:
+        return [client.get(resource_group_name, deployment_name, op_id) for op_id in operation_ids]
+    workers = min(len(operation_ids), _MAX_DEPLOYMENT_OPERATION_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda op_id: client.get(resource_group_name, deployment_name,
+                                                          op_id),
+                                 operation_ids))
+
+
+class _DeploymentWatcher(object):
+    """ Reports the deployment operations whose state changed since the last check, while a
+    deployment is running. The service has no conditional or incremental listing of deployment
+    operations, so the checks back off while nothing changes and speed up again when it does;
+    operations which reached a terminal state are only reported once. """
+
+    def __init__(self, client, resource_group_name, deployment_name, strategy=None):
+        self._client = client
+        self._resource_group_name = resource_group_name
+        self._deployment_name = deployment_name
+        self._strategy = strategy
+        self._states = {}
+
+    def watch(self, poller, delay=None):
+        from azure.cli.core.commands._polling import get_polling_strategy
+        import time
+        strategy = self._strategy or get_polling_strategy()
+        delay = delay or time.sleep
+        attempt = 0
+        while not poller.done():
+            attempt = 0 if self.check() else attempt + 1
+            delay(strategy.get_delay(attempt))
+        self.check()
+
+    def check(self):
+        """ Lists the deployment operations once and reports the changed ones. Returns the
+        changed operations. """
+        from msrestazure.azure_exceptions import CloudError
+        try:
+            operations = list(self._client.list(self._resource_group_name,
+                                                self._deployment_name))
+        except CloudError as ex:
+            if ex.status_code == 404:  # the deployment isn't created yet
+                return []
+            raise
+        changed = []
+        for operation in operations:
+            properties = operation.properties
+            if properties is None:
+                continue
+            state = (properties.provisioning_state, properties.status_code)
+            if self._states.get(operation.operation_id) != state:
+                self._states[operation.operation_id] = state
+                changed.append(operation)
+                self._report(operation)
+        return changed
+
+    @staticmethod
+    def _report(operation):
+        properties = operation.properties
+        target = properties.target_resource
+        resource = '{} {}'.format(target.resource_type, target.resource_name) if target \
+            else operation.operation_id
+        if (properties.provisioning_state or '').lower() == 'failed':
+            logger.warning('%s: %s %s', resource, properties.provisioning_state,
+                           json.dumps(properties.status_message))
+        else:
+            logger.warning('%s: %s', resource, properties.provisioning_state)
+
 
 def list_resources(resource_group_name=None, resource_provider_namespace=None,
-                   resource_type=None, name=None, tag=None, location=None):
+                   resource_type=None, name=None, tag=None, location=None, from_snapshot=False):
     rcf = _resource_client_factory()
 
+    if from_snapshot:
+        return _list_resources_from_snapshot(rcf.config.subscription_id, resource_group_name,
+                                             resource_provider_namespace, resource_type, name,
+                                             tag, location)
+
     if resource_group_name is not None:
         rcf.resource_groups.get(resource_group_name)
 
     odata_filter = _list_resources_odata_filter_builder(resource_group_name,
                                                         resource_provider_namespace,
                                                         resource_type, name, tag, location)
-    resources = rcf.resources.list(filter=odata_filter)
-    return list(resources)
+    # paged, so the results can be streamed to the output
+    return rcf.resources.list(filter=odata_filter)
+
 
 def _list_resources_odata_filter_builder(resource_group_name=None,
                                          resource_provider_namespace=None, resource_type=None,
@@ -282,20 +425,9 @@ def _list_resources_odata_filter_builder(resource_group_name=None,
     if location:
         filters.append("location eq '{}'".format(location))
 
-    if resource_type:
-        if resource_provider_namespace:
-            f = "'{}/{}'".format(resource_provider_namespace, resource_type)
-        else:
-            if not re.match('[^/]+/[^/]+', resource_type):
-                raise CLIError(
-                    'Malformed resource-type: '
-                    '--resource-type=<namespace>/<resource-type> expected.')
-            #assume resource_type is <namespace>/<type>. The worst is to get a server error
-            f = "'{}'".format(resource_type)
-        filters.append("resourceType eq " + f)
-    else:
-        if resource_provider_namespace:
-            raise CLIError('--namespace also requires --resource-type')
+    full_resource_type = _get_full_resource_type(resource_provider_namespace, resource_type)
+    if full_resource_type:
+        filters.append("resourceType eq '{}'".format(full_resource_type))
 
     if tag:
         if name or location:
@@ -312,6 +444,77 @@ def _list_resources_odata_filter_builder(resource_group_name=None,
                     filters.append("tagvalue eq '%s'" % tag_value)
     return ' and '.join(filters)
 
+
+def _get_full_resource_type(resource_provider_namespace, resource_type):
+    if resource_type:
+        if resource_provider_namespace:
+            return '{}/{}'.format(resource_provider_namespace, resource_type)
+        if not re.match('[^/]+/[^/]+', resource_type):
+            raise CLIError(
+                'Malformed resource-type: '
+                '--resource-type=<namespace>/<resource-type> expected.')
+        #assume resource_type is <namespace>/<type>. The worst is to get a server error
+        return resource_type
+    elif resource_provider_namespace:
+        raise CLIError('--namespace also requires --resource-type')
+    return None
+
+
+def _list_resources_from_snapshot(subscription_id, resource_group_name=None,
+                                  resource_provider_namespace=None, resource_type=None,
+                                  name=None, tag=None, location=None):
+    from ._snapshot import ResourceSnapshot
+    snapshot = ResourceSnapshot.load(subscription_id)
+    logger.info('Listing resources from the snapshot created at %s', snapshot.created_at)
+    tag_name = list(tag.keys())[0] if isinstance(tag, dict) and tag else tag
+    tag_value = tag[tag_name] if isinstance(tag, dict) and tag else None
+    # unlike the service, the snapshot can combine the tag filter with any other filter
+    return snapshot.query(resource_group_name=resource_group_name,
+                          resource_type=_get_full_resource_type(resource_provider_namespace,
+                                                                resource_type),
+                          name=name, tag_name=tag_name, tag_value=tag_value, location=location)
+
+
+_MAX_SNAPSHOT_WORKERS = 8
+
+
+def create_resource_snapshot():
+    """ Save the resource inventory of the current subscription locally, so 'az resource list
+    --from-snapshot' can query it without calling the service. """
+    from concurrent.futures import ThreadPoolExecutor
+    from msrestazure.azure_exceptions import CloudError
+    from azure.cli.core.util import todict
+    from ._snapshot import ResourceSnapshot
+    rcf = _resource_client_factory()
+    groups = [g.name for g in rcf.resource_groups.list()]
+
+    def _list_group_resources(group):
+        try:
+            # stored as listed by the service, so the output matches 'az resource list'
+            return [todict(r) for r in rcf.resource_groups.list_resources(group)]
+        except CloudError as ex:
+            if ex.status_code == 404:  # the group was deleted since it was listed
+                return []
+            raise
+
+    with ThreadPoolExecutor(max_workers=_MAX_SNAPSHOT_WORKERS) as executor:
+        pages = list(executor.map(_list_group_resources, groups))
+    snapshot = ResourceSnapshot(rcf.config.subscription_id, [r for p in pages for r in p])
+    path = snapshot.save()
+    return OrderedDict([('subscriptionId', snapshot.subscription_id),
+                        ('createdAt', snapshot.created_at),
+                        ('resourceGroups', len(groups)),
+                        ('resources', len(snapshot.resources)),
+                        ('path', path)])
+
+
+def delete_resource_snapshot():
+    from ._snapshot import get_snapshot_path
+    path = get_snapshot_path(_resource_client_factory().config.subscription_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+
 def get_providers_completion_list(prefix, **kwargs): #pylint: disable=unused-argument
     rcf = _resource_client_factory()
     result = rcf.providers.list()
@@ -333,11 +536,13 @@ def unregister_provider(resource_provider_namespace):
     _update_provider(resource_provider_namespace, registering=False)
 
 def _update_provider(namespace, registering):
+    from azure.cli.core.commands.arm import invalidate_provider_cache
     rcf = _resource_client_factory()
     if registering:
         rcf.providers.register(namespace)
     else:
         rcf.providers.unregister(namespace)
+    invalidate_provider_cache(namespace)
 
     #timeout'd, normal for resources with many regions, but let users know.
     action = 'Registering' if registering else 'Unregistering'
@@ -704,6 +909,73 @@ def list_resource_links(scope=None, filter_string=None):
         return links_client.list_at_source_scope(scope, filter=filter_string)
     return links_client.list_at_subscription(filter=filter_string)
 
+
+_MAX_BULK_RESOURCE_WORKERS = 16
+
+
+def _run_bulk_resource_operation(resource_ids, api_version, operation, description=None,
+                                 rcf=None, max_workers=_MAX_BULK_RESOURCE_WORKERS):
+    ''' Run an operation on many generic resources concurrently. The resources are grouped by
+    the provider resource type their API version comes from, so it is resolved once per group.
+    Returns the status of each resource, in the order of the IDs.
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+    from msrestazure.azure_operation import AzureOperationPoller
+    from azure.cli.core.commands import LongRunningOperation
+
+    rcf = rcf or _resource_client_factory()
+    resource_ids = list(OrderedDict.fromkeys(resource_ids))
+
+    # the API version (or the error resolving it) of each provider resource type, and of each ID
+    type_api_versions = {}
+    api_versions = {}
+    for resource_id in resource_ids:
+        if not is_valid_resource_id(resource_id):
+            raise CLIError("'{}' is not a valid resource ID.".format(resource_id))
+        if api_version:
+            continue
+        namespace, parent, resource_type = _ResourceUtils._get_api_version_type(resource_id)
+        key = (namespace.lower(), (parent.split('/')[0] if parent else resource_type).lower())
+        if key not in type_api_versions:
+            try:
+                type_api_versions[key] = _ResourceUtils._resolve_api_version(
+                    rcf, namespace, parent, resource_type)
+            except Exception as ex:  # pylint: disable=broad-except
+                # reported for the IDs of this resource type, the others still run
+                type_api_versions[key] = ex
+        api_versions[resource_id] = type_api_versions[key]
+
+    def _run(resource_id):
+        status = {'id': resource_id, 'status': 'Succeeded', 'error': None, 'result': None}
+        try:
+            version = api_version or api_versions[resource_id]
+            if isinstance(version, Exception):
+                raise version
+            result = operation(_ResourceUtils(resource_id=resource_id, api_version=version,
+                                              rcf=rcf))
+            if isinstance(result, AzureOperationPoller):
+                result = LongRunningOperation('{} {}'.format(description, resource_id))(result)
+            status['result'] = result
+        except Exception as ex:  # pylint: disable=broad-except
+            # any error only fails this resource, the statuses of the others are still reported
+            status['status'] = 'Failed'
+            status['error'] = str(ex)
+        return status
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run, resource_ids))
+
+
+def _check_bulk_resource_statuses(statuses):
+    ''' Log the resources the bulk operation failed on and fail the command if there are any. '''
+    failed = [s for s in statuses if s['error']]
+    if failed:
+        for status in failed:
+            logger.error('%s: %s', status['id'], status['error'])
+        raise CLIError('{} of {} resources failed.'.format(len(failed), len(statuses)))
+    return statuses
+
+
 def _validate_resource_inputs(resource_group_name, resource_provider_namespace,
                               resource_type, resource_name):
     if resource_group_name is None:
@@ -812,14 +1084,13 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
 
     @staticmethod
     def _resolve_api_version(rcf, resource_provider_namespace, parent_resource_path, resource_type):
-        provider = rcf.providers.get(resource_provider_namespace)
+        from azure.cli.core.commands.arm import find_provider_resource_types
 
         #If available, we will use parent resource's api-version
         resource_type_str = (parent_resource_path.split('/')[0]
                              if parent_resource_path else resource_type)
 
-        rt = [t for t in provider.resource_types
-              if t.resource_type.lower() == resource_type_str.lower()]
+        rt = find_provider_resource_types(rcf, resource_provider_namespace, resource_type_str)
         if not rt:
             raise IncorrectUsageError('Resource type {} not found.'
                                       .format(resource_type_str))
@@ -833,6 +1104,13 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
 
     @staticmethod
     def _resolve_api_version_by_id(rcf, resource_id):
+        namespace, parent, resource_type = _ResourceUtils._get_api_version_type(resource_id)
+        return _ResourceUtils._resolve_api_version(rcf, namespace, parent, resource_type)
+
+    @staticmethod
+    def _get_api_version_type(resource_id):
+        ''' Get the namespace, parent path and type of a resource ID, which determine the
+        API version to use. '''
         parts = parse_resource_id(resource_id)
         namespace = parts.get('child_namespace', parts['namespace'])
         if parts.get('grandchild_type'):
@@ -851,4 +1129,4 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
             parent = None
             resource_type = parts['type']
 
-        return _ResourceUtils._resolve_api_version(rcf, namespace, parent, resource_type)
+        return namespace, parent, resource_type
@@ -5,13 +5,13 @@
 
 import unittest
 try:
-    from unittest.mock import MagicMock
+    from unittest.mock import MagicMock, patch
 except ImportError:
-    from mock import MagicMock
+    from mock import MagicMock, patch
 
 from azure.cli.core.util import CLIError
 # pylint: disable=line-too-long
-from azure.cli.command_modules.resource.custom  import _ResourceUtils, _validate_resource_inputs, parse_resource_id
+from azure.cli.command_modules.resource.custom  import _ResourceUtils, _validate_resource_inputs, parse_resource_id, _run_bulk_resource_operation, tag_resource
 
 class TestApiCheck(unittest.TestCase):
 
@@ -65,6 +65,75 @@ class TestApiCheck(unittest.TestCase):
         res_utils = _ResourceUtils(resource_type='Mock/preview', resource_name='vnet1', resource_group_name='rg', rcf=rcf)
         self.assertEqual(res_utils.api_version, "2005-01-01-preview")
 
+    def test_bulk_resource_operation_resolves_api_version_per_type(self):
+        rcf = self._get_mock_client()
+        ids = ['/subscriptions/sub/resourceGroups/rg/providers/Mock/test/res{}'.format(i) for i in range(3)] + \
+              ['/subscriptions/sub/resourceGroups/rg/providers/Mock/foo/parent/test/child',
+               '/subscriptions/sub/resourceGroups/rg/providers/Mock/missing/res']
+
+        def get_by_id(resource_id, api_version):
+            if resource_id.endswith('res2'):
+                raise CLIError('boom')
+            return (resource_id, api_version)
+        rcf.resources.get_by_id.side_effect = get_by_id
+
+        results = _run_bulk_resource_operation(ids + ids[:1], None, lambda res: res.get_resource(), rcf=rcf)
+
+        self.assertEqual([r['id'] for r in results], ids)
+        self.assertEqual([r['status'] for r in results], ['Succeeded', 'Succeeded', 'Failed', 'Succeeded', 'Failed'])
+        self.assertEqual(results[0]['result'], (ids[0], '2016-01-01'))
+        self.assertEqual(results[3]['result'], (ids[3], '1999-01-01'))
+        self.assertEqual(results[2]['error'], 'boom')
+        self.assertIn('missing', results[4]['error'])
+        # once per resource type, and the unknown one refreshes the provider metadata once
+        self.assertEqual(rcf.providers.get.call_count, 2)
+        self.assertEqual(rcf.resources.get_by_id.call_count, 4)
+
+    def test_bulk_resource_operation_reports_api_version_errors_per_id(self):
+        from msrestazure.azure_exceptions import CloudError
+        from requests.exceptions import ConnectionError  # pylint: disable=redefined-builtin
+        rcf = self._get_mock_client()
+        provider = rcf.providers.get.return_value
+        response = MagicMock(status_code=403)
+
+        def get_provider(namespace):
+            if namespace == 'Denied':
+                raise CloudError(response, 'forbidden')
+            if namespace == 'Unreachable':
+                raise ConnectionError('connection reset')
+            return provider
+        rcf.providers.get.side_effect = get_provider
+        rcf.resources.get_by_id.side_effect = lambda resource_id, api_version: resource_id
+        ids = ['/subscriptions/sub/resourceGroups/rg/providers/Denied/test/res',
+               '/subscriptions/sub/resourceGroups/rg/providers/Unreachable/test/res',
+               '/subscriptions/sub/resourceGroups/rg/providers/Mock/test/res']
+
+        results = _run_bulk_resource_operation(ids, None, lambda res: res.get_resource(), rcf=rcf)
+
+        self.assertEqual([r['status'] for r in results], ['Failed', 'Failed', 'Succeeded'])
+        self.assertIsNotNone(results[0]['error'])
+        self.assertEqual(results[1]['error'], 'connection reset')
+        self.assertEqual(results[2]['result'], ids[2])
+
+    def test_bulk_resource_command_fails_if_any_resource_failed(self):
+        rcf = self._get_mock_client()
+        ids = ['/subscriptions/sub/resourceGroups/rg/providers/Mock/test/res{}'.format(i) for i in range(3)]
+
+        def update(resource_id, api_version, parameters):
+            if resource_id.endswith('res1'):
+                raise CLIError('boom')
+            return parameters
+        rcf.resources.get_by_id.return_value = MagicMock(tags={})
+        rcf.resources.create_or_update_by_id.side_effect = update
+
+        with patch('azure.cli.command_modules.resource.custom._resource_client_factory', return_value=rcf), \
+                patch('azure.cli.command_modules.resource.custom.logger') as logger_mock:
+            with self.assertRaisesRegexp(CLIError, '1 of 3 resources failed'):
+                tag_resource({'env': 'test'}, resource_ids=ids)
+        # the others are still tagged, and the failed resource is logged
+        self.assertEqual(rcf.resources.create_or_update_by_id.call_count, 3)
+        logger_mock.error.assert_called_once_with('%s: %s', ids[1], 'boom')
+
     def _get_mock_client(self):
         client = MagicMock()
         provider = MagicMock()
@@ -0,0 +1,80 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+import mock
+
+from azure.mgmt.resource.resources.models import (DeploymentOperation,
+                                                  DeploymentOperationProperties, TargetResource)
+
+from azure.cli.core.commands._polling import PollingStrategy
+from azure.cli.command_modules.resource.custom import (_DeploymentWatcher,
+                                                       get_deployment_operations)
+
+
+def _operation(operation_id, state, resource_name='res'):
+    operation = DeploymentOperation()
+    operation.operation_id = operation_id
+    operation.properties = DeploymentOperationProperties()
+    operation.properties.provisioning_state = state
+    operation.properties.target_resource = TargetResource(resource_name=resource_name,
+                                                          resource_type='Microsoft.Web/sites')
+    return operation
+
+
+class PollerStub(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, checks_until_done):
+        self.checks_until_done = checks_until_done
+
+    def done(self):
+        self.checks_until_done -= 1
+        return self.checks_until_done < 0
+
+
+class TestDeploymentOperations(unittest.TestCase):
+
+    def test_get_deployment_operations_concurrently(self):
+        client = mock.MagicMock()
+        client.get.side_effect = lambda _, __, op_id: op_id.upper()
+
+        ids = ['op{}'.format(i) for i in range(20)]
+        self.assertEqual(get_deployment_operations(client, 'rg', 'dep', ids),
+                         [i.upper() for i in ids])
+        self.assertEqual(client.get.call_count, 20)
+        self.assertEqual(get_deployment_operations(client, 'rg', 'dep', ['op1']), ['OP1'])
+
+    @mock.patch('azure.cli.command_modules.resource.custom.logger', autospec=True)
+    def test_deployment_watcher_reports_changes(self, logger_mock):
+        ticks = [
+            [],
+            [_operation('1', 'Running', 'site1')],
+            [_operation('1', 'Running', 'site1'), _operation('2', 'Running', 'site2')],
+            [_operation('1', 'Running', 'site1'), _operation('2', 'Running', 'site2')],
+            [_operation('1', 'Succeeded', 'site1'), _operation('2', 'Running', 'site2')],
+            [_operation('1', 'Succeeded', 'site1'), _operation('2', 'Succeeded', 'site2')]
+        ]
+        client = mock.MagicMock()
+        client.list.side_effect = lambda *_: iter(ticks.pop(0))
+        delays = []
+
+        watcher = _DeploymentWatcher(client, 'rg', 'dep', PollingStrategy(1, 8, factor=2))
+        watcher.watch(PollerStub(5), delay=delays.append)
+
+        reported = [c[0][1:] for c in logger_mock.warning.call_args_list]
+        self.assertEqual(reported, [('Microsoft.Web/sites site1', 'Running'),
+                                    ('Microsoft.Web/sites site2', 'Running'),
+                                    ('Microsoft.Web/sites site1', 'Succeeded'),
+                                    ('Microsoft.Web/sites site2', 'Succeeded')])
+        client.list.assert_called_with('rg', 'dep')
+        # checks back off while nothing changes, and speed up again after a change
+        self.assertEqual(len(delays), 5)
+        backed_off = [d > 1 for d in delays]
+        self.assertEqual(backed_off, [True, False, False, True, False], delays)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from azure.mgmt.resource.resources.models import GenericResource, ResourceGroup
+
+from azure.cli.core._output import format_table, CommandResultItem
+from azure.cli.core.extensions.transform import _add_resource_group
+from azure.cli.core.util import CLIError, todict
+from azure.cli.command_modules.resource.commands import transform_resource_list
+from azure.cli.command_modules.resource.custom import (create_resource_snapshot,
+                                                       delete_resource_snapshot, list_resources)
+
+RESOURCE_ID = '/subscriptions/sub/resourceGroups/{}/providers/{}/{}'
+
+
+def _resource(group, resource_type, name, location, tags=None):
+    resource = GenericResource(location=location, tags=tags)
+    resource.id = RESOURCE_ID.format(group, resource_type, name)
+    resource.name = name
+    resource.type = resource_type
+    return resource
+
+
+class TestResourceSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        patcher = mock.patch.dict(os.environ, {'AZURE_CONFIG_DIR': config_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = mock.MagicMock()
+        self.client.config.subscription_id = 'sub'
+        patcher = mock.patch('azure.cli.command_modules.resource.custom._resource_client_factory',
+                             return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resource_snapshot_combined_filters(self):
+        vm = 'Microsoft.Compute/virtualMachines'
+        resources = {
+            'rg1': [_resource('rg1', vm, 'vm1', 'westus', {'env': 'prod'}),
+                    _resource('rg1', vm, 'vm2', 'eastus', {'env': 'prod', 'owner': 'me'}),
+                    _resource('rg1', 'Microsoft.Storage/storageAccounts', 'sa1', 'westus',
+                              {'env': 'Prod'})],
+            'rg2': [_resource('rg2', vm, 'vm3', 'westus', {'env': 'test', 'environment': 'x'}),
+                    _resource('rg2', vm, 'VM1', 'westus')]
+        }
+        self.client.resource_groups.list.return_value = [ResourceGroup('westus', name=n)
+                                                         for n in sorted(resources)]
+        self.client.resource_groups.list_resources.side_effect = lambda g: iter(resources[g])
+
+        with self.assertRaises(CLIError):
+            list_resources(from_snapshot=True)
+
+        summary = create_resource_snapshot()
+        self.assertEqual((summary['resourceGroups'], summary['resources']), (2, 5))
+        self.assertTrue(os.path.isfile(summary['path']))
+
+        def names(**kwargs):
+            return [r['name'] for r in list_resources(from_snapshot=True, **kwargs)]
+
+        self.assertEqual(names(), ['vm1', 'vm2', 'sa1', 'vm3', 'VM1'])
+        self.assertEqual(names(tag={'env': 'prod'}, location='WestUS'), ['vm1', 'sa1'])
+        self.assertEqual(names(tag={'env': 'prod'}, resource_type='virtualMachines',
+                               resource_provider_namespace='Microsoft.Compute'),
+                         ['vm1', 'vm2'])
+        self.assertEqual(names(tag={'env*': ''}, resource_group_name='rg2'), ['vm3'])
+        self.assertEqual(names(tag={'owner': ''}), ['vm2'])
+        self.assertEqual(names(name='vm1'), ['vm1', 'VM1'])
+        self.assertEqual(names(name='vm1', resource_group_name='RG1'), ['vm1'])
+        self.assertEqual(names(location='northeurope'), [])
+        with self.assertRaises(CLIError):
+            names(resource_type='virtualMachines')
+        self.client.resources.list.assert_not_called()
+
+        delete_resource_snapshot()
+        with self.assertRaises(CLIError):
+            list_resources(from_snapshot=True)
+
+    def test_resource_snapshot_table_output(self):
+        resources = [_resource('rg1', 'Microsoft.Compute/virtualMachines', 'vm1', 'westus')]
+        self.client.resource_groups.list.return_value = [ResourceGroup('westus', name='rg1')]
+        self.client.resource_groups.list_resources.return_value = resources
+        create_resource_snapshot()
+
+        # the snapshot holds the resources as the service lists them
+        result = list_resources(from_snapshot=True)
+        self.assertEqual(result, [todict(r) for r in resources])
+
+        _add_resource_group(result)
+        table = format_table(CommandResultItem(result, table_transformer=transform_resource_list))
+        self.assertEqual(table.splitlines()[-1].split(),
+                         ['vm1', 'rg1', 'westus', 'Microsoft.Compute/virtualMachines'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from azure.mgmt.resource.resources.models import (DeploymentValidateResult,
+                                                  ResourceManagementErrorWithDetails)
+
+from azure.cli.core.util import CLIError, get_file_json
+from azure.cli.command_modules.resource._template_validation import (validate_template_locally,
+                                                                     _VALIDATION_CACHE)
+from azure.cli.command_modules.resource.custom import validate_arm_template
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(__file__), 'simple_deploy.json')
+
+
+def _site(name, depends_on=None):
+    return {'type': 'Microsoft.Web/sites', 'apiVersion': '2016-08-01', 'name': name,
+            'dependsOn': depends_on or []}
+
+
+class TestTemplateValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.template = get_file_json(TEMPLATE_FILE)
+
+    def test_validate_template_locally(self):
+        self.assertEqual(validate_template_locally(self.template, {'name': {'value': 'nsg'}}),
+                         [])
+
+        template = copy.deepcopy(self.template)
+        template['resources'][0]['location'] = "[parameters('region')]"
+        template['resources'][0]['tags'] = {'a': "[concat(variables('prefix'), 'x']"}
+        template['outputs']['id'] = {'type': 'string', 'value':
+                                     "[resourceId('Microsoft.Network/networkSecurityGroups')]"}
+        template['outputs']['escaped'] = {'type': 'string', 'value': "[[parameters('x')]"}
+        errors = validate_template_locally(template, {'name': {'value': 5},
+                                                      'nmae': {'value': 'nsg'}})
+        self.assertEqual(sorted(errors), sorted([
+            "parameters: 'name' expects a value of type 'string'",
+            "parameters: 'nmae' is not defined in the template",
+            "resources[0].location: the parameter 'region' is not defined in the template",
+            "resources[0].tags.a: invalid expression '[concat(variables('prefix'), 'x']': "
+            "unbalanced parentheses",
+            "outputs.id.value: resourceId() of type 'Microsoft.Network/networkSecurityGroups' "
+            "expects 1 resource name(s), got 0"
+        ]))
+
+    def test_validate_template_locally_variable_copy(self):
+        template = {
+            'variables': {
+                'count': 2,
+                'copy': [{'name': 'disks', 'count': "[variables('count')]",
+                          'input': {'lun': "[copyIndex('disks')]"}}]
+            },
+            'resources': [],
+            'outputs': {'disks': {'type': 'array', 'value': "[variables('disks')]"},
+                        'other': {'type': 'array', 'value': "[variables('nics')]"}}
+        }
+        self.assertEqual(validate_template_locally(template), [
+            "outputs.other.value: the variable 'nics' is not defined in the template"])
+
+    def test_validate_template_locally_resource_ids(self):
+        template = {'resources': [
+            _site('site'),
+            {'type': 'Microsoft.Web/sites/config', 'apiVersion': '2016-08-01', 'name': 'site/web',
+             'properties': {
+                 'ok': "[resourceId('rg', 'Microsoft.Web/sites/config', 'site', 'web')]",
+                 'split': "[resourceId('Microsoft.Web/sites/config', 'site/web')]",
+                 'computed': "[resourceId('Microsoft.Web/sites/config', concat('a', '/b'))]",
+                 'extra': "[resourceId('Microsoft.Web/sites', 'site', 'web')]"}}
+        ]}
+        self.assertEqual(validate_template_locally(template), [
+            "resources[1].properties.extra: resourceId() of type 'Microsoft.Web/sites' "
+            "expects 1 resource name(s), got 2"])
+
+    def test_validate_template_locally_dependency_cycle(self):
+        template = {
+            'parameters': {'siteName': {'type': 'string'}},
+            'resources': [
+                _site('[parameters(\'siteName\')]',
+                      ["[resourceId('Microsoft.Web/sites', 'b')]"]),
+                _site('b', ['Microsoft.Web/sites/c']),
+                _site('c', ["[resourceId('Microsoft.Web/sites', parameters( 'siteName' ))]"]),
+                _site('d', ['a-resource-defined-elsewhere', 'c'])
+            ]
+        }
+        self.assertEqual(validate_template_locally(template), [
+            "resources: circular dependency between [parameters('siteName')] -> b -> c -> "
+            "[parameters('siteName')]"])
+
+        template['resources'][2]['dependsOn'] = []
+        self.assertEqual(validate_template_locally(template), [])
+
+        # long chains are walked without recursion
+        chain = {'resources': [_site('s{}'.format(i), ['s{}'.format(i + 1)])
+                               for i in range(2000)]}
+        self.assertEqual(validate_template_locally(chain), [])
+        chain['resources'][-1]['dependsOn'] = ['s0']
+        self.assertEqual(len(validate_template_locally(chain)), 1)
+
+    @mock.patch('azure.cli.command_modules.resource.custom.get_mgmt_service_client')
+    def test_validate_arm_template_cache(self, client_factory_mock):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        patcher = mock.patch.dict(os.environ, {'AZURE_CONFIG_DIR': config_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(_VALIDATION_CACHE.__init__, ignore_corrupt_file=True)
+
+        client = client_factory_mock.return_value
+        client.config.subscription_id = 'sub'
+        client.deployments.validate.return_value = DeploymentValidateResult()
+
+        # templates with local errors are not sent to the service, unless asked to
+        with self.assertRaisesRegexp(CLIError, "'name' expects a value of type 'string'"):
+            validate_arm_template('rg', TEMPLATE_FILE, parameters=['{"name": {"value": 1}}'])
+        client.deployments.validate.assert_not_called()
+        validate_arm_template('rg', TEMPLATE_FILE, parameters=['{"name": {"value": 1}}'],
+                              skip_local_validation=True)
+        self.assertEqual(client.deployments.validate.call_count, 1)
+
+        parameters = ['{"name": {"value": "nsg"}}']
+        validate_arm_template('rg', TEMPLATE_FILE, parameters=parameters)
+        validate_arm_template('RG', TEMPLATE_FILE, parameters=parameters)
+        self.assertEqual(client.deployments.validate.call_count, 2)
+        self.assertTrue(os.path.isfile(os.path.join(config_dir, 'templateValidationCache.json')))
+
+        validate_arm_template('rg', TEMPLATE_FILE, parameters=['{"name": {"value": "nsg2"}}'])
+        validate_arm_template('rg', TEMPLATE_FILE, parameters=parameters, mode='Complete')
+        self.assertEqual(client.deployments.validate.call_count, 4)
+
+        # failed validations are not cached
+        client.deployments.validate.return_value = DeploymentValidateResult(
+            error=ResourceManagementErrorWithDetails())
+        validate_arm_template('other', TEMPLATE_FILE, parameters=parameters)
+        validate_arm_template('other', TEMPLATE_FILE, parameters=parameters)
+        self.assertEqual(client.deployments.validate.call_count, 6)
+
+        # a cache file torn by a concurrent write is ignored
+        _VALIDATION_CACHE.__init__(ignore_corrupt_file=True)
+        with open(os.path.join(config_dir, 'templateValidationCache.json'), 'w') as f:
+            f.write('{"0123": {"timesta')
+        client.deployments.validate.return_value = DeploymentValidateResult()
+        validate_arm_template('rg', TEMPLATE_FILE, parameters=parameters)
+        self.assertEqual(client.deployments.validate.call_count, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
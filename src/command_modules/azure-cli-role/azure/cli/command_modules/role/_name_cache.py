@@ -0,0 +1,68 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import time
+
+from azure.cli.core._config import az_config
+from azure.cli.core._environment import get_config_dir
+from azure.cli.core._session import Session
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+DEFAULT_NAME_CACHE_TTL = 60 * 60
+
+PRINCIPAL_NAMES = 'principals'
+ROLE_NAMES = 'roles'
+
+# The name cache maps the object ids of principals and the ids of role definitions to the names
+# displayed for them, so listing role assignments doesn't have to look up every name again
+_NAME_CACHE = Session(ignore_corrupt_file=True)
+
+
+def _get_name_cache_ttl():
+    return az_config.getint('role', 'name_cache_ttl', fallback=DEFAULT_NAME_CACHE_TTL)
+
+
+def _load_name_cache():
+    # the session is replaced atomically on save and a corrupt file is loaded as an empty cache
+    if not _NAME_CACHE.filename:
+        try:
+            _NAME_CACHE.load(os.path.join(get_config_dir(), 'roleNames.json'))
+        except (OSError, IOError) as ex:
+            logger.debug('Unable to load the role name cache: %s', ex)
+
+
+def get_cached_names(kind, ids):
+    """ Returns the names cached for those of the ids which haven't expired yet.
+    :param str kind: PRINCIPAL_NAMES or ROLE_NAMES.
+    :rtype: dict
+    """
+    ttl = _get_name_cache_ttl()
+    if ttl <= 0:
+        return {}
+    _load_name_cache()
+    entries = _NAME_CACHE.get(kind) or {}
+    now = time.time()
+    return {i: entries[i]['name'] for i in ids
+            if i in entries and entries[i]['timestamp'] + ttl >= now}
+
+
+def cache_names(kind, names):
+    """ Caches the names of the ids in the names dict, dropping the entries which expired. """
+    ttl = _get_name_cache_ttl()
+    if ttl <= 0 or not names:
+        return
+    _load_name_cache()
+    now = time.time()
+    entries = {k: v for k, v in (_NAME_CACHE.get(kind) or {}).items()
+               if v['timestamp'] + ttl >= now}
+    entries.update({k: {'name': v, 'timestamp': now} for k, v in names.items()})
+    _NAME_CACHE.data[kind] = entries
+    try:
+        _NAME_CACHE.save_with_retry()
+    except (OSError, IOError) as ex:
+        logger.debug('Unable to save the role name cache: %s', ex)
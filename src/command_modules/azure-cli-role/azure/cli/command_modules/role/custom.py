@@ -29,6 +29,10 @@ logger = azlogging.get_az_logger(__name__)
 
 _CUSTOM_RULE = 'CustomRole'
 
+# the most object ids the graph resolves in a single request
+_GRAPH_OBJECT_IDS_LIMIT = 1000
+_MAX_GRAPH_WORKERS = 8
+
 
 def list_role_definitions(name=None, resource_group_name=None, scope=None,
                           custom_role_only=False):
@@ -173,28 +177,52 @@ def list_role_assignments(assignee=None, role=None, resource_group_name=None,  #
     # it's possible that associated roles and principals were deleted, and we just do nothing.
 
     results = todict(assignments)
-
-    # pylint: disable=line-too-long
-    # fill in role names
-    role_defs = list(definitions_client.list(
-        scope=scope or ('/subscriptions/' + definitions_client.config.subscription_id)))
-    role_dics = {i.id: i.properties.role_name for i in role_defs}
+    role_dics, principal_dics = _resolve_assignment_names(
+        graph_client, definitions_client,
+        scope or ('/subscriptions/' + definitions_client.config.subscription_id),
+        set(i['properties']['roleDefinitionId'] for i in results),
+        set(i['properties']['principalId'] for i in results))
     for i in results:
         i['properties']['roleDefinitionName'] = role_dics.get(i['properties']['roleDefinitionId'],
                                                               None)
-
-    # fill in principal names
-    principal_ids = set(i['properties']['principalId'] for i in results)
-    if principal_ids:
-        principals = _get_object_stubs(graph_client, principal_ids)
-        principal_dics = {i.object_id: _get_displayable_name(i) for i in principals}
-        for i in results:
-            i['properties']['principalName'] = principal_dics.get(i['properties']['principalId'],
-                                                                  None)
+        i['properties']['principalName'] = principal_dics.get(i['properties']['principalId'],
+                                                              None)
 
     return results
 
 
+def _resolve_assignment_names(graph_client, definitions_client, scope, role_ids, principal_ids):
+    """ Returns the names of the role definitions and of the principals, looking up the names
+    which aren't cached yet concurrently: the role definitions of the scope, and the principals
+    in chunks the graph accepts in a single request. """
+    from concurrent.futures import ThreadPoolExecutor
+    from ._name_cache import get_cached_names, cache_names, ROLE_NAMES, PRINCIPAL_NAMES
+    role_names = get_cached_names(ROLE_NAMES, role_ids)
+    principal_names = get_cached_names(PRINCIPAL_NAMES, principal_ids)
+    missing_principal_ids = sorted(i for i in principal_ids if i not in principal_names)
+
+    with ThreadPoolExecutor(max_workers=_MAX_GRAPH_WORKERS) as executor:
+        role_defs = None
+        if any(i not in role_names for i in role_ids):
+            role_defs = executor.submit(lambda: list(definitions_client.list(scope=scope)))
+        principal_chunks = [
+            executor.submit(_get_object_stubs, graph_client,
+                            missing_principal_ids[i:i + _GRAPH_OBJECT_IDS_LIMIT])
+            for i in range(0, len(missing_principal_ids), _GRAPH_OBJECT_IDS_LIMIT)]
+
+        if role_defs:
+            fetched = {i.id: i.properties.role_name for i in role_defs.result()}
+            cache_names(ROLE_NAMES, fetched)
+            role_names.update(fetched)
+        fetched = {}
+        for chunk in principal_chunks:
+            fetched.update({i.object_id: _get_displayable_name(i) for i in chunk.result()})
+        cache_names(PRINCIPAL_NAMES, fetched)
+        principal_names.update(fetched)
+
+    return role_names, principal_names
+
+
 def _get_displayable_name(graph_object):
     if graph_object.user_principal_name:
         return graph_object.user_principal_name
@@ -248,12 +276,11 @@ def _search_role_assignments(assignments_client, definitions_client,  # pylint:
     else:
         assignments = list(assignments_client.list())
 
+    if assignments and scope:
+        scopes = _get_inherited_scopes(scope) if include_inherited else {_normalize_scope(scope)}
+        assignments = [a for a in assignments if _normalize_scope(a.properties.scope) in scopes]
+
     if assignments:
-        assignments = [a for a in assignments if (
-            not scope or
-            include_inherited and re.match(a.properties.scope, scope, re.I) or
-            a.properties.scope.lower() == scope.lower()
-        )]
 
         if role:
             role_id = _resolve_role_id(role, scope, definitions_client)
@@ -262,6 +289,18 @@ def _search_role_assignments(assignments_client, definitions_client,  # pylint:
     return assignments
 
 
+def _normalize_scope(scope):
+    return scope.lower().rstrip('/') or '/'
+
+
+def _get_inherited_scopes(scope):
+    """ Returns the scope and all the scopes it inherits assignments from, e.g. for
+    '/subscriptions/sub1/resourceGroups/rg1': '/', '/subscriptions',
+    '/subscriptions/sub1' and '/subscriptions/sub1/resourcegroups/rg1'. """
+    parts = _normalize_scope(scope).split('/')
+    return set('/'.join(parts[:i]) or '/' for i in range(1, len(parts) + 1))
+
+
 def _build_role_scope(resource_group_name, scope, subscription_id):
     subscription_scope = '/subscriptions/' + subscription_id
     if scope:
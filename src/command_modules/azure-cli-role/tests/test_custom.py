@@ -2,10 +2,18 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
 import unittest
 import mock
 
-from azure.cli.command_modules.role.custom import _resolve_role_id
+from azure.mgmt.authorization.models import (RoleAssignment, RoleAssignmentPropertiesWithScope,
+                                             RoleDefinition, RoleDefinitionProperties)
+from azure.graphrbac.models import User
+
+from azure.cli.command_modules.role import _name_cache
+from azure.cli.command_modules.role.custom import _resolve_role_id, list_role_assignments
 
 # pylint: disable=line-too-long
 
@@ -26,3 +34,68 @@ class TestRoleCustomCommands(unittest.TestCase):
         # action (using a full id)
         test_full_id = '/subscriptions/0b1f6471-1bf0-4dda-aec3-cb9272123456/providers/microsoft.authorization/roleDefinitions/5370bbf4-6b73-4417-969b-8f2e6e123456'
         self.assertEqual(test_full_id, _resolve_role_id(test_full_id, 'foobar', mock_client))
+
+    @mock.patch('azure.cli.command_modules.role.custom._graph_client_factory', autospec=True)
+    @mock.patch('azure.cli.command_modules.role.custom._auth_client_factory', autospec=True)
+    def test_list_role_assignments_resolves_names_in_chunks(self, auth_client_mock, graph_client_mock):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        patcher = mock.patch.dict(os.environ, {'AZURE_CONFIG_DIR': config_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        name_cache = _name_cache._NAME_CACHE  # pylint: disable=protected-access
+        name_cache.__init__(ignore_corrupt_file=True)
+        self.addCleanup(name_cache.__init__, ignore_corrupt_file=True)
+        # a cache file torn by a concurrent write is ignored
+        with open(os.path.join(config_dir, 'roleNames.json'), 'w') as f:
+            f.write('{"principals": {"p1": {"na')
+
+        sub_scope = '/subscriptions/123'
+        role_id = sub_scope + '/providers/Microsoft.Authorization/roleDefinitions/r1'
+        scopes = ['/', sub_scope, sub_scope + '/resourceGroups/RG1',
+                  sub_scope + '/resourceGroups/rg1/providers/Microsoft.Web/sites/site1',
+                  sub_scope + '/resourceGroups/rg10']
+        assignments = [
+            RoleAssignment(id='a{}'.format(i), properties=RoleAssignmentPropertiesWithScope(
+                scope=scopes[i % len(scopes)], role_definition_id=role_id,
+                principal_id='p{}'.format(i)))
+            for i in range(2500)]
+
+        factory = auth_client_mock.return_value
+        factory.role_definitions.config.subscription_id = '123'
+        factory.role_assignments.list.return_value = assignments
+        factory.role_assignments.list_for_scope.return_value = assignments
+        factory.role_definitions.list.return_value = [
+            RoleDefinition(id=role_id, properties=RoleDefinitionProperties(role_name='Reader'))]
+        graph_client = graph_client_mock.return_value
+
+        def _get_objects(params):
+            self.assertLessEqual(len(params.object_ids), 1000)
+            # a deleted principal isn't returned
+            return [User(object_id=i, user_principal_name=i + '@example.com')
+                    for i in params.object_ids if i != 'p7']
+        graph_client.objects.get_objects_by_object_ids.side_effect = _get_objects
+
+        # action
+        result = list_role_assignments(show_all=True)
+
+        # assert
+        self.assertEqual(len(result), 2500)
+        self.assertEqual(graph_client.objects.get_objects_by_object_ids.call_count, 3)
+        self.assertEqual(factory.role_definitions.list.call_count, 1)
+        self.assertEqual(result[1]['properties']['principalName'], 'p1@example.com')
+        self.assertEqual(result[1]['properties']['roleDefinitionName'], 'Reader')
+        self.assertIsNone(result[7]['properties']['principalName'])
+
+        # action (names are cached, only inherited assignments are listed)
+        result = list_role_assignments(resource_group_name='rg1', include_inherited=True)
+
+        # assert
+        self.assertEqual(len(result), 1500)
+        self.assertEqual(set(i['properties']['scope'] for i in result), set(scopes[:3]))
+        self.assertEqual(result[1]['properties']['principalName'], 'p1@example.com')
+        self.assertEqual(result[1]['properties']['roleDefinitionName'], 'Reader')
+        self.assertEqual(factory.role_definitions.list.call_count, 1)
+        # only the principal which wasn't found is looked up again
+        self.assertEqual(graph_client.objects.get_objects_by_object_ids.call_args[0][0].object_ids,
+                         ['p7'])
@@ -4,22 +4,27 @@
 # --------------------------------------------------------------------------------------------
 
 from __future__ import print_function
+import json
 import os.path
+import threading
 from collections import namedtuple
 from azure.common import AzureException
 
-from azure.cli.core.util import CLIError
+from azure.cli.core._environment import get_config_dir
+from azure.cli.core.util import CLIError, write_file_atomically
 from azure.cli.core.azlogging import get_az_logger
 from azure.cli.command_modules.storage.util import (create_blob_service_from_storage_client,
                                                     create_file_share_from_storage_client,
                                                     create_short_lived_share_sas,
                                                     create_short_lived_container_sas,
                                                     filter_none, collect_blobs, collect_files,
-                                                    mkdir_p)
+                                                    collect_blob_objects, mkdir_p, run_batch)
 
 
 BlobCopyResult = namedtuple('BlobCopyResult', ['name', 'copy_id'])
 
+DOWNLOAD_MANIFEST_DIR = 'blobDownloads'
+
 
 # pylint: disable=too-many-arguments
 def storage_blob_copy_batch(client, source_client,
@@ -90,7 +95,8 @@ def storage_blob_copy_batch(client, source_client,
 
 # pylint: disable=unused-argument
 def storage_blob_download_batch(client, source, destination, source_container_name, pattern=None,
-                                dryrun=False):
+                                dryrun=False, max_connections=2, max_workers=8,
+                                skip_unchanged=False):
     """
     Download blobs in a container recursively
 
@@ -109,10 +115,18 @@ def storage_blob_download_batch(client, source, destination, source_container_na
     :param str pattern:
         The pattern is used for files globbing. The supported patterns are '*', '?', '[seq]',
         and '[!seq]'.
-    """
-    source_blobs = collect_blobs(client, source_container_name, pattern)
 
+    :param int max_workers:
+        The number of blobs downloaded in parallel. Each blob may use up to max_connections
+        connections on its own.
+
+    :param bool skip_unchanged:
+        Keep track of the blobs downloaded into the destination folder, and skip the blobs whose
+        size, ETag or Content-MD5 haven't changed since they were downloaded. An interrupted
+        download resumes where it stopped.
+    """
     if dryrun:
+        source_blobs = list(collect_blobs(client, source_container_name, pattern))
         logger = get_az_logger(__name__)
         logger.warning('download action: from %s to %s', source, destination)
         logger.warning('    pattern %s', pattern)
@@ -122,9 +136,106 @@ def storage_blob_download_batch(client, source, destination, source_container_na
         for b in source_blobs or []:
             logger.warning('  - %s', b)
         return []
-    else:
-        return list(_download_blob(client, source_container_name, destination, blob) for blob in
-                    source_blobs)
+
+    logger = get_az_logger(__name__)
+    source_blobs = list(collect_blob_objects(client, source_container_name, pattern))
+    manifest = None
+    if skip_unchanged:
+        manifest = _BlobDownloadManifest(destination, client.account_name, source_container_name)
+        changed_blobs = [b for b in source_blobs if not manifest.is_unchanged(b)]
+        logger.warning('Skipping %d unchanged blobs.', len(source_blobs) - len(changed_blobs))
+        source_blobs = changed_blobs
+
+    def _download(blob):
+        _download_blob(client, source_container_name, destination, blob.name, max_connections)
+        if manifest:
+            manifest.add(blob)
+        return blob.name
+
+    try:
+        outcomes = run_batch(_download, source_blobs, max_workers)
+    finally:
+        if manifest:
+            manifest.save()
+
+    results = []
+    for blob, result, error in outcomes:
+        if error:
+            logger.error("Failed to download '%s': %s", blob.name, error)
+        else:
+            results.append(result)
+    logger.warning('%d of %d blobs downloaded from container %s.', len(results), len(outcomes),
+                   source_container_name)
+    if len(results) < len(outcomes):
+        raise CLIError('{} blobs failed to download.'.format(len(outcomes) - len(results)))
+    return results
+
+
+class _BlobDownloadManifest(object):
+    """
+    Records the size, ETag and Content-MD5 of the blobs downloaded into a folder, keyed by
+    account and container. It is saved while downloading so an interrupted run can resume.
+    """
+
+    save_interval = 100
+
+    def __init__(self, destination, account_name, container_name):
+        self._path = self._get_path(destination)
+        self._destination = destination
+        self._key = '{}/{}'.format(account_name, container_name)
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        try:
+            with open(self._path, 'r') as manifest_file:
+                self._data = json.load(manifest_file)
+        except (IOError, OSError, ValueError):
+            self._data = {}
+        self._blobs = self._data.setdefault(self._key, {})
+
+    @staticmethod
+    def _get_path(destination):
+        """ The manifest is kept in the configuration directory rather than in the destination
+        folder, so it isn't picked up by a later upload-batch of the folder. """
+        import hashlib
+        folder = os.path.normcase(os.path.abspath(destination))
+        name = hashlib.sha1(folder.encode('utf-8')).hexdigest()
+        return os.path.join(get_config_dir(), DOWNLOAD_MANIFEST_DIR, name + '.json')
+
+    @staticmethod
+    def _get_entry(blob):
+        properties = blob.properties
+        content_settings = getattr(properties, 'content_settings', None)
+        return {'size': properties.content_length,
+                'etag': properties.etag,
+                'md5': getattr(content_settings, 'content_md5', None)}
+
+    def is_unchanged(self, blob):
+        recorded = self._blobs.get(blob.name)
+        local_path = os.path.join(self._destination, blob.name)
+        if not recorded or not os.path.isfile(local_path):
+            return False
+        current = self._get_entry(blob)
+        if recorded['size'] != current['size'] or os.path.getsize(local_path) != current['size']:
+            return False
+        return recorded['etag'] == current['etag'] or \
+            bool(current['md5'] and recorded['md5'] == current['md5'])
+
+    def add(self, blob):
+        with self._lock:
+            self._blobs[blob.name] = self._get_entry(blob)
+            self._unsaved += 1
+            if self._unsaved >= self.save_interval:
+                self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        if not os.path.isdir(os.path.dirname(self._path)):
+            os.makedirs(os.path.dirname(self._path))
+        write_file_atomically(self._path, json.dumps(self._data))
+        self._unsaved = 0
 
 
 def storage_blob_upload_batch(client, source, destination, pattern=None, source_files=None,
@@ -132,7 +243,7 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
                               content_settings=None, metadata=None, validate_content=False,
                               maxsize_condition=None, max_connections=2, lease_id=None,
                               if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, max_workers=8):
     """
     Upload files to storage container as blobs
 
@@ -151,6 +262,10 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
     :param bool dryrun:
         Show the summary of the operations to be taken instead of actually upload the file(s)
 
+    :param int max_workers:
+        The number of files uploaded in parallel. Each file may use up to max_connections
+        connections on its own.
+
     :param string if_match:
         An ETag value, or the wildcard character (*). Specify this header to perform the operation
         only if the resource's ETag matches the value specified.
@@ -161,6 +276,8 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
         wildcard character (*) to perform the operation only if the resource does not exist,
         and fail the operation if it does exist.
     """
+    logger = get_az_logger(__name__)
+
     def _append_blob(file_path, blob_name):
         if not client.exists(destination_container_name, blob_name):
             client.create_blob(
@@ -204,7 +321,6 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
     upload_action = _upload_blob if blob_type == 'block' or blob_type == 'page' else _append_blob
 
     if dryrun:
-        logger = get_az_logger(__name__)
         logger.warning('upload action: from %s to %s', source, destination)
         logger.warning('    pattern %s', pattern)
         logger.warning('  container %s', destination_container_name)
@@ -213,20 +329,52 @@ def storage_blob_upload_batch(client, source, destination, pattern=None, source_
         logger.warning(' operations')
         for f in source_files or []:
             logger.warning('  - %s => %s', *f)
-    else:
-        for f in source_files or []:
-            print('uploading {}'.format(f[0]))
-            upload_action(*f)
-
-
-def _download_blob(blob_service, container, destination_folder, blob_name):
+        return None
+
+    def _upload_file(source_file):
+        file_path, blob_name = source_file
+        result = upload_action(file_path, blob_name)
+        logger.info('uploaded %s', file_path)
+        return result
+
+    # start with the largest files so they don't end up being the long tail of the batch
+    scheduled = sorted(source_files or [], key=lambda f: os.path.getsize(f[0]), reverse=True)
+    outcomes = dict((source_file, (result, error)) for source_file, result, error in
+                    run_batch(_upload_file, scheduled, max_workers))
+
+    # every file is reported, so the files which did upload are known when others failed
+    results = []
+    failures = 0
+    for file_path, blob_name in source_files or []:
+        result, error = outcomes[(file_path, blob_name)]
+        record = {
+            'file': file_path,
+            'blob': client.make_blob_url(destination_container_name, blob_name),
+            'eTag': getattr(result, 'etag', None),
+            'lastModified': getattr(result, 'last_modified', None)
+        }
+        if error:
+            failures += 1
+            logger.error("Failed to upload '%s': %s", file_path, error)
+            record['error'] = str(error)
+        results.append(record)
+
+    logger.warning('%d of %d files uploaded to container %s.', len(results) - failures,
+                   len(results), destination_container_name)
+    if failures:
+        raise CLIError('{} of {} files failed to upload.'.format(failures, len(results)))
+    return results
+
+
+def _download_blob(blob_service, container, destination_folder, blob_name, max_connections=2):
     # TODO: try catch IO exception
     destination_path = os.path.join(destination_folder, blob_name)
     destination_folder = os.path.dirname(destination_path)
     if not os.path.exists(destination_folder):
         mkdir_p(destination_folder)
 
-    blob = blob_service.get_blob_to_path(container, blob_name, destination_path)
+    blob = blob_service.get_blob_to_path(container, blob_name, destination_path,
+                                         max_connections=max_connections)
     return blob.name
 
 
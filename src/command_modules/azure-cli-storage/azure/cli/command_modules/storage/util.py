@@ -31,6 +31,23 @@ def collect_blobs(blob_service, container, pattern=None):
                 if _match_path(pattern, blob.name))
 
 
+def collect_blob_objects(blob_service, container, pattern=None):
+    """
+    Same as collect_blobs, but returns the blobs along with their properties.
+    """
+    if not blob_service:
+        raise ValueError('missing parameter blob_service')
+
+    if not container:
+        raise ValueError('missing parameter container')
+
+    if not _pattern_has_wildcards(pattern):
+        return [blob_service.get_blob_properties(container, pattern)]
+    else:
+        return (blob for blob in blob_service.list_blobs(container)
+                if _match_path(pattern, blob.name))
+
+
 def collect_files(file_service, share, pattern=None):
     """
     Search files in the the given file share recursively. Filter the files by matching their path
@@ -137,6 +154,30 @@ def mkdir_p(path):
             raise
 
 
+def run_batch(action, items, max_workers):
+    """
+    Run the action for every item on a pool of max_workers threads. Returns a list of
+    (item, result, error) tuples in the order of the items. Failed requests are already retried
+    by the retry policy of the storage client, so an error is final.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _run(item):
+        try:
+            return item, action(item), None
+        except Exception as ex:  # pylint: disable=broad-except
+            return item, None, ex
+
+    items = list(items)
+    if not items:
+        return []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+    try:
+        return list(executor.map(_run, items))
+    finally:
+        executor.shutdown(wait=False)
+
+
 def _pattern_has_wildcards(p):
     return not p or p.find('*') != -1 or p.find('?') != -1 or p.find('[') != -1
 
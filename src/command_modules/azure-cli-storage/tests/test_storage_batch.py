@@ -0,0 +1,161 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+from azure.common import AzureHttpError
+
+from azure.cli.core.util import CLIError
+from azure.cli.command_modules.storage.blob import (storage_blob_upload_batch,
+                                                    storage_blob_download_batch)
+from azure.cli.command_modules.storage.util import run_batch, glob_files_locally
+
+
+class TestStorageBatch(unittest.TestCase):
+
+    def setUp(self):
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        patcher = mock.patch.dict(os.environ, {'AZURE_CONFIG_DIR': config_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        for name, size in [('small.txt', 1), ('large.txt', 100), ('medium.txt', 10)]:
+            with open(os.path.join(self.source, name), 'w') as f:
+                f.write('x' * size)
+        self.source_files = list(glob_files_locally(self.source, None))
+
+    def _upload_batch(self, client, **kwargs):
+        return storage_blob_upload_batch(client, self.source, 'container',
+                                         source_files=self.source_files,
+                                         destination_container_name='container',
+                                         blob_type='block', **kwargs)
+
+    def test_run_batch_reports_failures(self):
+        calls = []
+
+        def action(item):
+            calls.append(item)
+            if item == 'missing':
+                raise AzureHttpError('not found', 404)
+            return item.upper()
+
+        results = run_batch(action, ['a', 'missing', 'b'], 2)
+
+        self.assertEqual([(i, r) for i, r, _ in results],
+                         [('a', 'A'), ('missing', None), ('b', 'B')])
+        self.assertIsInstance(results[1][2], AzureHttpError)
+        # the storage client retries failed requests on its own
+        self.assertEqual(sorted(calls), ['a', 'b', 'missing'])
+
+    def test_upload_batch_largest_files_first(self):
+        client = mock.MagicMock()
+        client.make_blob_url.side_effect = lambda c, b: 'https://account/{}/{}'.format(c, b)
+
+        results = self._upload_batch(client, max_workers=1)
+
+        uploaded = [c[1]['blob_name'] for c in client.create_blob_from_path.call_args_list]
+        self.assertEqual(uploaded, ['large.txt', 'medium.txt', 'small.txt'])
+        self.assertEqual([r['blob'] for r in results],
+                         ['https://account/container/' + f[1] for f in self.source_files])
+
+    def test_upload_batch_reports_failures(self):
+        client = mock.MagicMock()
+
+        def upload(**kwargs):
+            if kwargs['blob_name'] == 'medium.txt':
+                raise AzureHttpError('forbidden', 403)
+        client.create_blob_from_path.side_effect = upload
+
+        logger_mock = mock.MagicMock()
+        with mock.patch('azure.cli.command_modules.storage.blob.get_az_logger',
+                        return_value=logger_mock):
+            with self.assertRaisesRegexp(CLIError, '1 of 3 files failed to upload'):
+                self._upload_batch(client, max_workers=3)
+        self.assertEqual(client.create_blob_from_path.call_count, 3)
+        # the failed file is logged along with how many files did upload
+        self.assertIn('medium.txt', str(logger_mock.error.call_args))
+        logger_mock.warning.assert_called_with('%d of %d files uploaded to container %s.', 2, 3,
+                                               'container')
+
+    def test_upload_batch_dryrun(self):
+        client = mock.MagicMock()
+        self.assertIsNone(self._upload_batch(client, dryrun=True))
+        self.assertFalse(client.create_blob_from_path.called)
+
+    def _download_batch(self, client, blobs, destination, **kwargs):
+        client.list_blobs.return_value = blobs
+        client.account_name = 'account'
+
+        def download(container, name, path, **_):
+            with open(path, 'w') as f:
+                f.write('x' * next(b for b in blobs if b.name == name).properties.content_length)
+            return _blob_stub(name, 0)
+        client.get_blob_to_path.side_effect = download
+        return storage_blob_download_batch(client, 'container', destination, 'container',
+                                           skip_unchanged=True, **kwargs)
+
+    def test_download_batch_skips_unchanged_blobs(self):
+        destination = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, destination)
+        blobs = [_blob_stub('a.txt', 3), _blob_stub('dir/b.txt', 5, md5='b-md5'),
+                 _blob_stub('c.txt', 4)]
+
+        client = mock.MagicMock()
+        self.assertEqual(sorted(self._download_batch(client, blobs, destination)),
+                         ['a.txt', 'c.txt', 'dir/b.txt'])
+        self.assertTrue(os.path.isfile(os.path.join(destination, 'dir', 'b.txt')))
+        # the manifest isn't kept among the downloaded files
+        self.assertEqual(sorted(os.listdir(destination)), ['a.txt', 'c.txt', 'dir'])
+
+        # a.txt is unchanged, b.txt was uploaded again with the same content, c.txt changed
+        blobs[1].properties.etag = 'new-etag'
+        blobs[2] = _blob_stub('c.txt', 6)
+        client = mock.MagicMock()
+        self.assertEqual(self._download_batch(client, blobs, destination), ['c.txt'])
+
+        # a local file of a different size is downloaded again
+        with open(os.path.join(destination, 'a.txt'), 'w') as f:
+            f.write('local change')
+        client = mock.MagicMock()
+        self.assertEqual(self._download_batch(client, blobs, destination, max_workers=1),
+                         ['a.txt'])
+
+    def test_download_batch_resumes(self):
+        destination = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, destination)
+        blobs = [_blob_stub('a.txt', 3), _blob_stub('b.txt', 5)]
+
+        client = mock.MagicMock()
+        client.list_blobs.return_value = blobs
+        client.account_name = 'account'
+        with mock.patch('azure.cli.command_modules.storage.blob._download_blob',
+                        side_effect=[None, AzureHttpError('forbidden', 403)]), \
+                self.assertRaises(CLIError):
+            storage_blob_download_batch(client, 'container', destination, 'container',
+                                        max_workers=1, skip_unchanged=True)
+        with open(os.path.join(destination, 'a.txt'), 'w') as f:
+            f.write('xxx')
+
+        client = mock.MagicMock()
+        self.assertEqual(self._download_batch(client, blobs, destination), ['b.txt'])
+
+
+def _blob_stub(name, size, etag=None, md5=None):
+    blob = mock.MagicMock()
+    blob.name = name
+    blob.properties.content_length = size
+    blob.properties.etag = etag or '{}-{}'.format(name, size)
+    blob.properties.content_settings.content_md5 = md5
+    return blob
+
+
+if __name__ == '__main__':
+    unittest.main()
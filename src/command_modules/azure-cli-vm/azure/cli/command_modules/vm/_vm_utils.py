@@ -19,15 +19,14 @@ def read_content_if_is_file(string_or_file):
 
 def _resolve_api_version(provider_namespace, resource_type, parent_path):
     from azure.cli.core.commands.client_factory import get_mgmt_service_client
+    from azure.cli.core.commands.arm import find_provider_resource_types
     from azure.cli.core.profiles import ResourceType
     client = get_mgmt_service_client(ResourceType.MGMT_RESOURCE_RESOURCES)
-    provider = client.providers.get(provider_namespace)
 
     # If available, we will use parent resource's api-version
     resource_type_str = (parent_path.split('/')[0] if parent_path else resource_type)
 
-    rt = [t for t in provider.resource_types  # pylint: disable=no-member
-          if t.resource_type.lower() == resource_type_str.lower()]
+    rt = find_provider_resource_types(client, provider_namespace, resource_type_str)
     if not rt:
         raise CLIError('Resource type {} not found.'.format(resource_type_str))
     if len(rt) == 1 and rt[0].api_versions:
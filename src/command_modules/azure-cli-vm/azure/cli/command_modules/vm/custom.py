@@ -92,6 +92,10 @@ _LINUX_ACCESS_EXT = 'VMAccessForLinux'
 _WINDOWS_ACCESS_EXT = 'VMAccessAgent'
 _LINUX_DIAG_EXT = 'LinuxDiagnostic'
 _WINDOWS_DIAG_EXT = 'IaaSDiagnostics'
+
+# concurrent instance view requests of 'vm list --show-details'
+_MAX_INSTANCE_VIEW_WORKERS = 20
+
 extension_mappings = {
     _LINUX_ACCESS_EXT: {
         'version': '1.4',
@@ -158,7 +162,7 @@ def list_vm(resource_group_name=None, show_details=False):
     vm_list = ccf.virtual_machines.list(resource_group_name=resource_group_name) \
         if resource_group_name else ccf.virtual_machines.list_all()
     if show_details:
-        return [get_vm_details(_parse_rg_name(v.id)[0], v.name) for v in vm_list]
+        return _get_vms_details(list(vm_list), resource_group_name)
     else:
         return list(vm_list)
 
@@ -173,29 +177,71 @@ def show_vm(resource_group_name, vm_name, show_details=False):
 def get_vm_details(resource_group_name, vm_name):
     result = get_instance_view(resource_group_name, vm_name)
     network_client = get_mgmt_service_client(ResourceType.MGMT_NETWORK)
-    public_ips = []
+    return _set_vm_details(result, network_client, {}, {})
+
+
+def _get_vms_details(vms, resource_group_name=None):
+    """ Get the details of many VMs at once: NICs and public IPs are listed once for the resource
+    group (or the whole subscription) and joined by id, only the instance views are fetched per
+    VM. NICs and public IPs in other resource groups are fetched by id. """
+    from concurrent.futures import ThreadPoolExecutor
+    if not vms:
+        return []
+    network_client = get_mgmt_service_client(ResourceType.MGMT_NETWORK)
+    if resource_group_name:
+        nics = network_client.network_interfaces.list(resource_group_name)
+        public_ips = network_client.public_ip_addresses.list(resource_group_name)
+    else:
+        nics = network_client.network_interfaces.list_all()
+        public_ips = network_client.public_ip_addresses.list_all()
+    nics = {n.id.lower(): n for n in nics}
+    public_ips = {p.id.lower(): p for p in public_ips}
+
+    def _get_instance_view(vm):
+        return get_instance_view(_parse_rg_name(vm.id)[0], vm.name)
+
+    with ThreadPoolExecutor(max_workers=min(_MAX_INSTANCE_VIEW_WORKERS, len(vms))) as executor:
+        instance_views = list(executor.map(_get_instance_view, vms))
+    return [_set_vm_details(r, network_client, nics, public_ips) for r in instance_views]
+
+
+def _set_vm_details(result, network_client, nics, public_ips):
+    # NICs and public IPs are looked up in the given dictionaries (by lower case id) first
+    def _get_nic(nic_id):
+        nic = nics.get(nic_id.lower())
+        if nic is None:
+            nic_parts = parse_resource_id(nic_id)
+            nic = network_client.network_interfaces.get(nic_parts['resource_group'],
+                                                        nic_parts['name'])
+        return nic
+
+    def _get_public_ip(public_ip_id):
+        public_ip = public_ips.get(public_ip_id.lower())
+        if public_ip is None:
+            res = parse_resource_id(public_ip_id)
+            public_ip = network_client.public_ip_addresses.get(res['resource_group'], res['name'])
+        return public_ip
+
+    public_ip_addresses = []
     fqdns = []
     private_ips = []
     mac_addresses = []
     # pylint: disable=line-too-long,no-member
     for nic_ref in result.network_profile.network_interfaces:
-        nic_parts = parse_resource_id(nic_ref.id)
-        nic = network_client.network_interfaces.get(nic_parts['resource_group'], nic_parts['name'])
+        nic = _get_nic(nic_ref.id)
         if nic.mac_address:
             mac_addresses.append(nic.mac_address)
         for ip_configuration in nic.ip_configurations:
             private_ips.append(ip_configuration.private_ip_address)
             if ip_configuration.public_ip_address:
-                res = parse_resource_id(ip_configuration.public_ip_address.id)
-                public_ip_info = network_client.public_ip_addresses.get(res['resource_group'],
-                                                                        res['name'])
+                public_ip_info = _get_public_ip(ip_configuration.public_ip_address.id)
                 if public_ip_info.ip_address:
-                    public_ips.append(public_ip_info.ip_address)
+                    public_ip_addresses.append(public_ip_info.ip_address)
                 if public_ip_info.dns_settings:
                     fqdns.append(public_ip_info.dns_settings.fqdn)
 
     setattr(result, 'power_state', ','.join([s.display_status for s in result.instance_view.statuses if s.code.startswith('PowerState/')]))
-    setattr(result, 'public_ips', ','.join(public_ips))
+    setattr(result, 'public_ips', ','.join(public_ip_addresses))
     setattr(result, 'fqdns', ','.join(fqdns))
     setattr(result, 'private_ips', ','.join(private_ips))
     setattr(result, 'mac_addresses', ','.join(mac_addresses))
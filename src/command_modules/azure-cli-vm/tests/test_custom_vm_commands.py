@@ -15,7 +15,7 @@ from azure.cli.command_modules.vm.custom import (_get_access_extension_upgrade_i
                                                  _WINDOWS_ACCESS_EXT,
                                                  _get_extension_instance_name)
 from azure.cli.command_modules.vm.custom import \
-    (attach_unmanaged_data_disk, detach_data_disk, get_vmss_instance_view)
+    (attach_unmanaged_data_disk, detach_data_disk, get_vmss_instance_view, list_vm)
 from azure.cli.command_modules.vm.disk_encryption import (enable,
                                                           disable,
                                                           _check_encrypt_is_supported)
@@ -356,6 +356,84 @@ class Test_Vm_Custom(unittest.TestCase):
         # assert
         self.assertEqual(result, 'extension1')
 
+    @mock.patch('azure.cli.command_modules.vm.custom.get_instance_view', autospec=True)
+    @mock.patch('azure.cli.command_modules.vm.custom.get_mgmt_service_client', autospec=True)
+    @mock.patch('azure.cli.command_modules.vm.custom._compute_client_factory', autospec=True)
+    def test_list_vm_show_details_joins_network_resources(self, compute_client_factory_mock,
+                                                          network_client_factory_mock,
+                                                          get_instance_view_mock):
+        from azure.mgmt.compute.models import NetworkInterfaceReference
+        prefix = '/subscriptions/sub/resourceGroups/{}/providers/'
+        vm_id = prefix.format('rg') + 'Microsoft.Compute/virtualMachines/'
+        nic_id = prefix + 'Microsoft.Network/networkInterfaces/'
+        pip_id = prefix.format('rg') + 'Microsoft.Network/publicIPAddresses/'
+        vms = [mock.MagicMock(id=vm_id + 'vm{}'.format(i)) for i in range(3)]
+        for i, vm in enumerate(vms):
+            vm.name = 'vm{}'.format(i)
+        compute_client_factory_mock.return_value.virtual_machines.list_all.return_value = vms
+
+        def _get_instance_view(resource_group_name, vm_name):
+            view = FakedVM(nics=[NetworkInterfaceReference(nic_id.format('RG') + vm_name + '-nic')])
+            view.instance_view = mock.MagicMock()
+            view.instance_view.statuses = [InstanceViewStatus(code='PowerState/running',
+                                                              display_status='VM running')]
+            return view
+        get_instance_view_mock.side_effect = _get_instance_view
+
+        def _nic(vm_name, index):
+            ip_config = mock.MagicMock(private_ip_address='10.0.0.{}'.format(index))
+            ip_config.public_ip_address.id = pip_id + vm_name + '-ip'
+            return mock.MagicMock(id=nic_id.format('rg') + vm_name + '-nic',
+                                  mac_address='00-0D-3A-00-00-0{}'.format(index),
+                                  ip_configurations=[ip_config])
+
+        def _public_ip(vm_name, index):
+            public_ip = mock.MagicMock(id=pip_id + vm_name + '-ip',
+                                       ip_address='52.0.0.{}'.format(index))
+            public_ip.dns_settings.fqdn = vm_name + '.westus.cloudapp.azure.com'
+            return public_ip
+
+        network_client = network_client_factory_mock.return_value
+        network_client.network_interfaces.list_all.return_value = \
+            [_nic(vm.name, i) for i, vm in enumerate(vms)]
+        network_client.public_ip_addresses.list_all.return_value = \
+            [_public_ip(vm.name, i) for i, vm in enumerate(vms)]
+
+        result = list_vm(show_details=True)
+
+        self.assertEqual([r.private_ips for r in result], ['10.0.0.0', '10.0.0.1', '10.0.0.2'])
+        self.assertEqual([r.public_ips for r in result], ['52.0.0.0', '52.0.0.1', '52.0.0.2'])
+        self.assertEqual(result[1].fqdns, 'vm1.westus.cloudapp.azure.com')
+        self.assertEqual(result[2].mac_addresses, '00-0D-3A-00-00-02')
+        self.assertEqual(result[0].power_state, 'VM running')
+        # NICs and public IPs are listed once, not fetched per VM
+        self.assertFalse(network_client.network_interfaces.get.called)
+        self.assertFalse(network_client.public_ip_addresses.get.called)
+        self.assertEqual(get_instance_view_mock.call_count, 3)
+
+        # in a resource group only its network resources are listed, those in other groups are
+        # fetched by id
+        compute_client_factory_mock.return_value.virtual_machines.list.return_value = vms
+        network_client.network_interfaces.list.return_value = \
+            [_nic(vm.name, i) for i, vm in enumerate(vms[:2])]
+        network_client.public_ip_addresses.list.return_value = \
+            [_public_ip(vm.name, i) for i, vm in enumerate(vms)]
+        network_client.network_interfaces.get.return_value = _nic('vm2', 2)
+
+        result = list_vm(resource_group_name='rg', show_details=True)
+
+        self.assertEqual([r.private_ips for r in result], ['10.0.0.0', '10.0.0.1', '10.0.0.2'])
+        network_client.network_interfaces.list.assert_called_once_with('rg')
+        network_client.public_ip_addresses.list.assert_called_once_with('rg')
+        network_client.network_interfaces.get.assert_called_once_with('RG', 'vm2-nic')
+        self.assertEqual(network_client.network_interfaces.list_all.call_count, 1)
+
+        # no VMs, no network requests
+        compute_client_factory_mock.return_value.virtual_machines.list.return_value = []
+        network_client_factory_mock.reset_mock()
+        self.assertEqual(list_vm(resource_group_name='rg', show_details=True), [])
+        self.assertFalse(network_client_factory_mock.called)
+
 
 class FakedVM:  # pylint: disable=too-few-public-methods,old-style-class
     def __init__(self, nics=None, disks=None, os_disk=None):